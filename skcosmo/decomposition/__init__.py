@@ -3,7 +3,19 @@ The :mod:`skcosmo.decomposition` module includes the two distance
 measures, as defined by Principal Covariates Regression (PCovR)
 """
 
-from .pcovr import PCovR, pcovr_covariance, pcovr_kernel
+from ..utils import pcovr_covariance, pcovr_kernel
+from .pcovr import PCovR
+from .pcovr_cv import PCovRCV
 from .kpcovr import KPCovR
+from .kpcovr_inference import KPCovRInference
+from .sparse_kpcovr import SparseKPCovR
 
-__all__ = ["pcovr_covariance", "pcovr_kernel", "PCovR", "KPCovR"]
+__all__ = [
+    "pcovr_covariance",
+    "pcovr_kernel",
+    "PCovR",
+    "PCovRCV",
+    "KPCovR",
+    "KPCovRInference",
+    "SparseKPCovR",
+]
@@ -1,22 +1,36 @@
 import numpy as np
 import numbers
 
+from collections import OrderedDict
+
 from scipy import linalg
-from scipy.sparse.linalg import svds
+from scipy.sparse.linalg import LinearOperator
 
 from sklearn.decomposition._base import _BasePCA
 from sklearn.decomposition._pca import _infer_dimension
 from sklearn.utils import check_random_state
-from sklearn.utils import check_array
-from sklearn.utils.extmath import randomized_svd, svd_flip
+from sklearn.utils import check_array, gen_batches, get_chunk_n_rows
+from sklearn.utils.extmath import randomized_range_finder, svd_flip
 from sklearn.utils.extmath import stable_cumsum
-from sklearn.utils.validation import check_X_y, check_is_fitted
-from sklearn.utils._arpack import _init_arpack_v0
+from sklearn.utils.validation import (
+    check_consistent_length,
+    check_X_y,
+    check_is_fitted,
+)
 from sklearn.linear_model._base import LinearModel
-from sklearn.metrics.pairwise import pairwise_kernels
+from sklearn.base import clone
+from sklearn.metrics.pairwise import (
+    euclidean_distances,
+    manhattan_distances,
+    pairwise_kernels,
+)
+
+from skcosmo.utils import apply_blockwise
+from skcosmo.utils.pcovr_utils import _decompose_adaptive_rank, _decompose_symmetric
+from skcosmo.utils.cost_model import decomposition_cost, select_fit_policy
+from skcosmo.preprocessing import KernelNormalizer, StandardFlexibleScaler
 
-from skcosmo.utils import pcovr_kernel
-from skcosmo.preprocessing import KernelNormalizer
+from .kpcovr_inference import KPCovRInference
 
 
 class KPCovR(_BasePCA, LinearModel):
@@ -50,23 +64,43 @@ class KPCovR(_BasePCA, LinearModel):
 
             n_components == n_samples
 
-    svd_solver : {'auto', 'full', 'arpack', 'randomized'}, default='auto'
+    svd_solver : {'auto', 'full', 'arpack', 'randomized', 'eigh', 'eigsh', 'lobpcg',
+                  'adaptive'}, default='auto'
         If auto :
-            The solver is selected by a default policy based on `X.shape` and
-            `n_components`: if the input data is larger than 500x500 and the
-            number of components to extract is lower than 80% of the smallest
-            dimension of the data, then the more efficient 'randomized'
-            method is enabled. Otherwise the exact full SVD is computed and
-            optionally truncated afterwards.
+            The solver is selected by a cost model of the decomposition of
+            the :math:`n_{samples} \\times n_{samples}` modified kernel: among
+            the solvers suited to `n_components`, the one with the lowest
+            run time, estimated from its operation count and fixed rates of a
+            typical machine, whose estimated peak memory fits in the physical
+            memory. The selection is thus reproducible, unless the rates are
+            replaced by those of the local BLAS with
+            `skcosmo.utils.calibrate_cost_model`. The decision is recorded in
+            `fit_policy_`.
         If full :
-            run exact full SVD calling the standard LAPACK solver via
-            `scipy.linalg.svd` and select the components by postprocessing
+            run the exact symmetric LAPACK eigensolver via
+            `scipy.linalg.eigh`, computing all eigenpairs and selecting the
+            components by postprocessing for n_components 'mle' or in (0, 1),
+            and only the top n_components eigenpairs otherwise
         If arpack :
             run SVD truncated to n_components calling ARPACK solver via
             `scipy.sparse.linalg.svds`. It requires strictly
             0 < n_components < min(X.shape)
         If randomized :
             run randomized SVD by the method of Halko et al.
+        If eigh :
+            same as 'full'
+        If eigsh :
+            run the symmetric ARPACK eigensolver via
+            `scipy.sparse.linalg.eigsh`. It requires strictly
+            0 < n_components < n_samples
+        If lobpcg :
+            run the iterative block eigensolver `scipy.sparse.linalg.lobpcg`
+        If adaptive :
+            for n_components in (0, 1), run randomized SVDs of doubling rank
+            until the leading components explain the requested fraction of
+            the variance, such that the full decomposition is avoided when
+            few components suffice. Integer n_components are handled as by
+            'randomized', and 'mle' as by 'full'
 
     kernel: "linear" | "poly" | "rbf" | "sigmoid" | "cosine" | "precomputed"
         Kernel. Default="linear".
@@ -107,13 +141,46 @@ class KPCovR(_BasePCA, LinearModel):
 
     iterated_power : int or 'auto', default='auto'
         Number of iterations for the power method computed by
-        svd_solver == 'randomized'.
+        svd_solver == 'randomized', and maximum number of iterations
+        for svd_solver == 'lobpcg' (200 if 'auto').
         Must be of range [0, infinity).
 
     random_state : int, RandomState instance or None, default=None
         Used when the 'arpack' or 'randomized' solvers are used. Pass an int
         for reproducible results across multiple function calls.
 
+    cache_size: float, default=200
+        Size, in MB, of the cache of quantities derived from the kernel
+        between the training points: their projection :math:`\\mathbf{T}_N`
+        and the trace of :math:`\\mathbf{K}_{NN}`, which are by-products of
+        `fit`, and the product :math:`\\mathbf{K}_{NN}\\mathbf{T}_N`, which is
+        computed blockwise when first needed by `score`. With these, `score`
+        needs the kernel between the training points at most once, and
+        `transform`, `predict` and `score` on the training points cost
+        :math:`\\mathcal{O}(n_{samples} n_{components})`. The least recently
+        used quantities are evicted when they exceed the cache size, and
+        recomputed blockwise when needed. 0 disables the cache.
+
+    kernel_approximation: {None, 'rff'}, default=None
+        If None, the model is fit on the exact kernel between the training
+        points. If 'rff', which requires kernel='rbf' or 'laplacian', the
+        kernel is approximated as :math:`\\mathbf{K} \\approx
+        \\mathbf{Z}\\mathbf{Z}^T` by `n_components_approx` random Fourier
+        features :math:`\\mathbf{Z} = \\sqrt{2 / D}
+        \\cos(\\mathbf{X}\\mathbf{W} + \\mathbf{b})`, and the model is fit on
+        these features, from the decomposition of a :math:`D \\times D`
+        matrix. No kernel between samples is computed, and the cost of
+        `fit` and `transform` is linear in the number of samples. With
+        `center`, the features are centered and scaled by
+        :class:`skcosmo.preprocessing.StandardFlexibleScaler`, which is
+        equivalent to normalizing the approximated kernel. The weights
+        :math:`\\mathbf{W}` and offsets :math:`\\mathbf{b}` are drawn with
+        `random_state`.
+
+    n_components_approx: int, default=100
+        Number of random Fourier features :math:`D` when
+        kernel_approximation='rff'. Ignored otherwise.
+
 
     Attributes
     ----------
@@ -133,7 +200,7 @@ class KPCovR(_BasePCA, LinearModel):
         n_components, or the lesser value of n_features and n_samples
         if n_components is None.
 
-    pt__: ndarray of size :math:`({n_{components}, n_{components}})`
+    pt__: ndarray of size :math:`({n_{components}, n_{samples}})`
            pseudo-inverse of the latent-space projection, which
            can be used to contruct projectors from latent-space
 
@@ -153,9 +220,26 @@ class KPCovR(_BasePCA, LinearModel):
          the projector, or weights, from the latent-space projection
          :math:`\\mathbf{T}` to the feature matrix :math:`\\mathbf{X}`
 
+    fit_policy_: dict
+        The solver selected at fit time, under the key 'svd_solver', with the
+        available memory in bytes ('available_memory', None if unknown), the
+        rates of the cost model ('cost_constants') and the list of the
+        'candidates' that were compared, each with its estimated operation
+        counts, peak memory ('bytes') and run time ('seconds').
+
     X_fit_: ndarray of shape (n_samples, n_features)
         The data used to fit the model. This attribute is used to build kernels
-        from new data.
+        from new data. Not set when kernel_approximation='rff'. After
+        `fit_out_of_core`, the kernel itself, which is not copied.
+
+    random_weights_: ndarray of shape (n_features, n_components_approx)
+        The frequencies of the random Fourier features, when
+        kernel_approximation='rff'. In this case, `pkt_` and `pky_` project
+        from the random Fourier features rather than from the kernel.
+
+    random_offset_: ndarray of shape (n_components_approx,)
+        The phases of the random Fourier features, when
+        kernel_approximation='rff'.
 
     Examples
     --------
@@ -204,6 +288,9 @@ class KPCovR(_BasePCA, LinearModel):
         n_jobs=None,
         iterated_power="auto",
         random_state=None,
+        cache_size=200,
+        kernel_approximation=None,
+        n_components_approx=100,
     ):
 
         self.mixing = mixing
@@ -223,6 +310,9 @@ class KPCovR(_BasePCA, LinearModel):
         self.coef0 = coef0
         self.n_jobs = n_jobs
         self.n_samples = None
+        self.cache_size = cache_size
+        self.kernel_approximation = kernel_approximation
+        self.n_components_approx = n_components_approx
 
         self.fit_inverse_transform = fit_inverse_transform
 
@@ -235,32 +325,197 @@ class KPCovR(_BasePCA, LinearModel):
             X, Y, metric=self.kernel, filter_params=True, n_jobs=self.n_jobs, **params
         )
 
-    def _fit(self, K, Yhat, W):
+    def _select_fit_policy(self, size, build_cost, matvec_flops=None, itemsize=8):
         """
-        Fit the model with the computed kernel and approximated properties.
+        Resolves `svd_solver` when it is 'auto', choosing the solver of the
+        :math:`size \\times size` modified kernel with the lowest estimated
+        run time among those whose estimated peak memory, for entries of
+        `itemsize` bytes, is available (see
+        `skcosmo.utils.cost_model`), and records the decision in
+        `fit_policy_`. `build_cost` holds the operations and memory needed to
+        construct the modified kernel, which are common to all solvers, and
+        `matvec_flops`, if given, the operations of a product of the modified
+        kernel with a vector, for the solvers that only access it as such.
         """
 
-        K_tilde = pcovr_kernel(mixing=self.mixing, X=K, Y=Yhat, kernel="precomputed")
+        # 'eigh' is left out, as 'full' is done by the same eigensolver
+        if self.svd_solver != "auto":
+            solvers = [self.svd_solver]
+        elif self.n_components == "mle" or self.n_components >= size:
+            solvers = ["full"]
+        elif self.n_components < 1:
+            solvers = ["full", "adaptive"]
+        else:
+            solvers = ["full", "randomized", "eigsh"]
 
-        if self._fit_svd_solver == "full":
-            _, S, Vt = self._decompose_full(K_tilde)
-        elif self._fit_svd_solver in ["arpack", "randomized"]:
-            _, S, Vt = self._decompose_truncated(K_tilde)
+        if isinstance(self.n_components, numbers.Integral):
+            k = self.n_components
         else:
-            raise ValueError(
-                "Unrecognized svd_solver='{0}'" "".format(self._fit_svd_solver)
-            )
+            k = size
+
+        candidates = []
+        for svd_solver in solvers:
+            if svd_solver in ["full", "eigh"]:
+                cost = decomposition_cost("eigh", size, k, self.iterated_power)
+            elif svd_solver == "adaptive":
+                cost = decomposition_cost(svd_solver, size, k, self.iterated_power)
+            else:
+                cost = decomposition_cost(
+                    svd_solver, size, k, self.iterated_power, matvec_flops
+                )
+            for key, value in build_cost.items():
+                cost[key] += value
+            candidates.append(dict(svd_solver=svd_solver, **cost))
+
+        chosen, memory, constants = select_fit_policy(candidates, itemsize)
+
+        self._fit_svd_solver = chosen["svd_solver"]
+        self.fit_policy_ = dict(
+            svd_solver=self._fit_svd_solver,
+            available_memory=memory,
+            cost_constants=constants,
+            candidates=candidates,
+        )
+
+    def _fit(self, vK, UK, Yhat, W, init=None):
+        """
+        Fit the model with the eigendecomposition
+        :math:`\\mathbf{K} = \\mathbf{U}_K \\mathbf{\\Lambda}_K
+        \\mathbf{U}_K^T` and the approximated properties.
 
-        U = Vt.T
+        The modified kernel is decomposed in the eigenbasis of the kernel,
 
-        P = (self.mixing * np.eye(K.shape[0])) + (1.0 - self.mixing) * (W @ Yhat.T)
+        .. math::
 
-        S_inv = np.array([1.0 / s if s > self.tol else 0.0 for s in S])
+            \\mathbf{\\tilde{K}} = \\mathbf{U}_K \\left(\\alpha
+            \\mathbf{\\Lambda}_K + (1 - \\alpha) \\mathbf{U}_K^T
+            \\mathbf{\\hat{Y}} \\mathbf{\\hat{Y}}^T \\mathbf{U}_K \\right)
+            \\mathbf{U}_K^T,
+
+        which has the same spectrum. The matrix in brackets, a diagonal plus a
+        matrix of rank :math:`n_{properties}`, is decomposed in place by the
+        dense solvers, and only accessed through its products with vectors by
+        the iterative solvers. The projector
+        :math:`\\mathbf{P}_{KT} = \\left(\\alpha \\mathbf{I} + (1 - \\alpha)
+        \\mathbf{W} \\mathbf{\\hat{Y}}^T\\right) \\mathbf{U}_\\mathbf{\\tilde{K}}
+        \\mathbf{\\Lambda}_\\mathbf{\\tilde{K}}^{-\\frac{1}{2}}` is applied without
+        forming the :math:`n_{samples} \\times n_{samples}` matrix in brackets.
+        The pseudo-inverse of the projection :math:`\\mathbf{T}` follows from
+        the :math:`n_{components} \\times n_{components}` matrix
+        :math:`\\mathbf{T}^T \\mathbf{T}`, rather than from a least-squares
+        solve against the :math:`n_{samples} \\times n_{samples}` identity,
+        and the projectors, the projection and :math:`\\mathbf{P}_{TK}` all
+        follow from products of :math:`\\mathbf{U}_K` with
+        :math:`n_{components}` vectors.
+
+        Returns the projection of the training points, and with
+        svd_solver='lobpcg', the eigenvectors of the modified kernel in the
+        eigenbasis of the kernel, which can warm-start the decomposition for a
+        neighbouring `mixing` through `init`.
+        """
 
-        self.pkt_ = P @ U @ np.sqrt(np.diagflat(S_inv))
+        UtYhat = UK.T @ Yhat
 
-        T = K @ self.pkt_
-        self.pt__ = np.linalg.lstsq(T, np.eye(T.shape[0]), rcond=self.alpha)[0]
+        if self._fit_svd_solver in ["full", "eigh", "adaptive"]:
+            # built in a single buffer, which the dense solvers overwrite
+            K_tilde = UtYhat @ UtYhat.T
+            K_tilde *= 1.0 - self.mixing
+            K_tilde[np.diag_indices_from(K_tilde)] += self.mixing * vK
+        else:
+            # a diagonal plus a low-rank matrix, whose products with vectors
+            # cost O(n_samples n_properties) for the iterative solvers
+            def matmat(V):
+                return self.mixing * vK[:, None] * V + (1.0 - self.mixing) * (
+                    UtYhat @ (UtYhat.T @ V)
+                )
+
+            def matvec(v):
+                return matmat(v.reshape(-1, 1)).ravel()
+
+            K_tilde = LinearOperator(
+                (len(vK), len(vK)),
+                matvec=matvec,
+                rmatvec=matvec,
+                matmat=matmat,
+                rmatmat=matmat,
+                dtype=UtYhat.dtype,
+            )
+
+        S, Vt = self._decompose(K_tilde, init=init)[1:]
+        del K_tilde
+
+        # eigenvectors of the modified kernel, with the sign convention of
+        # its direct decomposition
+        U, Vt = svd_flip(UK @ Vt.T, Vt)
+        V = Vt.T
+
+        S_inv_sqrt = np.sqrt([1.0 / s if s > self.tol else 0.0 for s in S])
+
+        # Yhat^T U, from the eigenbasis of the kernel, and P_KT in place of U
+        YtU = UtYhat.T @ V
+        U *= self.mixing
+        U += (1.0 - self.mixing) * (W @ YtU)
+        U *= S_inv_sqrt
+        self.pkt_ = U
+
+        # U_K^T P_KT, such that T = K P_KT = U_K Lambda_K U_K^T P_KT and
+        # K T = U_K Lambda_K^2 U_K^T P_KT are single products with U_K, and
+        # the factors of Lambda_K are applied in place
+        C = self.mixing * V + (1.0 - self.mixing) * ((UK.T @ W) @ YtU)
+        C *= S_inv_sqrt[None, :] * vK[:, None]
+        T = UK @ C
+        C *= vK[:, None]
+
+        # the eigenvectors are only kept to warm-start 'lobpcg'
+        init = V if self._fit_svd_solver == "lobpcg" else None
+        del V, Vt
+
+        # as np.linalg.lstsq(T, I, rcond=alpha): the columns of T are
+        # orthogonal, so that its singular values are their norms, and T^T T
+        # is well conditioned once they are normalized
+        norms = np.linalg.norm(T, axis=0)
+        scale = np.divide(
+            1.0,
+            norms,
+            out=np.zeros_like(norms),
+            where=norms > self.alpha * np.max(norms),
+        )
+        TtT = T.T @ T
+        TtT *= scale
+        TtT *= scale[:, None]
+
+        # as np.linalg.pinv(TtT, hermitian=True), decomposing TtT in place
+        w, u = linalg.eigh(TtT, overwrite_a=True)
+        del TtT
+        large = np.abs(w) > 1e-15 * np.max(np.abs(w))
+        w_inv = np.divide(1.0, w, out=np.zeros_like(w), where=large)
+        u *= scale[:, None]
+        TtT_inv = (u * w_inv) @ u.T
+        del u
+        self.pt__ = TtT_inv @ T.T
+
+        # P_TK = (T^T T)^+ T^T K, with K T = U_K Lambda_K^2 U_K^T P_KT
+        self.ptk_ = (TtT_inv @ C.T) @ UK.T
+
+        return T, init
+
+    def _decompose(self, mat, init=None):
+        """
+        Decomposes the symmetric positive semi-definite matrix `mat` with
+        the selected solver. For svd_solver == 'lobpcg', the iterations start
+        from the approximate eigenvectors `init` when supplied.
+        """
+
+        if self._fit_svd_solver in ["full", "eigh"]:
+            return self._decompose_full(mat)
+        elif self._fit_svd_solver == "adaptive":
+            return self._decompose_adaptive(mat)
+        elif self._fit_svd_solver in ["arpack", "randomized", "eigsh", "lobpcg"]:
+            return self._decompose_truncated(mat, init=init)
+        else:
+            raise ValueError(
+                "Unrecognized svd_solver='{0}'" "".format(self._fit_svd_solver)
+            )
 
     def fit(self, X, Y, Yhat=None, W=None):
         """
@@ -278,6 +533,10 @@ class KPCovR(_BasePCA, LinearModel):
             to have unit variance, otherwise :math:`\\mathbf{X}` should be
             scaled so that each feature has a variance of 1 / n_features.
 
+            With kernel='precomputed', X is the kernel between the training
+            points. To fit on a kernel too large for memory, see
+            `fit_out_of_core`.
+
         Y: array-like, shape (n_samples, n_properties)
             Training data, where n_samples is the number of samples and
             n_properties is the number of properties
@@ -292,6 +551,10 @@ class KPCovR(_BasePCA, LinearModel):
             n_properties is the number of properties. If not supplied, computed
             by ridge regression.
 
+        W: array-like, shape (n_samples, n_properties), optional
+            Weights of the regression of Y on the kernel. If not supplied,
+            computed by ridge regression. Ignored with `kernel_approximation`.
+
         Returns
         -------
         self: object
@@ -300,46 +563,353 @@ class KPCovR(_BasePCA, LinearModel):
         """
 
         X, Y = check_X_y(X, Y, y_numeric=True, multi_output=True)
-        self.X_fit_ = X.copy()
 
-        if self.n_components is None:
-            if self.svd_solver != "arpack":
-                self.n_components = X.shape[0]
-            else:
-                self.n_components = X.shape[0] - 1
+        if self.kernel_approximation is not None:
+            return self._fit_random_features(X, Y, Yhat)
+
+        return self._fit_kernel(X.copy(), Y, Yhat=Yhat, W=W)
+
+    def fit_out_of_core(self, K, Y, rank=100, Yhat=None, W=None):
+        """
 
-        K = self._get_kernel(X)
+        Fit the model on a precomputed kernel that is too large for memory,
+        such as a :class:`numpy.memmap`, from its leading `rank` eigenpairs.
+
+        The kernel is neither copied nor loaded in memory as a whole: it is
+        read in blocks of rows, whose size is set by sklearn's
+        `working_memory`, and each block is centered as it is read. Its
+        leading eigenpairs are computed by randomized range finding, with
+        :math:`2 \\times` `iterated_power` + 2 passes over the kernel, and the
+        regression and the modified kernel are restricted to them, so that
+        the memory of the fit scales as :math:`\\mathcal{O}(n_{samples}
+        rank)`. `svd_solver` then applies to the :math:`rank \\times rank`
+        modified kernel in this eigenbasis, and n_components=None keeps
+        `rank` components.
+
+        Unlike `fit`, the model is therefore an approximation of rank
+        `rank`. Requires kernel='precomputed'.
+
+        Parameters
+        ----------
+        K: array-like, shape (n_samples, n_samples)
+            Kernel between the training points.
+
+        Y: array-like, shape (n_samples, n_properties)
+            Training data, where n_samples is the number of samples and
+            n_properties is the number of properties
+
+        rank: int, default=100
+            Number of eigenpairs of the kernel to compute, which bounds
+            n_components.
+
+        Yhat: array-like, shape (n_samples, n_properties), optional
+            Regressed training data. If not supplied, computed by ridge
+            regression in the eigenbasis of the kernel.
+
+        W: array-like, shape (n_samples, n_properties), optional
+            Weights of the regression of Y on the kernel. If not supplied,
+            computed by ridge regression in the eigenbasis of the kernel.
+
+        Returns
+        -------
+        self: object
+            Returns the instance itself.
+
+        """
+
+        if self.kernel != "precomputed":
+            raise ValueError(
+                "An out-of-core fit requires kernel='precomputed', got "
+                "kernel='{}'.".format(self.kernel)
+            )
+        if self.kernel_approximation is not None:
+            raise ValueError(
+                "An out-of-core fit does not support kernel_approximation."
+            )
+        if not isinstance(rank, numbers.Integral) or rank < 1:
+            raise ValueError("rank must be a positive integer, got {}.".format(rank))
+
+        # a memory map of the right dtype is validated without being copied
+        K = check_array(K)
+        if K.shape[0] != K.shape[1]:
+            raise ValueError(
+                "A precomputed kernel must be square, got shape {}.".format(K.shape)
+            )
+        Y = check_array(Y, ensure_2d=False)
+        check_consistent_length(K, Y)
+
+        n = K.shape[0]
+        r = min(rank, n)
+        if isinstance(self.n_components, numbers.Integral) and self.n_components > r:
+            raise ValueError(
+                "n_components={} must be at most rank={} in an out-of-core "
+                "fit.".format(self.n_components, r)
+            )
+
+        self.X_fit_ = K
+        if self.center:
+            self.centerer_ = KernelNormalizer().fit(K)
+
+        size = min(r + 10, n)
+        batch_size = get_chunk_n_rows(row_bytes=8 * (2 * n + size), max_n_rows=n)
+
+        def matmat(V):
+            KV = np.empty((n, V.shape[1]), dtype=V.dtype)
+            for batch in gen_batches(n, batch_size):
+                KV[batch] = self._kernel_batch(K[batch]) @ V
+            return KV
+
+        def matvec(v):
+            return matmat(v.reshape(-1, 1)).ravel()
+
+        K_op = LinearOperator(
+            (n, n),
+            matvec=matvec,
+            rmatvec=matvec,
+            matmat=matmat,
+            rmatmat=matmat,
+            dtype=np.float64,
+        )
+
+        n_iter = self.iterated_power
+        if n_iter == "auto":
+            n_iter = 7 if r < 0.1 * n else 4
+
+        Q = randomized_range_finder(
+            K_op,
+            size=size,
+            n_iter=n_iter,
+            random_state=check_random_state(self.random_state),
+        )
+        B = Q.T @ K_op.matmat(Q)
+        vK, UB = linalg.eigh(0.5 * (B + B.T))
+        vK, UK = vK[-r:], Q @ UB[:, -r:]
+
+        Yhat, W = self._regress_eigenbasis(Y, vK, UK, Yhat, W)
+
+        # each pass over the kernel costs 2 n^2 flops per vector
+        build_cost = dict(
+            gemm=(2.0 * n_iter + 2.0) * 2.0 * n ** 2 * size,
+            decomposition=9.0 * size ** 3,
+            memory=3.0 * n * size + 2.0 * batch_size * n,
+        )
+        self._fit_eigenbasis(K, Y, vK, UK, Yhat, W, build_cost=build_cost)
+
+        # the projections of the training points are computed when needed,
+        # with the kernel rather than its truncated eigendecomposition
+        self._fit_cache = OrderedDict()
+        self._cache_put("trace_NN", float(n) if self.center else np.trace(K))
+
+        return self
+
+    def fit_path(self, X, Y, gammas=None, mixings=None):
+        r"""
+
+        Fit one model for each value of the kernel coefficient in `gammas`,
+        for the 'rbf' or 'laplacian' kernel, or for each value in `mixings`.
+
+        Along `gammas`, the squared Euclidean (for 'rbf') or Manhattan (for
+        'laplacian') distances between the training points, which dominate
+        the cost of the kernel for many features, are computed only once. The
+        kernel of each gamma, :math:`\\exp(-\\gamma d_{ij})`, is then obtained
+        by an elementwise exponential into a single buffer, reused for all
+        gammas.
+
+        Along `mixings`, the kernel, its centering, its eigendecomposition and
+        the regression of Y on it do not depend on the mixing parameter and
+        are shared by all models, such that only the modified kernel is
+        decomposed for each mixing. With svd_solver='lobpcg', this
+        decomposition starts from the eigenvectors for the previous mixing.
+
+        Parameters
+        ----------
+        X: array-like, shape (n_samples, n_features)
+            Training data, where n_samples is the number of samples and
+            n_features is the number of features.
+
+        Y: array-like, shape (n_samples, n_properties)
+            Training data, where n_samples is the number of samples and
+            n_properties is the number of properties
+
+        gammas: array-like of shape (n_gammas,), default=None
+            kernel coefficients for which to fit a model. None stands for
+            1 / n_features, as for `gamma`.
+
+        mixings: array-like of shape (n_mixings,), default=None
+            mixing parameters for which to fit a model. Exactly one of
+            `gammas` and `mixings` must be given.
+
+        Returns
+        -------
+        models: list of KPCovR
+            Fitted copies of this estimator, one for each gamma or mixing.
+
+        losses: ndarray of shape (n_gammas,) or (n_mixings,)
+            The loss `score(X, Y)` of each model on the training data.
+
+        """
+
+        if self.kernel_approximation is not None:
+            raise ValueError("fit_path does not support kernel_approximation.")
+
+        if (gammas is None) == (mixings is None):
+            raise ValueError("Exactly one of gammas and mixings must be given.")
+
+        if gammas is not None and self.kernel not in ["rbf", "laplacian"]:
+            raise ValueError(
+                "fit_path over gammas requires kernel='rbf' or 'laplacian', "
+                "got kernel=%r" % (self.kernel,)
+            )
+
+        X, Y = check_X_y(X, Y, y_numeric=True, multi_output=True)
+        X_fit = X.copy()
+
+        if mixings is not None:
+            regression = clone(self)
+            vK, UK, Yhat, W = regression._regress_kernel(X_fit, Y)
+
+            models = []
+            losses = np.zeros(len(mixings))
+            init = None
+            for i, mixing in enumerate(mixings):
+                model = clone(self).set_params(mixing=mixing)
+                model.X_fit_ = X_fit
+                if self.center:
+                    model.centerer_ = regression.centerer_
+
+                # the eigenvectors for the previous mixing warm-start 'lobpcg'
+                init = model._fit_eigenbasis(X_fit, Y, vK, UK, Yhat, W, init=init)
+                models.append(model)
+                losses[i] = model.score(X, Y)
+
+            return models, losses
+
+        if self.kernel == "rbf":
+            distances = euclidean_distances(X, squared=True)
+        else:
+            distances = manhattan_distances(X)
+        K = np.empty_like(distances)
+
+        models = []
+        losses = np.zeros(len(gammas))
+        for i, gamma in enumerate(gammas):
+            model = clone(self).set_params(gamma=gamma)
+
+            if gamma is None:
+                gamma = 1.0 / X.shape[1]
+            np.multiply(distances, -gamma, out=K)
+            np.exp(K, out=K)
+
+            # the models share the copy of the training data, and the buffer
+            # of the kernel is rewritten for each gamma
+            model._fit_kernel(X_fit, Y, K, overwrite_K=True)
+            models.append(model)
+            losses[i] = model.score(X, Y)
+
+        return models, losses
+
+    def _fit_kernel(self, X, Y, K=None, Yhat=None, W=None, overwrite_K=False):
+        """
+        Fit the model from the kernel K between the training points X, which
+        is overwritten if `overwrite_K`, or computed by `_regress_kernel` if
+        None
+        """
+
+        vK, UK, Yhat, W = self._regress_kernel(X, Y, K, Yhat, W, overwrite_K)
+        self._fit_eigenbasis(X, Y, vK, UK, Yhat, W)
+        return self
+
+    def _regress_kernel(self, X, Y, K=None, Yhat=None, W=None, overwrite_K=False):
+        """
+        Centers the kernel K between the training points X, which is
+        overwritten if `overwrite_K`, and computes its eigendecomposition and
+        the regression of Y on it, none of which depend on `mixing`. If K is
+        None, it is computed here rather than by the caller, such that it is
+        freed once decomposed. Returns the eigenvalues and eigenvectors of the
+        kernel, the regressed properties and the regression weights.
+        """
+
+        self.X_fit_ = X
+
+        if K is None:
+            K = self._get_kernel(X)
+            overwrite_K = self.kernel != "precomputed"
 
         if self.center:
             self.centerer_ = KernelNormalizer()
-            K = self.centerer_.fit_transform(K)
+            K = self.centerer_.fit_transform(K, copy=not overwrite_K)
+            overwrite_K = True
+
+        # the eigendecomposition of the kernel serves the regression, as
+        # np.linalg.lstsq(K, Y, rcond=alpha), the modified kernel and all
+        # later products with the kernel, such that only its eigenvectors are
+        # kept. As the kernel is symmetric, its transpose is decomposed, which
+        # is Fortran-ordered and so can be overwritten by LAPACK.
+        vK, UK = linalg.eigh(K.T, overwrite_a=overwrite_K)
+        del K
 
-        self.n_samples = X.shape[0]
+        Yhat, W = self._regress_eigenbasis(Y, vK, UK, Yhat, W)
+        return vK, UK, Yhat, W
+
+    def _regress_eigenbasis(self, Y, vK, UK, Yhat=None, W=None):
+        """
+        Computes the regression of Y on the kernel from its (possibly
+        truncated) eigendecomposition, and returns the regressed properties
+        and the regression weights
+        """
+
+        n = UK.shape[0]
+        regressed = np.abs(vK) > self.alpha * np.max(np.abs(vK))
+        vK_inv = np.divide(1.0, vK, out=np.zeros_like(vK), where=regressed)
+
+        if Yhat is not None:
+            Yhat = Yhat.reshape(n, -1)
 
         if W is None:
             if Yhat is None:
-                W = (np.linalg.lstsq(K, Y, rcond=self.alpha)[0]).reshape(X.shape[0], -1)
+                W = UK @ (vK_inv[:, None] * (UK.T @ Y.reshape(n, -1)))
             else:
-                W = np.linalg.lstsq(K, Yhat, rcond=self.alpha)[0]
+                W = UK @ (vK_inv[:, None] * (UK.T @ Yhat))
 
         if Yhat is None:
-            Yhat = K @ W
-
-        # Handle svd_solver
-        self._fit_svd_solver = self.svd_solver
-        if self._fit_svd_solver == "auto":
-            # Small problem or self.n_components == 'mle', just call full PCA
-            if max(X.shape) <= 500 or self.n_components == "mle":
-                self._fit_svd_solver = "full"
-            elif self.n_components >= 1 and self.n_components < 0.8 * min(X.shape):
-                self._fit_svd_solver = "randomized"
-            # This is also the case of self.n_components in (0,1)
+            Yhat = UK @ (vK[:, None] * (UK.T @ W))
+
+        return Yhat, W
+
+    def _fit_eigenbasis(self, X, Y, vK, UK, Yhat, W, init=None, build_cost=None):
+        """
+        Fit the model from the eigendecomposition of the centered kernel and
+        the regression of `_regress_kernel`, and returns the eigenvectors of
+        `_fit`. The modified kernel is decomposed in the space spanned by the
+        eigenvectors `UK`, of shape (n_samples, m).
+        """
+
+        n, p = X.shape
+        m = UK.shape[1]
+        self.n_samples = n
+
+        if self.n_components is None:
+            if self.svd_solver not in ["arpack", "eigsh"]:
+                self.n_components = m
             else:
-                self._fit_svd_solver = "full"
+                self.n_components = m - 1
+
+        if build_cost is None:
+            # the kernel and its eigendecomposition precede any solver
+            build_cost = dict(
+                gemm=2.0 * n ** 2 * p,
+                decomposition=9.0 * n ** 3,
+                memory=n * p + 2.0 * n ** 2,
+            )
+        self._select_fit_policy(
+            m,
+            build_cost,
+            matvec_flops=4.0 * m * Yhat.shape[1],
+            itemsize=UK.dtype.itemsize,
+        )
 
-        self._fit(K, Yhat, W)
+        T, init = self._fit(vK, UK, Yhat, W, init=init)
 
-        self.ptk_ = self.pt__ @ K
         self.pty_ = self.pt__ @ Y
 
         if self.fit_inverse_transform:
@@ -347,45 +917,558 @@ class KPCovR(_BasePCA, LinearModel):
 
         self.pky_ = self.pkt_ @ self.pty_
 
+        # the projections of the training points are a by-product of `_fit`,
+        # while their products with the kernel are only computed when needed
+        self._fit_cache = OrderedDict()
+        self._cache_put("trace_NN", np.sum(vK))
+        self._cache_put("T_N", T)
+
+        self.components_ = self.pkt_.T  # for sklearn compatibility
+        return init
+
+    def _fit_random_features(self, X, Y, Yhat=None):
+        """
+        Fit the model on random Fourier features of X, which approximate the
+        kernel
+        """
+
+        if self.kernel_approximation != "rff":
+            raise ValueError(
+                "Unrecognized kernel_approximation=%r" % (self.kernel_approximation,)
+            )
+        if self.kernel not in ["rbf", "laplacian"]:
+            raise ValueError(
+                "kernel_approximation='rff' requires kernel='rbf' or 'laplacian', "
+                "got kernel=%r" % (self.kernel,)
+            )
+
+        n, p = X.shape
+        D = self.n_components_approx
+        gamma = 1.0 / p if self.gamma is None else self.gamma
+
+        # the Fourier transforms of exp(-gamma |x|^2) and exp(-gamma |x|_1)
+        random_state = check_random_state(self.random_state)
+        if self.kernel == "rbf":
+            self.random_weights_ = random_state.normal(
+                scale=np.sqrt(2.0 * gamma), size=(p, D)
+            )
+        else:
+            self.random_weights_ = gamma * random_state.standard_cauchy(size=(p, D))
+        self.random_offset_ = random_state.uniform(0, 2 * np.pi, size=D)
+
+        self.n_samples = n
+        self._fit_cache = OrderedDict()
+
+        Phi = self._random_features(X)
+        if self.center:
+            self.centerer_ = StandardFlexibleScaler(column_wise=False)
+            Phi = self.centerer_.fit_transform(Phi)
+
+        build_cost = dict(gemm=2.0 * n * p * D, memory=n * p + n * D)
+        self.pkt_, self._ptf = self._fit_features(X, Y, Phi, Yhat, build_cost)
+        self._pkf = None
+
+        self.pky_ = self.pkt_ @ self.pty_
+
         self.components_ = self.pkt_.T  # for sklearn compatibility
         return self
 
-    def predict(self, X=None):
-        """Predicts the property values"""
+    def _random_features(self, X):
+        """
+        Computes the random Fourier features of X
+        """
 
-        check_is_fitted(self, ["pky_", "pty_"])
+        D = self.random_offset_.shape[0]
+        return np.sqrt(2.0 / D) * np.cos(X @ self.random_weights_ + self.random_offset_)
+
+    def _fit_features(self, X, Y, Phi, Yhat=None, build_cost=None):
+        """
+        Fit the model from features Phi of the training points X, such that
+        the kernel is :math:`\\mathbf{\\Phi}\\mathbf{\\Phi}^T`. With the thin
+        SVD :math:`\\mathbf{\\Phi} = \\mathbf{U}_\\Phi \\mathbf{\\Sigma}_\\Phi
+        \\mathbf{V}_\\Phi^T`, the modified kernel is decomposed in the basis
+        :math:`\\mathbf{U}_\\Phi`, whose size is the rank of Phi. The singular
+        values and right singular vectors are obtained from the
+        eigendecomposition of :math:`\\mathbf{\\Phi}^T\\mathbf{\\Phi}`, as in
+        the covariance fit of PCovR, so that only matrices with
+        n_components columns are formed besides Phi. Sets `pty_` and `ptx_`,
+        and returns the projectors from the features to the latent space,
+        and from the latent space to the features.
+        """
+
+        if Phi.shape[0] > Phi.shape[1]:
+            vC, UC = linalg.eigh(Phi.T @ Phi)
+            vC, Vft = vC[::-1], UC[:, ::-1].T
+        else:
+            # for fewer samples than features, the SVD is as cheap
+            _, sf, Vft = linalg.svd(Phi, full_matrices=False)
+            vC = sf ** 2
+
+        # eigenvalues of Phi^T Phi below this threshold are numerical noise,
+        # as for np.linalg.matrix_rank
+        cutoff = max(self.tol ** 2, vC[0] * max(Phi.shape) * np.finfo(vC.dtype).eps)
+        sf = np.sqrt(vC[vC > cutoff])
+        Vft = Vft[vC > cutoff]
+        rank = len(sf)
+
+        # U_Phi^T Yhat = S_Phi^-1 V_Phi^T Phi^T Yhat
+        if Yhat is None:
+            # least-squares regression on K = Phi Phi^T, with the cutoff
+            # applied by np.linalg.lstsq(K, Y, rcond=alpha) in _fit_kernel
+            regressed = sf ** 2 > self.alpha * sf[0] ** 2
+            UtYhat = (Vft @ (Phi.T @ Y.reshape(X.shape[0], -1))) / sf[:, None]
+            UtYhat *= regressed[:, None]
+        else:
+            UtYhat = (Vft @ (Phi.T @ Yhat.reshape(X.shape[0], -1))) / sf[:, None]
+
+        if self.n_components is None:
+            if self.svd_solver not in ["arpack", "eigsh"]:
+                self.n_components = rank
+            else:
+                self.n_components = rank - 1
+        elif (
+            isinstance(self.n_components, numbers.Integral) and self.n_components > rank
+        ):
+            raise ValueError(
+                "n_components=%r must be at most the rank of the approximated "
+                "kernel, %r" % (self.n_components, rank)
+            )
+
+        # the spectrum of the features precedes any solver
+        n, d = Phi.shape
+        build_cost = dict(build_cost or {})
+        build_cost["gemm"] = build_cost.get("gemm", 0.0) + 2.0 * n * d ** 2
+        build_cost["decomposition"] = build_cost.get("decomposition", 0.0) + (
+            9.0 * d ** 3
+        )
+        build_cost["memory"] = build_cost.get("memory", 0.0) + n * d + d ** 2
+        self._select_fit_policy(rank, build_cost, itemsize=Phi.dtype.itemsize)
+
+        K_tilde = self.mixing * np.diagflat(sf ** 2) + (1.0 - self.mixing) * (
+            UtYhat @ UtYhat.T
+        )
+
+        _, S, Vt = self._decompose(K_tilde)
+
+        # enforce the sign convention of KPCovR, based on the eigenvectors
+        # U_Phi V^T of the n_samples x n_samples modified kernel
+        U, Vt = svd_flip(Phi @ ((Vft.T / sf) @ Vt.T), Vt)
+
+        S_sqrt = np.sqrt(S)
+        S_inv_sqrt = np.array([1.0 / s if s > self.tol else 0.0 for s in S_sqrt])
+
+        T = U * S_sqrt
+        self.pty_ = np.linalg.lstsq(T, Y, rcond=self.alpha)[0]
+
+        if self.fit_inverse_transform:
+            self.ptx_ = np.linalg.lstsq(T, X, rcond=self.alpha)[0]
+
+        pft = (Vft.T / sf) @ Vt.T * S_sqrt
+        ptf = (Vt * S_inv_sqrt[:, None]) @ (sf[:, None] * Vft)
+        return pft, ptf
+
+    def export_inference_model(self, file, tol=1e-6, dtype=np.float32):
+        """
+        Exports a compact model for inference, as a
+        :class:`KPCovRInference` saved in the uncompressed `.npz` file
+        `file`, whose arrays can be memory-mapped when it is loaded.
+
+        Training points are pruned in order of increasing weights in `pkt_`
+        and `pky_`, as long as the sum of the absolute weights of the pruned
+        points, times the largest absolute entry :math:`\\kappa` of the
+        (centered) kernel of the training points, stays below `tol` times
+        the root mean square of each component of the projection and of
+        the prediction of the training points. With
+        :class:`skcosmo.preprocessing.KernelNormalizer`, :math:`\\kappa`
+        also includes the largest mean of a row of the kernel, which the
+        offsets below leave out. This bounds the error of pruning on any
+        point whose kernel with the training points is at most
+        :math:`\\kappa`, as for all points with normalized kernels.
+        The kept points and weights are then cast to `dtype`. Weights that
+        are much larger than the projection, as obtained with a small
+        `alpha`, cancel out, and are neither pruned nor cast to single
+        precision without a loss of accuracy.
+
+        The centering of the kernel is folded into constant offsets of the
+        projection and the regression: the weights of the training points
+        sum to zero when the kernel is centered by
+        :class:`skcosmo.preprocessing.KernelNormalizer`, so that the mean of
+        each row of the kernel, which would need all the training points, is
+        not needed.
+
+        Parameters
+        ----------
+        file: str, path-like or file-like
+            The file to write.
+
+        tol: float, default=1e-6
+            Bound of the error of the pruning, relative to the root mean
+            square of each component and property on the training points.
+
+        dtype: data-type, default=np.float32
+            Data type of the exported arrays.
+
+        Returns
+        -------
+        model: KPCovRInference
+            The exported model.
+
+        """
+
+        check_is_fitted(self, ["pkt_", "pky_"])
+
+        if (
+            self.kernel_approximation is not None
+            or self.kernel == "precomputed"
+            or callable(self.kernel)
+        ):
+            raise ValueError(
+                "Only models fit on a named kernel of the training points can be "
+                "exported, without kernel_approximation."
+            )
+
+        # the projection of the training points and the largest entry of
+        # their kernel, in a single pass over the kernel
+        T = np.empty((self.X_fit_.shape[0], self.pkt_.shape[1]))
+        kappa = 0.0
+        for batch, K in self._kernel_batches(self.X_fit_):
+            T[batch] = K @ self.pkt_
+            kappa = max(kappa, np.max(np.abs(K)))
+
+        if self.center and isinstance(self.centerer_, KernelNormalizer):
+            # the pruned weights also drop their product with the mean of the
+            # kernel between each point and the training points
+            kappa += np.max(np.abs(self.centerer_.K_fit_rows_)) / self.centerer_.scale_
+
+        pkt, pky = self.pkt_, self.pky_
+        outputs = np.hstack([T, (T @ self.pty_).reshape(len(T), -1)])
+        weights = np.abs(np.hstack([pkt, pky.reshape(len(pky), -1)]))
+        weights *= kappa / np.maximum(np.sqrt(np.mean(outputs ** 2, axis=0)), 1e-300)
+
+        # the longest run of the smallest weights whose sum stays below tol
+        order = np.argsort(np.max(weights, axis=1))
+        bound = np.max(np.cumsum(weights[order], axis=0), axis=1)
+        support = np.sort(order[np.searchsorted(bound, tol, side="right") :])
+
+        pkt, pky = pkt[support], pky[support]
+        t_offset, y_offset = np.zeros(pkt.shape[1:]), np.zeros(pky.shape[1:])
 
-        X = check_array(X)
-        K = self._get_kernel(X, self.X_fit_)
         if self.center:
-            K = self.centerer_.transform(K)
+            # (K - K_fit_rows_ + K_fit_all_) / scale_, without the row means
+            shift = getattr(self.centerer_, "K_fit_all_", 0.0)
+            shift = shift - self.centerer_.K_fit_rows_[support]
+            pkt = pkt / self.centerer_.scale_
+            pky = pky / self.centerer_.scale_
+            t_offset, y_offset = shift @ pkt, shift @ pky
+
+        model = KPCovRInference(
+            self.X_fit_[support].astype(dtype),
+            pkt.astype(dtype),
+            pky.astype(dtype),
+            t_offset.astype(dtype),
+            y_offset.astype(dtype),
+            kernel=self.kernel,
+            gamma=self.gamma,
+            degree=self.degree,
+            coef0=self.coef0,
+            support=support,
+        )
+        model.save(file)
+        return model
+
+    def predict(self, X=None, out=None, batch_size=None):
+        """
+        Predicts the property values.
 
-        return K @ self.pky_
+        The kernel between X and the training points is computed in blocks of
+        rows, so that only the predictions are held in memory.
 
-    def transform(self, X):
+        Parameters
+        ----------
+        X: array-like, shape (n_samples, n_features)
+            New data, where n_samples is the number of samples
+            and n_features is the number of features.
+
+        out: ndarray of shape (n_samples, n_properties), default=None
+            Array in which to store the result, which may be a `np.memmap`.
+
+        batch_size: int, default=None
+            Number of rows of X processed at a time. If None, determined from
+            `sklearn.get_config()['working_memory']`.
+        """
+
+        check_is_fitted(self, ["pky_", "pty_"])
+
+        if X is None:
+            raise ValueError("X must be supplied.")
+
+        T = self._cached_projection(X)
+        if T is not None:
+            return self._store(T @ self.pty_, out)
+
+        return apply_blockwise(
+            lambda X: self._kernel_batch(X) @ self.pky_,
+            X,
+            out=out,
+            batch_size=batch_size,
+            row_bytes=self._row_bytes(),
+        )
+
+    def transform(self, X, out=None, batch_size=None):
         """
         Apply dimensionality reduction to X.
 
         X is projected on the first principal components as determined by the
         modified Kernel PCovR distances.
 
+        The kernel between X and the training points is computed in blocks of
+        rows, so that only the projections are held in memory.
+
+        Parameters
+        ----------
+        X: array-like, shape (n_samples, n_features)
+            New data, where n_samples is the number of samples
+            and n_features is the number of features.
+
+        out: ndarray of shape (n_samples, n_components), default=None
+            Array in which to store the result, which may be a `np.memmap`.
+
+        batch_size: int, default=None
+            Number of rows of X processed at a time. If None, determined from
+            `sklearn.get_config()['working_memory']`.
+
+        """
+
+        check_is_fitted(self, ["pkt_"])
+
+        T = self._cached_projection(X)
+        if T is not None:
+            return self._store(T.copy(), out)
+
+        return apply_blockwise(
+            lambda X: self._kernel_batch(X) @ self.pkt_,
+            X,
+            out=out,
+            batch_size=batch_size,
+            row_bytes=self._row_bytes(),
+        )
+
+    def transform_predict(self, X, batch_size=None):
+        """
+        Apply dimensionality reduction to X and predict the properties,
+        evaluating the kernel between X and the training points only once.
+
+        As :math:`\\mathbf{P}_{KY} = \\mathbf{P}_{KT} \\mathbf{P}_{TY}`, the
+        predicted properties follow from the projection as
+        :math:`\\mathbf{\\hat{Y}} = \\mathbf{T} \\mathbf{P}_{TY}`.
+
         Parameters
         ----------
         X: array-like, shape (n_samples, n_features)
             New data, where n_samples is the number of samples
             and n_features is the number of features.
 
+        batch_size: int, default=None
+            Number of rows of X processed at a time. If None, determined from
+            `sklearn.get_config()['working_memory']`.
+
+        Returns
+        -------
+        T: ndarray, shape (n_samples, n_components)
+            Projection of X, as returned by `transform`.
+
+        Y: ndarray, shape (n_samples, n_properties)
+            Predicted properties, as returned by `predict`.
         """
 
-        check_is_fitted(self, ["pkt_", "X_fit_"])
+        check_is_fitted(self, ["pkt_", "pty_"])
+
+        T = self.transform(X, batch_size=batch_size)
+        return T, T @ self.pty_
+
+    def _kernel_batch(self, X, diagonal=False, start=0):
+        """
+        Computes the (centered) kernel between a block of rows of X and the
+        training points, and if `diagonal`, the (centered) kernel of each row
+        of X with itself. For a precomputed kernel, the latter is read from
+        the rows of X, which must be the rows `start`, `start + 1`, ... of the
+        training kernel. With `kernel_approximation`, computes the (centered) random
+        features of the rows of X instead
+        """
 
         X = check_array(X)
-        K = self._get_kernel(X, self.X_fit_)
+
+        if self.kernel_approximation is not None:
+            Phi = self._random_features(X)
+            if self.center:
+                Phi = self.centerer_.transform(Phi)
+            return Phi
+
+        if self.kernel == "precomputed":
+            # the rows of the kernel itself, without validating the whole
+            # training kernel against them
+            K = X
+        else:
+            K = self._get_kernel(X, self.X_fit_)
+
+        if diagonal and self.kernel == "precomputed":
+            rows = np.arange(len(X))
+            K_diag = X[rows, start + rows]
+        elif diagonal:
+            # from small diagonal blocks, so as not to form the kernel of X
+            K_diag = np.concatenate(
+                [
+                    np.diag(self._get_kernel(X[batch]))
+                    for batch in gen_batches(len(X), 64)
+                ]
+            )
 
         if self.center:
+            if diagonal:
+                # as KernelNormalizer.transform, with the mean of the kernel
+                # between each row of X and the training points
+                K_diag = (
+                    K_diag - 2.0 * K.mean(axis=1) + self.centerer_.K_fit_all_
+                ) / self.centerer_.scale_
             K = self.centerer_.transform(K)
 
-        return K @ self.pkt_
+        if diagonal:
+            return K, K_diag
+        return K
+
+    def _kernel_batches(self, X, diagonal=False):
+        """
+        Yields the slices of blocks of rows of X, with the (centered) kernels
+        between these rows and the training points, as `_kernel_batch`
+        """
+
+        batch_size = get_chunk_n_rows(row_bytes=self._row_bytes(), max_n_rows=len(X))
+
+        for batch in gen_batches(len(X), batch_size):
+            yield batch, self._kernel_batch(
+                X[batch], diagonal=diagonal, start=batch.start
+            )
+
+    def _training_projections(self):
+        """
+        Returns the projection of the training points and its product with
+        their kernel, from the cache when available
+        """
+
+        T_N = self._cache_get("T_N")
+        if T_N is None:
+            T_N = np.vstack(
+                [K @ self.pkt_ for _, K in self._kernel_batches(self.X_fit_)]
+            )
+            self._cache_put("T_N", T_N)
+
+        KT_N = self._cache_get("KT_N")
+        if KT_N is None:
+            KT_N = np.vstack([K @ T_N for _, K in self._kernel_batches(self.X_fit_)])
+            self._cache_put("KT_N", KT_N)
+
+        return T_N, KT_N
+
+    def _cached_projection(self, X):
+        """
+        Returns the cached projection of the training points if X is the
+        training set, and None otherwise
+        """
+
+        T_N = self._cache_get("T_N")
+        if T_N is not None and self._is_fit_data(X):
+            return T_N
+        return None
+
+    def _is_fit_data(self, X):
+        """
+        Checks whether X is the training set, without reading it when it is a
+        view of the same memory, as for a memory-mapped kernel
+        """
+
+        X_fit = self.X_fit_
+        if X is X_fit:
+            return True
+        if np.shape(X) != X_fit.shape:
+            return False
+
+        X = np.asarray(X)
+        if (
+            X.dtype == X_fit.dtype
+            and X.strides == X_fit.strides
+            and X.__array_interface__["data"][0] == X_fit.__array_interface__["data"][0]
+        ):
+            return True
+
+        # a few rows rule out most other arrays before reading all of them
+        rows = np.linspace(0, X.shape[0] - 1, num=min(8, X.shape[0]), dtype=int)
+        return np.array_equal(X[rows], X_fit[rows]) and np.array_equal(X, X_fit)
+
+    def _cache_get(self, key):
+        """
+        Returns an entry of the fitted cache, or None if it is not cached
+        """
+
+        cache = getattr(self, "_fit_cache", None)
+        if not cache or key not in cache:
+            return None
+
+        cache.move_to_end(key)
+        return cache[key]
+
+    def _cache_put(self, key, value):
+        """
+        Stores an entry in the fitted cache, evicting the least recently used
+        entries so that the cache does not exceed `cache_size`
+        """
+
+        cache = getattr(self, "_fit_cache", None)
+        if cache is None:
+            return
+
+        cache.pop(key, None)
+        limit = self.cache_size * 2 ** 20
+        nbytes = np.asarray(value).nbytes
+        if nbytes > limit:
+            return
+
+        def cached_bytes():
+            return sum(np.asarray(v).nbytes for v in cache.values())
+
+        while cache and cached_bytes() + nbytes > limit:
+            cache.popitem(last=False)
+
+        cache[key] = value
+
+    @staticmethod
+    def _store(result, out):
+        """
+        Copies `result` into `out` if given
+        """
+
+        if out is None:
+            return result
+        if out.shape[0] != result.shape[0]:
+            raise ValueError(
+                "out has {} rows, but the input has {} rows.".format(
+                    out.shape[0], result.shape[0]
+                )
+            )
+        out[:] = result
+        return out
+
+    def _row_bytes(self):
+        """
+        Estimates the memory needed to project one row of X: the kernel with
+        the training points (or its random features), its centered copy and
+        the projection
+        """
+
+        if self.kernel_approximation is None:
+            n_fit, n_features = self.X_fit_.shape
+        else:
+            n_features, n_fit = self.random_weights_.shape
+        return 8 * (3 * n_fit + n_features + self.pkt_.shape[1])
 
     def inverse_transform(self, T):
         """Transform input data back to its original space.
@@ -432,6 +1515,15 @@ class KPCovR(_BasePCA, LinearModel):
             \mathbf{K}_{NN} \mathbf{T}_N (\mathbf{T}_N^T \mathbf{T}_N)^{-1}
             \mathbf{T}_V^T\right]}{\operatorname{Tr}(\mathbf{K}_{VV})}
 
+        The kernels are computed in blocks of rows, whose size is bounded by
+        `sklearn.get_config()['working_memory']`, and only their products
+        with the projectors and the traces are accumulated, such that
+        :math:`\mathbf{K}_{VV}` is never formed.
+
+        With kernel='precomputed', X holds :math:`\mathbf{K}_{VN}` only, which
+        does not determine :math:`\operatorname{Tr}(\mathbf{K}_{VV})`, so
+        only the training kernel can be scored.
+
         Arguments
         ---------
         X:              independent (predictor) variable
@@ -444,31 +1536,76 @@ class KPCovR(_BasePCA, LinearModel):
 
         """
 
+        if self.kernel_approximation is not None:
+            return self._score_features(X, Y)
+
         check_is_fitted(self, ["pkt_", "X_fit_"])
 
         X = check_array(X)
+        Y = np.reshape(Y, (X.shape[0], -1))
+
+        # projections of the training points, and T_N^T K_NN T_N
+        T_N, KT_N = self._training_projections()
+        tKt = T_N.T @ KT_N
+        tt_inv = np.linalg.pinv(T_N.T @ T_N, rcond=self.alpha)
+
+        trace_VV = self._cache_get("trace_NN")
+        if trace_VV is not None and self._is_fit_data(X):
+            # every term follows from the projections of the training points
+            y = T_N @ self.pty_
+            Lkrr = np.linalg.norm(Y - y.reshape(Y.shape)) ** 2
+            trace_VN = np.sum((KT_N @ tt_inv) * T_N)
+            t_vt_v = T_N.T @ T_N
+        elif self.kernel == "precomputed" and not self._is_fit_data(X):
+            raise ValueError(
+                "A precomputed kernel can only be scored on the training set, "
+                "as the kernel between the scored points is not available."
+            )
+        else:
+            # the traces of the loss are accumulated over blocks of rows of X
+            Lkrr, trace_VN, t_vt_v, trace_VV = 0.0, 0.0, 0.0, 0.0
+            for batch, (K_VN, K_diag) in self._kernel_batches(X, diagonal=True):
+                y = K_VN @ self.pky_
+                Lkrr += np.linalg.norm(Y[batch] - y.reshape(Y[batch].shape)) ** 2
 
-        K_NN = self._get_kernel(self.X_fit_, self.X_fit_)
-        K_VN = self._get_kernel(X, self.X_fit_)
-        K_VV = self._get_kernel(X)
+                t_v = K_VN @ self.pkt_
+                trace_VN += np.sum((K_VN @ T_N @ tt_inv) * t_v)
+                t_vt_v += t_v.T @ t_v
+                trace_VV += np.sum(K_diag)
 
-        if self.center:
-            K_NN = self.centerer_.transform(K_NN)
-            K_VN = self.centerer_.transform(K_VN)
-            K_VV = self.centerer_.transform(K_VV)
+        Lkrr /= np.linalg.norm(Y) ** 2
 
-        y = K_VN @ self.pky_
-        Lkrr = np.linalg.norm(Y - y) ** 2 / np.linalg.norm(Y) ** 2
+        trace_NN = np.sum((tt_inv @ tKt @ tt_inv) * t_vt_v)
+        Lkpca = (trace_VV - 2 * trace_VN + trace_NN) / trace_VV
 
-        t_n = K_NN @ self.pkt_
-        t_v = K_VN @ self.pkt_
+        return sum([Lkpca, Lkrr])
 
-        w = t_n @ np.linalg.pinv(t_n.T @ t_n, rcond=self.alpha) @ t_v.T
-        Lkpca = np.trace(K_VV - 2 * K_VN @ w + w.T @ K_VV @ w) / np.trace(K_VV)
+    def _score_features(self, X, Y):
+        """
+        Computes the loss of a model fit on features of the kernel, for which
+        the kernel loss is the error in the reconstruction of the features of
+        X from their projection, relative to their norm
+        """
 
-        return sum([Lkpca, Lkrr])
+        check_is_fitted(self, ["pkt_", "_ptf"])
 
-    def _decompose_truncated(self, mat):
+        X = check_array(X)
+        Y = np.reshape(Y, (X.shape[0], -1))
+
+        # the errors are accumulated over blocks of rows of X
+        Lkrr, Lkpca, Phi_norm = 0.0, 0.0, 0.0
+        for batch, K in self._kernel_batches(X):
+            y = K @ self.pky_
+            Lkrr += np.linalg.norm(Y[batch] - y.reshape(Y[batch].shape)) ** 2
+
+            Phi = K if self._pkf is None else K @ self._pkf
+            t_v = K @ self.pkt_
+            Lkpca += np.linalg.norm(Phi - t_v @ self._ptf) ** 2
+            Phi_norm += np.linalg.norm(Phi) ** 2
+
+        return sum([Lkpca / Phi_norm, Lkrr / np.linalg.norm(Y) ** 2])
+
+    def _decompose_truncated(self, mat, init=None):
 
         if not 1 <= self.n_components <= self.n_samples:
             raise ValueError(
@@ -487,7 +1624,10 @@ class KPCovR(_BasePCA, LinearModel):
                 "when greater than or equal to 1, was of type=%r"
                 % (self.n_components, type(self.n_components))
             )
-        elif self.svd_solver == "arpack" and self.n_components == self.n_samples:
+        elif (
+            self._fit_svd_solver in ["arpack", "eigsh"]
+            and self.n_components == self.n_samples
+        ):
             raise ValueError(
                 "n_components=%r must be strictly less than "
                 "n_samples=%r with "
@@ -499,27 +1639,20 @@ class KPCovR(_BasePCA, LinearModel):
                 )
             )
 
-        random_state = check_random_state(self.random_state)
-
-        if self._fit_svd_solver == "arpack":
-            v0 = _init_arpack_v0(min(mat.shape), random_state)
-            U, S, Vt = svds(mat, k=self.n_components, tol=self.tol, v0=v0)
-            # svds doesn't abide by scipy.linalg.svd/randomized_svd
-            # conventions, so reverse its outputs.
-            S = S[::-1]
-            # flip eigenvectors' sign to enforce deterministic output
-            U, Vt = svd_flip(U[:, ::-1], Vt[::-1])
-
-        # We have already eliminated all other solvers, so this must be "randomized"
-        else:
-            # sign flipping is done inside
-            U, S, Vt = randomized_svd(
-                mat,
-                n_components=self.n_components,
-                n_iter=self.iterated_power,
-                flip_sign=True,
-                random_state=random_state,
-            )
+        # integer n_components are passed by 'adaptive' to the randomized solver
+        svd_solver = self._fit_svd_solver
+        if svd_solver == "adaptive":
+            svd_solver = "randomized"
+
+        U, S, Vt = _decompose_symmetric(
+            mat,
+            self.n_components,
+            svd_solver,
+            tol=self.tol,
+            random_state=self.random_state,
+            iterated_power=self.iterated_power,
+            init=init,
+        )
 
         U[:, S < self.tol] = 0.0
         Vt[S < self.tol] = 0.0
@@ -527,6 +1660,31 @@ class KPCovR(_BasePCA, LinearModel):
 
         return U, S, Vt
 
+    def _decompose_adaptive(self, mat):
+        """
+        Decomposes `mat` with `_decompose_adaptive_rank` for fractional
+        n_components, falling back on the full decomposition once the rank
+        exceeds half the size of `mat`, or for n_components == 'mle'. Integer
+        n_components are passed to the randomized solver directly.
+        """
+
+        if self.n_components == "mle":
+            return self._decompose_full(mat)
+        elif self.n_components >= 1:
+            return self._decompose_truncated(mat)
+
+        decomposition = _decompose_adaptive_rank(
+            mat,
+            self.n_components,
+            random_state=self.random_state,
+            iterated_power=self.iterated_power,
+        )
+        if decomposition is None:
+            return self._decompose_full(mat)
+
+        self.n_components = len(decomposition[1])
+        return decomposition
+
     def _decompose_full(self, mat):
 
         if self.n_components != "mle":
@@ -549,14 +1707,18 @@ class KPCovR(_BasePCA, LinearModel):
                         "was of type=%r" % (self.n_components, type(self.n_components))
                     )
 
-        U, S, Vt = linalg.svd(mat, full_matrices=False)
+        if self.n_components == "mle" or self.n_components < 1:
+            n_components = None
+        else:
+            n_components = self.n_components
+
+        # the modified kernel is symmetric, such that 'full' is done by the
+        # symmetric eigensolver, which overwrites it
+        U, S, Vt = _decompose_symmetric(mat, n_components, "eigh", overwrite_a=True)
         U[:, S < self.tol] = 0.0
         Vt[S < self.tol] = 0.0
         S[S < self.tol] = 0.0
 
-        # flip eigenvectors' sign to enforce deterministic output
-        U, Vt = svd_flip(U, Vt)
-
         # Get variance explained by singular values
         explained_variance_ = (S ** 2) / (self.n_samples - 1)
         total_var = explained_variance_.sum()
@@ -0,0 +1,296 @@
+import struct
+import zipfile
+
+import numpy as np
+
+from sklearn.metrics.pairwise import pairwise_kernels
+from sklearn.utils import check_array, gen_batches, get_chunk_n_rows
+
+
+class KPCovRInference:
+    r"""
+    Inference-only Kernel Principal Covariates Regression model, as exported
+    by :meth:`KPCovR.export_inference_model`.
+
+    Only the training points with non-negligible weights are kept, with the
+    weights of the projection :math:`\mathbf{P}_{KT}` and of the regression
+    :math:`\mathbf{P}_{KY}` restricted to them, and the centering of the
+    kernel folded into constant offsets
+
+    .. math::
+
+      \mathbf{T} = \mathbf{K}_{XS} \mathbf{P}_{ST} + \mathbf{1} \mathbf{b}_T^T,
+      \qquad
+      \mathbf{Y} = \mathbf{K}_{XS} \mathbf{P}_{SY} + \mathbf{1} \mathbf{b}_Y^T,
+
+    where :math:`\mathbf{K}_{XS}` is the (uncentered) kernel between the new
+    points and the :math:`n_{support}` kept training points :math:`S`. The
+    model is saved as a single uncompressed `.npz` file, whose arrays are
+    aligned in the file and memory-mapped by :meth:`load`, so that loading
+    it reads no more than its headers, and its arrays are shared by the
+    processes that serve it.
+
+    Parameters
+    ----------
+    X_fit: ndarray of shape (n_support, n_features)
+        The kept training points.
+
+    pkt: ndarray of shape (n_support, n_components)
+        The weights of the kept training points in the projection.
+
+    pky: ndarray of shape (n_support, n_properties) or (n_support,)
+        The weights of the kept training points in the regression.
+
+    t_offset: ndarray of shape (n_components,)
+        The constant offset of the projection.
+
+    y_offset: ndarray of shape (n_properties,) or ()
+        The constant offset of the regression.
+
+    kernel: "linear" | "poly" | "rbf" | "sigmoid" | "cosine" | "laplacian"
+        Kernel, as in :class:`KPCovR`.
+
+    gamma: float, default=None
+        Kernel coefficient, as in :class:`KPCovR`.
+
+    degree: int, default=3
+        Degree for poly kernels, as in :class:`KPCovR`.
+
+    coef0: float, default=1
+        Independent term in poly and sigmoid kernels, as in :class:`KPCovR`.
+
+    support: ndarray of shape (n_support,), default=None
+        The indices of the kept points among the training points.
+
+    Examples
+    --------
+    >>> import os, tempfile
+    >>> import numpy as np
+    >>> from skcosmo.decomposition import KPCovR, KPCovRInference
+    >>> X = np.random.uniform(-1, 1, (100, 4))
+    >>> Y = np.sin(X @ np.array([1.0, -2.0, 0.0, 0.5]))
+    >>> kpcovr = KPCovR(mixing=0.5, n_components=2, kernel="rbf").fit(X, Y)
+    >>> filename = os.path.join(tempfile.mkdtemp(), "kpcovr.npz")
+    >>> _ = kpcovr.export_inference_model(filename)
+    >>> model = KPCovRInference.load(filename)
+    >>> T = model.transform(X)
+    """
+
+    _arrays = ["X_fit", "pkt", "pky", "t_offset", "y_offset", "support"]
+
+    def __init__(
+        self,
+        X_fit,
+        pkt,
+        pky,
+        t_offset,
+        y_offset,
+        kernel="linear",
+        gamma=None,
+        degree=3,
+        coef0=1,
+        support=None,
+    ):
+        self.X_fit = X_fit
+        self.pkt = pkt
+        self.pky = pky
+        self.t_offset = t_offset
+        self.y_offset = y_offset
+        self.kernel = kernel
+        self.gamma = gamma
+        self.degree = degree
+        self.coef0 = coef0
+        self.support = np.arange(len(X_fit)) if support is None else np.asarray(support)
+
+    def save(self, file):
+        """
+        Saves the model as an uncompressed `.npz` file, which can be read by
+        `numpy.load` and memory-mapped by :meth:`load`.
+
+        Parameters
+        ----------
+        file: str, path-like or file-like
+            The file to write. Unlike `numpy.savez`, no `.npz` extension is
+            appended to its name.
+        """
+
+        _save_npz(
+            file,
+            dict(
+                kernel=np.array(self.kernel),
+                gamma=np.array(np.nan if self.gamma is None else self.gamma),
+                degree=np.array(self.degree),
+                coef0=np.array(self.coef0),
+                **{name: getattr(self, name) for name in self._arrays},
+            ),
+        )
+
+    @classmethod
+    def load(cls, file, mmap_mode="r"):
+        """
+        Loads a model saved by :meth:`save` or
+        :meth:`KPCovR.export_inference_model`.
+
+        Parameters
+        ----------
+        file: str or path-like
+            The file to read.
+
+        mmap_mode: {None, 'r', 'r+', 'c'}, default='r'
+            If not None, the arrays of the model are memory-mapped from the
+            file with this mode, as in `numpy.load`, rather than read into
+            memory. `numpy.load` cannot memory-map the members of `.npz`
+            files, which are read from their offsets in the (uncompressed)
+            archive instead.
+
+        Returns
+        -------
+        model: KPCovRInference
+            The loaded model.
+        """
+
+        with np.load(file) as bundle:
+            params = dict(
+                kernel=str(bundle["kernel"]),
+                gamma=float(bundle["gamma"]),
+                degree=bundle["degree"].item(),
+                coef0=bundle["coef0"].item(),
+            )
+            if np.isnan(params["gamma"]):
+                params["gamma"] = None
+
+            if mmap_mode is None:
+                arrays = {name: bundle[name] for name in cls._arrays}
+            else:
+                arrays = _memmap_npz(file, bundle, cls._arrays, mmap_mode)
+
+        return cls(**arrays, **params)
+
+    def transform(self, X):
+        """
+        Projects X into the latent space, as :meth:`KPCovR.transform`.
+
+        Parameters
+        ----------
+        X: array-like, shape (n_samples, n_features)
+            New data, where n_samples is the number of samples
+            and n_features is the number of features.
+
+        Returns
+        -------
+        T: ndarray, shape (n_samples, n_components)
+            Projection of X in the latent space.
+        """
+
+        return self._project(X, self.pkt, self.t_offset)
+
+    def predict(self, X):
+        """
+        Predicts the properties of X, as :meth:`KPCovR.predict`.
+
+        Parameters
+        ----------
+        X: array-like, shape (n_samples, n_features)
+            New data, where n_samples is the number of samples
+            and n_features is the number of features.
+
+        Returns
+        -------
+        Y: ndarray, shape (n_samples, n_properties)
+            Predicted properties of X.
+        """
+
+        return self._project(X, self.pky, self.y_offset)
+
+    def _project(self, X, P, offset):
+        """
+        Computes the product of the kernel between X and the kept training
+        points with the weights P, plus the offset, in blocks of rows of X
+        """
+
+        X = check_array(X, dtype=self.X_fit.dtype)
+
+        n_support = self.X_fit.shape[0]
+        n_columns = 1 if P.ndim == 1 else P.shape[1]
+        batch_size = get_chunk_n_rows(
+            row_bytes=self.X_fit.dtype.itemsize * (2 * n_support + n_columns),
+            max_n_rows=len(X),
+        )
+
+        result = np.empty((len(X),) + P.shape[1:], dtype=P.dtype)
+        for batch in gen_batches(len(X), batch_size):
+            result[batch] = self._get_kernel(X[batch]) @ P + offset
+        return result
+
+    def _get_kernel(self, X):
+        params = {"gamma": self.gamma, "degree": self.degree, "coef0": self.coef0}
+        return pairwise_kernels(
+            X, self.X_fit, metric=self.kernel, filter_params=True, **params
+        )
+
+
+def _save_npz(file, arrays, alignment=64):
+    """
+    Saves the arrays as the `.npy` members of an uncompressed `.npz` file, as
+    `numpy.savez`, but with the data of each array aligned to `alignment`
+    bytes in the file, by padding the extra field of its local header (as
+    zipalign does), so that the arrays are aligned once memory-mapped
+    """
+
+    with zipfile.ZipFile(file, mode="w", allowZip64=True) as archive:
+        for name, value in arrays.items():
+            info = zipfile.ZipInfo(name + ".npy", date_time=(1980, 1, 1, 0, 0, 0))
+
+            # the local header (30 bytes) is followed by the name, the extra
+            # field and the zip64 extra field (20 bytes), then by the .npy
+            # header, whose length is a multiple of 64 bytes
+            start = archive.fp.tell() + 30 + len(info.filename) + 4 + 20
+            padding = -start % alignment
+            info.extra = struct.pack("<HH", 0xD935, padding) + b"\0" * padding
+
+            with archive.open(info, mode="w", force_zip64=True) as f:
+                np.lib.format.write_array(f, np.asanyarray(value), allow_pickle=False)
+
+
+def _memmap_npz(file, bundle, names, mmap_mode):
+    """
+    Memory-maps the arrays `names` of the uncompressed `.npz` file, which
+    are stored contiguously in the archive, each as a `.npy` file. Scalars
+    and empty arrays, which cannot be memory-mapped, are read from the
+    loaded `bundle`.
+    """
+
+    arrays = {}
+    with zipfile.ZipFile(file) as archive, open(file, "rb") as f:
+        for name in names:
+            info = archive.getinfo(name + ".npy")
+            if info.compress_type != zipfile.ZIP_STORED:
+                raise ValueError(
+                    "Cannot memory-map the compressed array '{}'.".format(name)
+                )
+
+            # the local header of the member, followed by its name and extra
+            # field, precedes its data
+            f.seek(info.header_offset)
+            header = f.read(30)
+            name_length, extra_length = struct.unpack("<HH", header[26:30])
+            f.seek(info.header_offset + 30 + name_length + extra_length)
+
+            version = np.lib.format.read_magic(f)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+
+            if len(shape) == 0 or 0 in shape:
+                arrays[name] = bundle[name]
+            else:
+                arrays[name] = np.memmap(
+                    file,
+                    dtype=dtype,
+                    mode=mmap_mode,
+                    shape=shape,
+                    order="F" if fortran_order else "C",
+                    offset=f.tell(),
+                )
+    return arrays
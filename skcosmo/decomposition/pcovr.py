@@ -1,24 +1,31 @@
 import numpy as np
-from numpy.linalg import LinAlgError
 import numbers
+import copy
+import os
 
-from scipy import linalg
-from scipy.sparse.linalg import svds
-from scipy.linalg import sqrtm as MatrixSqrt
+from joblib import Parallel, delayed
+from scipy import linalg, sparse
+from scipy.sparse.linalg import LinearOperator
 
+from sklearn.base import clone
 from sklearn.linear_model import Ridge as LR
 from sklearn.utils.validation import check_X_y
 from sklearn.utils.validation import check_is_fitted
 from sklearn.utils import check_array
-from sklearn.utils import check_random_state
-from sklearn.utils.extmath import randomized_svd, svd_flip
+from sklearn.utils.extmath import safe_sparse_dot
 from sklearn.utils.extmath import stable_cumsum
 from sklearn.decomposition._base import _BasePCA
 from sklearn.linear_model._base import LinearModel
 
 from sklearn.decomposition._pca import _infer_dimension
-from sklearn.utils._arpack import _init_arpack_v0
-from skcosmo.utils import pcovr_covariance, pcovr_kernel
+from skcosmo.utils import pcovr_kernel, pcovr_kernel_operator, apply_blockwise
+from skcosmo.utils.pcovr_utils import _decompose_adaptive_rank, _decompose_symmetric
+from skcosmo.utils.cost_model import (
+    available_memory,
+    decomposition_cost,
+    get_cost_constants,
+    select_fit_policy,
+)
 
 
 class PCovR(_BasePCA, LinearModel):
@@ -78,14 +85,19 @@ class PCovR(_BasePCA, LinearModel):
 
             n_components == min(n_samples, n_features)
 
-    svd_solver : {'auto', 'full', 'arpack', 'randomized'}, default='auto'
+    svd_solver : {'auto', 'full', 'arpack', 'randomized', 'eigh', 'eigsh', 'lobpcg',
+                  'adaptive'}, default='auto'
         If auto :
-            The solver is selected by a default policy based on `X.shape` and
-            `n_components`: if the input data is larger than 500x500 and the
-            number of components to extract is lower than 80% of the smallest
-            dimension of the data, then the more efficient 'randomized'
-            method is enabled. Otherwise the exact full SVD is computed and
-            optionally truncated afterwards.
+            The solver is selected by a cost model, together with `space`
+            when it is also 'auto': among the solvers suited to
+            `n_components`, the one with the lowest run time, estimated from
+            the operation count of the decomposition of
+            :math:`\mathbf{\tilde{C}}` or :math:`\mathbf{\tilde{K}}` and fixed
+            rates of a typical machine, whose estimated peak memory fits in
+            the physical memory. The selection is thus reproducible, unless
+            the rates are replaced by those of the local BLAS with
+            `skcosmo.utils.calibrate_cost_model`. The decision is recorded in
+            `fit_policy_`.
         If full :
             run exact full SVD calling the standard LAPACK solver via
             `scipy.linalg.svd` and select the components by postprocessing
@@ -95,15 +107,35 @@ class PCovR(_BasePCA, LinearModel):
             0 < n_components < min(X.shape)
         If randomized :
             run randomized SVD by the method of Halko et al.
+        If eigh :
+            run the symmetric LAPACK eigensolver via `scipy.linalg.eigh`,
+            computing only the top n_components eigenpairs when n_components
+            is an integer
+        If eigsh :
+            run the symmetric ARPACK eigensolver via
+            `scipy.sparse.linalg.eigsh`. It requires strictly
+            0 < n_components < min(X.shape)
+        If lobpcg :
+            run the iterative block eigensolver `scipy.sparse.linalg.lobpcg`,
+            which `fit_path` warm-starts from the eigenvectors found for the
+            previous mixing
+        If adaptive :
+            for n_components in (0, 1), run randomized SVDs of doubling rank
+            until the leading components explain the requested fraction of
+            the variance, such that the full decomposition is avoided when
+            few components suffice. Integer n_components are handled as by
+            'randomized', and 'mle' as by 'full'
 
     tol : float, default=0.0
         Tolerance for singular values computed by svd_solver == 'arpack'.
         Must be of range [0.0, infinity).
 
     space: {'feature', 'sample', 'auto'}, default='auto'
-            whether to compute the PCovR in `sample` or `feature` space
-            defaults to `sample` when :math:`{n_{samples} < n_{features}}` and
-            `feature` when :math:`{n_{features} < n_{samples}}`
+            whether to compute the PCovR in `sample` or `feature` space.
+            If 'auto', the space with the lowest estimated cost, as for
+            svd_solver == 'auto', which is typically `sample` when
+            :math:`{n_{samples} < n_{features}}` and `feature` when
+            :math:`{n_{features} < n_{samples}}`
 
     alpha: float, default=1E-6
             Regularization parameter to use in all regression operations.
@@ -115,13 +147,39 @@ class PCovR(_BasePCA, LinearModel):
 
     iterated_power : int or 'auto', default='auto'
          Number of iterations for the power method computed by
-         svd_solver == 'randomized'.
+         svd_solver == 'randomized', and maximum number of iterations
+         for svd_solver == 'lobpcg' (200 if 'auto').
          Must be of range [0, infinity).
 
     random_state : int, RandomState instance or None, default=None
          Used when the 'arpack' or 'randomized' solvers are used. Pass an int
          for reproducible results across multiple function calls.
 
+    matrix_free : bool, default=False
+         Whether sample-space PCovR decomposes :math:`\mathbf{\tilde{K}}` as a
+         `scipy.sparse.linalg.LinearOperator` built from :math:`\mathbf{X}` and
+         :math:`\mathbf{\hat{Y}}` (see `pcovr_kernel_operator`), rather than
+         forming the :math:`n_{samples} \times n_{samples}` matrix. Memory then
+         scales as :math:`n_{samples} (n_{features} + n_{components})`. Requires
+         svd_solver to be one of 'arpack', 'randomized', 'eigsh' or 'lobpcg';
+         'auto' selects 'randomized' or 'eigsh' with the cost model. Ignored
+         in feature space.
+
+    decomposition_dtype : dtype or None, default=None
+         Precision in which the eigendecompositions of
+         :math:`\mathbf{\tilde{C}}` or :math:`\mathbf{\tilde{K}}` are carried
+         out. If None, the precision of :math:`\mathbf{X}`. float32 inputs are
+         fitted in float32 throughout, so that the projectors, projections and
+         predictions are float32; pass `decomposition_dtype=np.float64` to
+         solve the (small) eigenproblems in double precision while keeping all
+         products with :math:`\mathbf{X}` in single precision. Where the
+         retained eigenvalues are well separated from the discarded ones,
+         float32 projections and predictions agree with those of a float64
+         fit to a relative error of order
+         :math:`\max(n_{samples}, n_{features})\, \epsilon_{32}`, with
+         :math:`\epsilon_{32} \approx 1.2 \times 10^{-7}`, divided by the
+         relative gap between these eigenvalues.
+
     Attributes
     ----------
 
@@ -166,6 +224,18 @@ class PCovR(_BasePCA, LinearModel):
     singular_values_ : ndarray of shape (n_components,)
         The singular values corresponding to each of the selected components.
 
+    n_samples_seen_ : int
+        The number of samples processed by `partial_fit` since the last call
+        to `fit` or `fit_shards`.
+
+    fit_policy_ : dict
+        The space and solver selected at fit time, under the keys 'space' and
+        'svd_solver', with the available memory in bytes ('available_memory',
+        None if unknown), the rates of the cost model ('cost_constants') and
+        the list of the 'candidates' that were compared, each with its
+        estimated operation counts, peak memory ('bytes') and run time
+        ('seconds').
+
     Examples
     --------
     >>> import numpy as np
@@ -198,6 +268,8 @@ class PCovR(_BasePCA, LinearModel):
         estimator=LR(alpha=1e-6, fit_intercept=False, tol=1e-12),
         iterated_power="auto",
         random_state=None,
+        matrix_free=False,
+        decomposition_dtype=None,
     ):
 
         self.mixing = mixing
@@ -210,6 +282,8 @@ class PCovR(_BasePCA, LinearModel):
         self.tol = tol
         self.iterated_power = iterated_power
         self.random_state = random_state
+        self.matrix_free = matrix_free
+        self.decomposition_dtype = decomposition_dtype
 
         self.estimator = estimator
 
@@ -224,7 +298,7 @@ class PCovR(_BasePCA, LinearModel):
 
         Parameters
         ----------
-        X : array-like, shape (n_samples, n_features)
+        X : {array-like, sparse matrix}, shape (n_samples, n_features)
             Training data, where n_samples is the number of samples and
             n_features is the number of features.
 
@@ -233,6 +307,12 @@ class PCovR(_BasePCA, LinearModel):
             to have unit variance, otherwise :math:`\mathbf{X}` should be
             scaled so that each feature has a variance of 1 / n_features.
 
+            CSR and CSC matrices are never densified: feature-space PCovR
+            decomposes the sparse product :math:`\mathbf{X}^T \mathbf{X}`,
+            and sample-space PCovR, with `matrix_free=True`, the products of
+            :math:`\mathbf{\tilde{K}}` with vectors, such that time and memory
+            scale with the number of non-zero entries.
+
         Y : array-like, shape (n_samples, n_properties)
             Training data, where n_samples is the number of samples and
             n_properties is the number of properties
@@ -252,11 +332,643 @@ class PCovR(_BasePCA, LinearModel):
 
         """
 
-        X, Y = check_X_y(X, Y, y_numeric=True, multi_output=True)
+        X, Y = check_X_y(
+            X,
+            Y,
+            accept_sparse=["csr", "csc"],
+            y_numeric=True,
+            multi_output=True,
+            dtype=[np.float64, np.float32],
+        )
+        Y = Y.astype(X.dtype, copy=False)
+
+        self._reset_partial_fit()
 
         # saved for inverse transformations from the latent space,
         # should be zero in the case that the features have been properly centered
-        self.mean_ = np.mean(X, axis=0)
+        self.mean_ = np.asarray(X.mean(axis=0)).ravel()
+
+        self._set_fit_parameters(*X.shape, X.dtype)
+
+        if self._regress_from_svd(Yhat, W):
+            # kept such that `update` can add samples without refactorizing X
+            self._svd_stats = self._feature_space_svd_stats(X, Y)
+            self._fit_svd_stats()
+        else:
+            self._svd_stats = None
+
+            if W is None:
+                self.estimator.fit(X, Y)
+                W = self.estimator.coef_.T.reshape(X.shape[1], -1)
+
+            if Yhat is None:
+                Yhat = self.estimator.predict(X).reshape(X.shape[0], -1)
+
+            Yhat = np.asarray(Yhat, dtype=X.dtype)
+            W = np.asarray(W, dtype=X.dtype)
+
+            if self.space == "feature":
+                self._fit_feature_space(X, Y.reshape(Yhat.shape), Yhat)
+            else:
+                self._fit_sample_space(X, Y.reshape(Yhat.shape), Yhat, W)
+
+        self._set_output_projectors(Y.ndim)
+        return self
+
+    def fit_path(self, X, Y, mixings, Yhat=None, W=None):
+        r"""
+
+        Fit one model for each value in `mixings`, computing the quantities
+        which do not depend on the mixing parameter only once.
+
+        The regression, and either the singular value decomposition of
+        :math:`\mathbf{X}` (in feature space) or the Gram matrix
+        :math:`\mathbf{X} \mathbf{X}^T` (in sample space), are shared by all
+        models, such that only the decomposition of :math:`\mathbf{\tilde{C}}`
+        or :math:`\mathbf{\tilde{K}}` is repeated for each mixing.
+
+        Parameters
+        ----------
+        X : array-like, shape (n_samples, n_features)
+            Training data, where n_samples is the number of samples and
+            n_features is the number of features.
+
+        Y : array-like, shape (n_samples, n_properties)
+            Training data, where n_samples is the number of samples and
+            n_properties is the number of properties
+
+        mixings : array-like of shape (n_mixings,)
+            mixing parameters for which to fit a model
+
+        Yhat : array-like, shape (n_samples, n_properties), optional
+            Regressed training data, where n_samples is the number of samples and
+            n_properties is the number of properties. If not supplied, computed
+            by ridge regression.
+
+        W : array-like, shape (n_features, n_properties), optional
+            Weights of regressed training data. If not supplied, computed
+            by ridge regression.
+
+        Returns
+        -------
+        models : list of PCovR
+            Fitted copies of this estimator, one for each mixing.
+
+        losses : ndarray of shape (n_mixings,)
+            The loss `score(X, Y)` of each model on the training data.
+
+        """
+
+        X, Y = check_X_y(
+            X,
+            Y,
+            accept_sparse=["csr", "csc"],
+            y_numeric=True,
+            multi_output=True,
+            dtype=[np.float64, np.float32],
+        )
+        Y = Y.astype(X.dtype, copy=False)
+
+        self._reset_partial_fit()
+        self._set_fit_parameters(*X.shape, X.dtype)
+
+        if self._regress_from_svd(Yhat, W):
+            # shared by the models, such that each can be updated as after `fit`
+            svd_stats = self._feature_space_svd_stats(X, Y)
+            factors = self._svd_stats_factors(svd_stats)
+        else:
+            svd_stats = None
+            if W is None:
+                self.estimator.fit(X, Y)
+                W = self.estimator.coef_.T.reshape(X.shape[1], -1)
+
+            if Yhat is None:
+                Yhat = self.estimator.predict(X).reshape(X.shape[0], -1)
+
+            Yhat = np.asarray(Yhat, dtype=X.dtype)
+            W = np.asarray(W, dtype=X.dtype)
+
+            if self.space == "feature":
+                factors = self._feature_space_svd_factors(
+                    X, Y.reshape(Yhat.shape), Yhat
+                )
+            elif self.matrix_free:
+                K = None
+            else:
+                K = safe_sparse_dot(X, X.T, dense_output=True)
+
+        models = []
+        losses = np.zeros(len(mixings))
+        init = None
+        for i, mixing in enumerate(mixings):
+            model = clone(self).set_params(mixing=mixing)
+            model.mean_ = np.asarray(X.mean(axis=0)).ravel()
+            model._svd_stats = svd_stats
+            model._set_fit_parameters(*X.shape, X.dtype)
+
+            # the eigenvectors for the previous mixing warm-start 'lobpcg'
+            if model.space == "feature":
+                init = model._fit_feature_space_factors(factors, init=init)
+            else:
+                init = model._fit_sample_space(
+                    X, Y.reshape(Yhat.shape), Yhat, W, K=K, init=init
+                )
+
+            model._set_output_projectors(Y.ndim)
+
+            models.append(model)
+            losses[i] = model.score(X, Y)
+
+        return models, losses
+
+    def fit_many(self, data):
+        r"""
+
+        Fit one independent model, with the parameters of this instance,
+        to each (X, Y) pair in `data`.
+
+        Pairs of the same shapes are stacked into 3-D arrays and fit together,
+        with one batched call to `np.linalg.svd` for the singular value
+        decompositions of the X and one to `np.linalg.eigh` for the
+        decompositions of the :math:`\mathbf{\tilde{C}}`, such that fitting
+        many small models is limited by the arithmetic rather than by the
+        per-model overhead of `fit`. The eigendecompositions are exact,
+        whatever `svd_solver`.
+
+        Batching applies to feature-space models with the default ridge
+        regression and an integer or unset `n_components`; the other pairs
+        are fit one by one with `fit`.
+
+        Parameters
+        ----------
+        data : iterable of (X, Y) pairs
+            Training data of each model, with X of shape
+            (n_samples, n_features) and Y of shape (n_samples, n_properties).
+            The shapes can differ between pairs.
+
+        Returns
+        -------
+        models : list of PCovR
+            Fitted models, in the order of `data`.
+
+        """
+
+        data = [(np.asarray(X), np.asarray(Y)) for X, Y in data]
+
+        groups = {}
+        for i, (X, Y) in enumerate(data):
+            groups.setdefault((X.shape, Y.shape, X.dtype, Y.dtype), []).append(i)
+
+        models = [None] * len(data)
+        for (X_shape, Y_shape, X_dtype, _), indices in groups.items():
+            template = clone(self)
+            batched = (
+                len(X_shape) == 2
+                and len(Y_shape) in [1, 2]
+                and Y_shape[0] == X_shape[0]
+                and self.decomposition_dtype is None
+            )
+            if batched:
+                template._set_fit_parameters(*X_shape, X_dtype)
+                batched = template._regress_from_svd(None, None) and isinstance(
+                    template.n_components, numbers.Integral
+                )
+
+            if batched:
+                X = check_array(
+                    np.stack([data[i][0] for i in indices]),
+                    allow_nd=True,
+                    dtype=[np.float64, np.float32],
+                )
+                Y = check_array(
+                    np.stack([data[i][1] for i in indices]),
+                    allow_nd=True,
+                    ensure_2d=False,
+                    dtype=X.dtype,
+                )
+                for i, model in zip(indices, template._fit_stacked(X, Y)):
+                    models[i] = model
+            else:
+                for i in indices:
+                    models[i] = clone(self).fit(*data[i])
+
+        return models
+
+    def _fit_stacked(self, X, Y):
+        """
+        Fits one feature-space model to each of the stacked X and Y, of shapes
+        (n_models, n_samples, n_features) and (n_models, n_samples[,
+        n_properties]), with the fit parameters already set on this instance,
+        and returns the fitted models
+        """
+
+        n_models, n_samples, n_features = X.shape
+        y_ndim = Y.ndim - 1
+        Y = Y.reshape(n_models, n_samples, -1)
+
+        # as _feature_space_svd, with the singular values below the cutoff
+        # masked rather than dropped, such that the shapes stay uniform
+        _, s, Vt = np.linalg.svd(X, full_matrices=False)
+        cutoff = np.maximum(
+            self.tol, s[:, 0] * max(n_samples, n_features) * np.finfo(s.dtype).eps
+        )
+        mask = s > cutoff[:, np.newaxis]
+        s = np.where(mask, s, 0.0)
+        s_inv = np.where(mask, 1.0 / np.where(mask, s, 1.0), 0.0)
+        V = np.swapaxes(Vt, 1, 2)
+
+        XtY = np.swapaxes(X, 1, 2) @ Y
+        Vt_XtY = Vt @ XtY
+
+        # as _feature_space_factors
+        alpha = self._regression_alpha()
+        Vt_XtYhat = (s ** 2 / (s ** 2 + alpha))[:, :, np.newaxis] * Vt_XtY
+
+        C = (V * (s ** 2)[:, np.newaxis, :]) @ Vt
+        C_Y = (V * s_inv[:, np.newaxis, :]) @ Vt_XtYhat
+        iCsqrt = (V * s_inv[:, np.newaxis, :]) @ Vt
+        Csqrt = (V * s[:, np.newaxis, :]) @ Vt
+        iCsqrt_XtY = (V * s_inv[:, np.newaxis, :]) @ Vt_XtY
+
+        # as _fit_feature_space_factors, with the batched eigendecomposition
+        # in place of _decompose
+        Ct = self.mixing * C + (1 - self.mixing) * C_Y @ np.swapaxes(C_Y, 1, 2)
+        S, U = np.linalg.eigh(Ct)
+        S = np.abs(S[:, ::-1][:, : self.n_components])
+        U = U[:, :, ::-1][:, :, : self.n_components]
+
+        # flip eigenvectors' sign to enforce deterministic output, as svd_flip
+        max_abs_rows = np.argmax(np.abs(U), axis=1)
+        signs = np.sign(np.take_along_axis(U, max_abs_rows[:, np.newaxis, :], axis=1))
+        U = U * signs
+        Ut = np.swapaxes(U, 1, 2)
+
+        S_inv = np.where(S > self.tol, 1.0 / np.where(S > self.tol, S, 1.0), 0.0)
+        pxt = iCsqrt @ U * S[:, np.newaxis, :]
+        ptx = S_inv[:, :, np.newaxis] * Ut @ Csqrt
+        pty = S_inv[:, :, np.newaxis] * Ut @ iCsqrt_XtY
+
+        # shallow copies of this instance, which is itself an unfitted clone,
+        # avoid the per-model cost of sklearn.base.clone
+        models = []
+        for i in range(n_models):
+            model = copy.copy(self)
+            model.mean_ = X[i].mean(axis=0)
+            model._svd_stats = (
+                s[i][mask[i]],
+                Vt[i][mask[i]],
+                XtY[i],
+                X[i].sum(axis=0),
+                n_samples,
+            )
+
+            model.singular_values_ = S[i].copy()
+            model.explained_variance_ = (S[i] ** 2) / (n_samples - 1)
+            model.explained_variance_ratio_ = (
+                model.explained_variance_ / model.explained_variance_.sum()
+            )
+            model.pxt_, model.ptx_, model.pty_ = pxt[i], ptx[i], pty[i]
+            model._set_output_projectors(y_ndim)
+            models.append(model)
+
+        return models
+
+    def partial_fit(self, X, Y):
+        r"""
+
+        Incrementally fit the model with a chunk of X and Y.
+
+        The chunk only enters the fit through the running sums of
+        :math:`\mathbf{X}^T \mathbf{X}`, :math:`\mathbf{X}^T \mathbf{Y}` and
+        the columns of :math:`\mathbf{X}`, such that the memory footprint
+        scales as :math:`n_{features}^2` regardless of the total number of
+        samples. After each call, the feature-space projectors are recomputed
+        from the accumulated statistics, with :math:`\mathbf{\hat{Y}}` obtained
+        by ridge regression with the regularization of `estimator`, as in `fit`
+        (or `alpha`, if `estimator` has none). As this costs
+        :math:`\mathcal{O}(n_{features}^3)` per call, chunks should contain
+        many more samples than features.
+
+        Only feature-space PCovR can be fit incrementally, hence `space`
+        must be `feature` or `auto`.
+
+        Parameters
+        ----------
+        X : array-like, shape (n_samples, n_features)
+            Chunk of training data, where n_samples is the number of samples
+            in the chunk and n_features is the number of features.
+
+        Y : array-like, shape (n_samples, n_properties)
+            Chunk of training data, where n_samples is the number of samples
+            in the chunk and n_properties is the number of properties
+
+        Returns
+        -------
+        self: object
+            Returns the instance itself.
+
+        """
+
+        X, Y = check_X_y(
+            X, Y, accept_sparse=["csr", "csc"], y_numeric=True, multi_output=True
+        )
+
+        if self.space not in [None, "feature", "auto"]:
+            raise ValueError("partial_fit is only supported in feature space.")
+
+        if not hasattr(self, "n_samples_seen_"):
+            self.n_samples_seen_ = 0
+            self._XtX = np.zeros((X.shape[1], X.shape[1]))
+            self._XtY = np.zeros((X.shape[1], Y.reshape(X.shape[0], -1).shape[1]))
+            self._X_sum = np.zeros(X.shape[1])
+
+            # n_components is resolved against the samples seen so far,
+            # so the requested value is kept for the subsequent calls
+            self._requested_n_components = self.n_components
+
+        if X.shape[1] != self._XtX.shape[0]:
+            raise ValueError(
+                "X has %d features, but PCovR was partially fit on %d features."
+                % (X.shape[1], self._XtX.shape[0])
+            )
+        if Y.reshape(X.shape[0], -1).shape[1] != self._XtY.shape[1]:
+            raise ValueError(
+                "Y has %d properties, but PCovR was partially fit on %d properties."
+                % (Y.reshape(X.shape[0], -1).shape[1], self._XtY.shape[1])
+            )
+
+        self.n_samples_seen_ += X.shape[0]
+        self._XtX += safe_sparse_dot(X.T, X, dense_output=True)
+        self._XtY += X.T @ Y.reshape(X.shape[0], -1)
+        self._X_sum += np.asarray(X.sum(axis=0)).ravel()
+
+        self.n_components = self._requested_n_components
+        return self.fit_from_covariance(
+            self._XtX,
+            self._XtY if Y.ndim > 1 else self._XtY[:, 0],
+            self.n_samples_seen_,
+            mean=self._X_sum / self.n_samples_seen_,
+        )
+
+    def _reset_partial_fit(self):
+        """
+        Discards the statistics accumulated by `partial_fit`, such that a
+        subsequent call to `partial_fit` starts from the data it is given, as
+        after a new fit
+        """
+
+        if hasattr(self, "n_samples_seen_"):
+            self.n_components = self._requested_n_components
+            del self.n_samples_seen_, self._XtX, self._XtY, self._X_sum
+            del self._requested_n_components
+
+    def update(self, X, Y):
+        r"""
+
+        Update a fitted model with new training samples, without
+        refactorizing the samples it was fitted on.
+
+        The singular value decomposition :math:`\mathbf{X} = \mathbf{U}
+        \mathbf{S} \mathbf{V}^T` stored by `fit` is updated following
+        [Brand2006]_: as
+
+        .. math::
+
+            \begin{bmatrix} \mathbf{X} \\ \mathbf{X}_{new} \end{bmatrix} =
+            \begin{bmatrix} \mathbf{U} & \mathbf{0} \\
+            \mathbf{0} & \mathbf{I} \end{bmatrix}
+            \begin{bmatrix} \mathbf{S} \mathbf{V}^T \\
+            \mathbf{X}_{new} \end{bmatrix},
+
+        the singular values and right singular vectors of the stacked data
+        are those of the small matrix on the right, of shape
+        :math:`(k + n_{new}, n_{features})`, with :math:`k` the rank of
+        :math:`\mathbf{X}`. Together with the running
+        :math:`\mathbf{X}^T \mathbf{Y}`, they determine the ridge regression
+        and the feature-space projectors, such that an update costs
+        :math:`\mathcal{O}((k + n_{new}) n_{features}^2)` regardless of the
+        number of samples seen so far. The result equals a refit on all
+        samples, up to the singular values discarded as numerical noise.
+
+        Only models fitted in feature space with the default ridge regression,
+        without `Yhat` or `W`, can be updated.
+
+        Parameters
+        ----------
+        X : array-like, shape (n_samples, n_features)
+            New training data, where n_samples is the number of new samples
+            and n_features is the number of features.
+
+        Y : array-like, shape (n_samples, n_properties)
+            New training data, where n_samples is the number of new samples
+            and n_properties is the number of properties
+
+        Returns
+        -------
+        self: object
+            Returns the instance itself.
+
+        References
+        ----------
+        .. [Brand2006] M. Brand, "Fast low-rank modifications of the thin
+           singular value decomposition", Linear Algebra and its Applications
+           415 (2006) 20-30
+
+        """
+
+        check_is_fitted(self, ["pxt_", "pty_"])
+
+        if getattr(self, "_svd_stats", None) is None:
+            raise ValueError(
+                "update requires a model fitted in feature space with a ridge "
+                "regression estimator, and without Yhat or W."
+            )
+
+        X, Y = check_X_y(
+            X,
+            Y,
+            accept_sparse=["csr", "csc"],
+            y_numeric=True,
+            multi_output=True,
+            dtype=[np.float64, np.float32],
+        )
+        s, Vt, XtY, X_sum, n_samples = self._svd_stats
+
+        if X.shape[1] != Vt.shape[1]:
+            raise ValueError(
+                "X has %d features, but PCovR was fit on %d features."
+                % (X.shape[1], Vt.shape[1])
+            )
+        if Y.reshape(X.shape[0], -1).shape[1] != XtY.shape[1]:
+            raise ValueError(
+                "Y has %d properties, but PCovR was fit on %d properties."
+                % (Y.reshape(X.shape[0], -1).shape[1], XtY.shape[1])
+            )
+
+        X = X.astype(Vt.dtype, copy=False)
+        Y = Y.astype(Vt.dtype, copy=False)
+
+        if sparse.issparse(X):
+            s, Vt = self._feature_space_svd(
+                sparse.vstack([sparse.csr_matrix(s[:, np.newaxis] * Vt), X])
+            )
+        else:
+            s, Vt = self._feature_space_svd(np.vstack([s[:, np.newaxis] * Vt, X]))
+        self._svd_stats = (
+            s,
+            Vt,
+            XtY + X.T @ Y.reshape(X.shape[0], -1),
+            X_sum + np.asarray(X.sum(axis=0)).ravel(),
+            n_samples + X.shape[0],
+        )
+        self.mean_ = self._svd_stats[3] / self._svd_stats[4]
+
+        self._set_fit_parameters(self._svd_stats[4], X.shape[1], Vt.dtype)
+        self._fit_svd_stats()
+
+        self._set_output_projectors(self.pxy_.ndim)
+        return self
+
+    def fit_shards(self, shards_X, shards_Y, n_jobs=None):
+        r"""
+
+        Fit the feature-space model from data split across several shards,
+        such as `.npy` files.
+
+        Each shard only enters the fit through its contributions to
+        :math:`\mathbf{X}^T \mathbf{X}`, :math:`\mathbf{X}^T \mathbf{Y}` and
+        the column sums of :math:`\mathbf{X}`, which are computed in parallel
+        with joblib, memory-mapping the files, then summed and passed to
+        `fit_from_covariance`. Only feature-space PCovR can be fit in this way,
+        hence `space` must be `feature` or `auto`.
+
+        Parameters
+        ----------
+        shards_X : list of str, path-like or array-like
+            Shards of the training data, each of shape (n_samples_i,
+            n_features), either as arrays (e.g. `np.memmap`) or as paths to
+            `.npy` files.
+
+        shards_Y : list of str, path-like or array-like
+            Shards of the properties, each of shape (n_samples_i,
+            n_properties), matching `shards_X`.
+
+        n_jobs : int, default=None
+            The number of shards processed in parallel.
+            ``None`` means 1 unless in a :obj:`joblib.parallel_backend` context.
+            ``-1`` means using all processors.
+
+        Returns
+        -------
+        self: object
+            Returns the instance itself.
+
+        """
+
+        if len(shards_X) != len(shards_Y):
+            raise ValueError(
+                "Got %d shards of X, but %d shards of Y."
+                % (len(shards_X), len(shards_Y))
+            )
+        if len(shards_X) == 0:
+            raise ValueError("At least one shard is required.")
+
+        statistics = Parallel(n_jobs=n_jobs)(
+            delayed(_shard_statistics)(X, Y) for X, Y in zip(shards_X, shards_Y)
+        )
+
+        XtX, XtY, X_sum, n_samples, y_ndim = zip(*statistics)
+
+        if (
+            len({M.shape for M in XtX}) > 1
+            or len({M.shape for M in XtY}) > 1
+            or len(set(y_ndim)) > 1
+        ):
+            raise ValueError(
+                "The shards have inconsistent numbers of features or properties."
+            )
+
+        XtX, XtY, X_sum, n_samples = sum(XtX), sum(XtY), sum(X_sum), sum(n_samples)
+
+        self._reset_partial_fit()
+        return self.fit_from_covariance(
+            XtX,
+            XtY if y_ndim[0] > 1 else XtY[:, 0],
+            n_samples,
+            mean=X_sum / n_samples,
+        )
+
+    def fit_from_covariance(self, XtX, XtY, n_samples, mean=None):
+        r"""
+
+        Fit the feature-space model from the sufficient statistics
+        :math:`\mathbf{X}^T \mathbf{X}` and :math:`\mathbf{X}^T \mathbf{Y}`,
+        without access to :math:`\mathbf{X}` itself.
+
+        :math:`\mathbf{\tilde{C}}` and :math:`\left(\mathbf{X}^T
+        \mathbf{X}\right)^{-\frac{1}{2}}` are built from the eigendecomposition
+        of :math:`\mathbf{X}^T \mathbf{X}`, and :math:`\mathbf{\hat{Y}}` is
+        obtained by ridge regression with the regularization of `estimator`,
+        as in `fit` (or `alpha`, if `estimator` has none), such that the cost
+        of the fit only depends on n_features. Only feature-space PCovR can be
+        fit in this way, hence `space` must be `feature` or `auto`.
+
+        Parameters
+        ----------
+        XtX : array-like, shape (n_features, n_features)
+            :math:`\mathbf{X}^T \mathbf{X}`, computed from the training data
+
+        XtY : array-like, shape (n_features, n_properties)
+            :math:`\mathbf{X}^T \mathbf{Y}`, computed from the training data
+
+        n_samples : int
+            Number of samples in the training data
+
+        mean : array-like, shape (n_features,), optional
+            Column means of the training data, used in `transform` and
+            `inverse_transform`. Defaults to zero, i.e. centered data.
+
+        Returns
+        -------
+        self: object
+            Returns the instance itself.
+
+        """
+
+        XtX = check_array(XtX)
+        XtY = check_array(XtY, ensure_2d=False)
+
+        if XtX.shape[0] != XtX.shape[1]:
+            raise ValueError("XtX must be a square matrix.")
+        if XtY.shape[0] != XtX.shape[0]:
+            raise ValueError(
+                "XtX and XtY have inconsistent numbers of features: %d and %d."
+                % (XtX.shape[0], XtY.shape[0])
+            )
+        if self.space not in [None, "feature", "auto"]:
+            raise ValueError(
+                "Fitting from the covariance is only supported in feature space."
+            )
+
+        if mean is None:
+            self.mean_ = np.zeros(XtX.shape[0])
+        else:
+            self.mean_ = check_array(mean, ensure_2d=False)
+
+        self.space = "feature"
+        self._set_fit_parameters(n_samples, XtX.shape[0], XtX.dtype)
+        self._svd_stats = None
+
+        self._fit_feature_space_covariance(XtX, XtY.reshape(XtX.shape[0], -1))
+
+        self._set_output_projectors(XtY.ndim)
+        return self
+
+    def _set_fit_parameters(self, n_samples, n_features, dtype=np.float64):
+        """
+        Checks `space` and resolves `n_components`, `svd_solver` and `space`
+        for a fit on data of shape (n_samples, n_features) and type `dtype`
+        """
 
         if self.space is not None and self.space not in [
             "feature",
@@ -267,55 +979,146 @@ class PCovR(_BasePCA, LinearModel):
 
         # Handle self.n_components==None
         if self.n_components is None:
-            if self.svd_solver != "arpack":
-                self.n_components = min(X.shape)
-            else:
-                self.n_components = min(X.shape) - 1
-
-        if W is None:
-            self.estimator.fit(X, Y)
-            W = self.estimator.coef_.T.reshape(X.shape[1], -1)
-
-        if Yhat is None:
-            Yhat = self.estimator.predict(X).reshape(X.shape[0], -1)
-
-        # Handle svd_solver
-        self._fit_svd_solver = self.svd_solver
-        if self._fit_svd_solver == "auto":
-            # Small problem or self.n_components == 'mle', just call full PCA
-            if max(X.shape) <= 500 or self.n_components == "mle":
-                self._fit_svd_solver = "full"
-            elif self.n_components >= 1 and self.n_components < 0.8 * min(X.shape):
-                self._fit_svd_solver = "randomized"
-            # This is also the case of self.n_components in (0,1)
+            if self.svd_solver not in ["arpack", "eigsh"]:
+                self.n_components = min(n_samples, n_features)
             else:
-                self._fit_svd_solver = "full"
+                self.n_components = min(n_samples, n_features) - 1
 
-        self.n_samples, self.n_features = X.shape
-        if self.space is None or self.space == "auto":
-            if self.n_samples > self.n_features:
-                self.space = "feature"
-            else:
-                self.space = "sample"
+        self.n_samples, self.n_features = n_samples, n_features
+        self._select_fit_policy(np.dtype(dtype).itemsize)
+
+        if self.matrix_free and self.space == "sample":
+            if self._fit_svd_solver in ["full", "eigh"]:
+                raise ValueError(
+                    "svd_solver='%s' requires the explicit modified kernel, "
+                    "and cannot be used with matrix_free=True" % self.svd_solver
+                )
+
+    def _select_fit_policy(self, itemsize=8):
+        """
+        Resolves `space` and `svd_solver` when they are 'auto', choosing the
+        combination with the lowest estimated run time among those whose
+        estimated peak memory, for entries of `itemsize` bytes, is available
+        (see `skcosmo.utils.cost_model`), and records the decision in
+        `fit_policy_`
+        """
+
+        if self.space in ["feature", "sample"]:
+            spaces = [self.space]
+        else:
+            spaces = ["feature", "sample"]
+
+        candidates = []
+        for space in spaces:
+            for svd_solver in self._policy_solvers(space):
+                candidates.append(
+                    dict(
+                        space=space,
+                        svd_solver=svd_solver,
+                        **self._policy_cost(space, svd_solver),
+                    )
+                )
+
+        if candidates:
+            chosen, memory, constants = select_fit_policy(candidates, itemsize)
+            space, svd_solver = chosen["space"], chosen["svd_solver"]
+        else:
+            memory, constants = available_memory(), get_cost_constants()
+            space = "feature" if self.n_samples > self.n_features else "sample"
+            svd_solver = "randomized" if self.svd_solver == "auto" else self.svd_solver
+
+        self.space = space
+        self._fit_svd_solver = svd_solver
+        self.fit_policy_ = dict(
+            space=space,
+            svd_solver=svd_solver,
+            available_memory=memory,
+            cost_constants=constants,
+            candidates=candidates,
+        )
+
+    def _policy_solvers(self, space):
+        """
+        Lists the solvers considered by the 'auto' policy in `space`
+        """
+
+        if self.svd_solver != "auto":
+            return [self.svd_solver]
+
+        n_min = min(self.n_samples, self.n_features)
+        if self.n_components == "mle":
+            solvers = ["full", "eigh"]
+        elif self.n_components < 1:
+            solvers = ["full", "eigh", "adaptive"]
+        elif self.n_components < n_min:
+            # eigh is left out, as it only computes the retained eigenvalues,
+            # and so would change the explained variance ratios
+            solvers = ["full", "randomized", "eigsh"]
+        else:
+            solvers = ["full", "eigh"]
+
+        if self.matrix_free and space == "sample":
+            solvers = [s for s in solvers if s in ["randomized", "eigsh"]]
+        return solvers
 
-        if self.space == "feature":
-            self._fit_feature_space(X, Y.reshape(Yhat.shape), Yhat)
+    def _policy_cost(self, space, svd_solver):
+        """
+        Estimates the operations and peak memory of a fit in `space` with
+        `svd_solver`, including the construction of the decomposed matrix
+        """
+
+        n, p = self.n_samples, self.n_features
+        if isinstance(self.n_components, numbers.Integral):
+            k = self.n_components
         else:
-            self._fit_sample_space(X, Y.reshape(Yhat.shape), Yhat, W)
+            k = min(n, p)
+
+        if space == "feature":
+            # SVD of X, from which the (p x p) factors of C~ are assembled
+            build = dict(
+                gemm=6.0 * p ** 3, decomposition=4.0 * n * p ** 2 + 22.0 * p ** 3
+            )
+            build_memory = n * p + n * min(n, p) + 5.0 * p ** 2
+            size, matvec_flops = p, None
+        elif self.matrix_free:
+            # ridge regression and products with X and Yhat for each vector
+            build = dict(gemm=2.0 * n * p ** 2, decomposition=p ** 3)
+            build_memory = n * p + 2.0 * p ** 2
+            size, matvec_flops = n, 4.0 * n * p
+        else:
+            # ridge regression, X X^T and the projectors from the n x n K~
+            build = dict(
+                gemm=2.0 * n * p ** 2 + 2.0 * n ** 2 * p + 2.0 * n * p * k,
+                decomposition=p ** 3,
+            )
+            build_memory = n * p + 2.0 * n ** 2
+            size, matvec_flops = n, None
+
+        cost = decomposition_cost(
+            svd_solver, size, k, self.iterated_power, matvec_flops=matvec_flops
+        )
+        for key, flops in build.items():
+            cost[key] += flops
+        cost["memory"] += build_memory
+        return cost
+
+    def _set_output_projectors(self, y_ndim):
+        """
+        Computes the projector from X to Y once `pxt_` and `pty_` are known
+        """
 
         self.pxy_ = self.pxt_ @ self.pty_
-        if len(Y.shape) == 1:
+        if y_ndim == 1:
             self.pxy_ = self.pxy_.reshape(
-                X.shape[1],
+                self.n_features,
             )
             self.pty_ = self.pty_.reshape(
                 self.n_components,
             )
 
         self.components_ = self.pxt_.T  # for sklearn compatibility
-        return self
 
-    def _fit_feature_space(self, X, Y, Yhat):
+    def _fit_feature_space(self, X, Y, Yhat=None):
         r"""
         In feature-space PCovR, the projectors are determined by:
 
@@ -348,44 +1151,231 @@ class PCovR(_BasePCA, LinearModel):
                                \mathbf{X})^{-\frac{1}{2}} \mathbf{X}^T
                                \mathbf{Y}
 
+        All of :math:`(\mathbf{X}^T \mathbf{X})^{-\frac{1}{2}}`,
+        :math:`(\mathbf{X}^T \mathbf{X})^{\frac{1}{2}}` and, if `Yhat` is not
+        supplied, the ridge regression of `estimator`, are obtained from a
+        single singular value decomposition of :math:`\mathbf{X}`.
+        """
+
+        self._fit_feature_space_factors(self._feature_space_svd_factors(X, Y, Yhat))
+
+    def _regress_from_svd(self, Yhat, W):
+        r"""
+        Whether :math:`\mathbf{\hat{Y}}` can be obtained from the singular
+        value decomposition of X in feature space, rather than by fitting
+        `estimator`, which is the case for a ridge regression without intercept
+        """
+
+        return (
+            self.space == "feature"
+            and Yhat is None
+            and W is None
+            and isinstance(self.estimator, LR)
+            and not self.estimator.fit_intercept
+            and not getattr(self.estimator, "positive", False)
+            and np.ndim(self.estimator.alpha) == 0
+        )
+
+    def _regression_alpha(self):
+        """
+        Regularization of the ridge regression of Y on X: that of `estimator`,
+        which `fit` uses, if it has one, and `alpha` otherwise
+        """
+
+        return getattr(self.estimator, "alpha", self.alpha)
+
+    def _feature_space_svd_stats(self, X, Y):
+        r"""
+        Computes the statistics stored by `fit` and `update`: the singular
+        value decomposition of X, :math:`\mathbf{X}^T \mathbf{Y}`, the column
+        sums of X and the number of samples
+        """
+
+        s, Vt = self._feature_space_svd(X)
+        return (
+            s,
+            Vt,
+            X.T @ Y.reshape(X.shape[0], -1),
+            np.asarray(X.sum(axis=0)).ravel(),
+            X.shape[0],
+        )
+
+    def _svd_stats_factors(self, svd_stats):
+        """
+        Computes the output of `_feature_space_factors` from the statistics
+        stored by `fit` and `update`
+        """
+
+        s, Vt, XtY, _, _ = svd_stats
+
+        factors = self._feature_space_factors(
+            s, Vt, XtY, alpha=self._regression_alpha()
+        )
+        return tuple(f.astype(Vt.dtype, copy=False) for f in factors)
+
+    def _fit_svd_stats(self):
+        """
+        Computes the feature-space projectors from the singular value
+        decomposition and the statistics stored by `fit` and `update`
+        """
+
+        self._fit_feature_space_factors(self._svd_stats_factors(self._svd_stats))
+
+    def _feature_space_svd_factors(self, X, Y, Yhat=None):
+        """
+        Computes the output of `_feature_space_factors` from the singular
+        value decomposition of X. If `Yhat` is not supplied, it is
+        computed with the ridge regularization of `estimator`.
+        """
+
+        s, Vt = self._feature_space_svd(X)
+
+        factors = self._feature_space_factors(
+            s,
+            Vt,
+            X.T @ Y,
+            XtYhat=None if Yhat is None else X.T @ Yhat,
+            alpha=self._regression_alpha(),
+        )
+        return tuple(f.astype(X.dtype, copy=False) for f in factors)
+
+    def _feature_space_svd(self, X):
+        r"""
+        Computes the non-zero singular values and the corresponding right
+        singular vectors of X. For sparse X, they are obtained from the
+        eigendecomposition of the sparse product :math:`\mathbf{X}^T
+        \mathbf{X}`, which costs :math:`\mathcal{O}(nnz \, n_{features})`
+        rather than :math:`\mathcal{O}(n_{samples} n_{features}^2)`, at the
+        price of squaring the condition number of X.
         """
 
-        Ct, iCsqrt = pcovr_covariance(
-            mixing=self.mixing,
-            X=X,
-            Y=Yhat,
-            rcond=self.tol,
-            return_isqrt=True,
+        if sparse.issparse(X):
+            return self._gram_spectrum(safe_sparse_dot(X.T, X, dense_output=True))
+
+        # the singular value decomposition is backward stable, so that it is
+        # carried out in the precision of X whatever the decomposition_dtype
+        _, s, Vt = linalg.svd(X, full_matrices=False)
+
+        # singular values below this threshold are numerical noise,
+        # as for np.linalg.matrix_rank
+        cutoff = max(self.tol, s[0] * max(X.shape) * np.finfo(s.dtype).eps)
+        return s[s > cutoff], Vt[s > cutoff]
+
+    def _fit_feature_space_covariance(self, XtX, XtY):
+        r"""
+        Feature-space PCovR from the sufficient statistics
+        :math:`\mathbf{X}^T \mathbf{X}` and :math:`\mathbf{X}^T \mathbf{Y}`.
+
+        The eigendecomposition :math:`\mathbf{X}^T \mathbf{X} = \mathbf{V}
+        \mathbf{S}^2 \mathbf{V}^T` replaces the singular value decomposition of
+        :math:`\mathbf{X}`, and the approximated properties enter only through
+
+        .. math::
+
+            \mathbf{X}^T \mathbf{\hat{Y}} = \mathbf{V} \mathbf{S}^2
+            \left(\mathbf{S}^2 + \lambda \mathbf{I}\right)^{-1}
+            \mathbf{V}^T \mathbf{X}^T \mathbf{Y}
+
+        with :math:`\lambda` the ridge regularization of `estimator`.
+        """
+
+        s, Vt = self._gram_spectrum(XtX)
+        factors = self._feature_space_factors(
+            s, Vt, XtY, alpha=self._regression_alpha()
+        )
+
+        self._fit_feature_space_factors(
+            tuple(f.astype(XtX.dtype, copy=False) for f in factors)
         )
-        try:
-            Csqrt = np.linalg.inv(iCsqrt)
-
-        # if we can avoid recomputing Csqrt, we should, but sometimes we
-        # run into a singular matrix, which is what we do here
-        except LinAlgError:
-            Csqrt = np.real(MatrixSqrt(X.T @ X))
-
-        if self._fit_svd_solver == "full":
-            U, S, Vt = self._decompose_full(Ct)
-        elif self._fit_svd_solver in ["arpack", "randomized"]:
-            U, S, Vt = self._decompose_truncated(Ct)
+
+    def _gram_spectrum(self, XtX):
+        """
+        Computes the non-zero singular values and the corresponding right
+        singular vectors of X from the eigendecomposition of `XtX`, which
+        is carried out in `decomposition_dtype`
+        """
+
+        vC, UC = linalg.eigh(
+            XtX.astype(self._decomposition_dtype(XtX.dtype), copy=False)
+        )
+
+        # eigenvalues of X^T X below this threshold are numerical noise,
+        # as for np.linalg.matrix_rank
+        cutoff = max(self.tol ** 2, vC[-1] * XtX.shape[0] * np.finfo(XtX.dtype).eps)
+        UC = UC[:, vC > cutoff]
+        vC = vC[vC > cutoff]
+
+        return np.sqrt(vC)[::-1], UC[:, ::-1].T
+
+    def _decomposition_dtype(self, dtype):
+        """
+        dtype in which the decompositions of data of the given dtype are
+        carried out
+        """
+
+        if self.decomposition_dtype is None:
+            return np.dtype(dtype)
+        return np.dtype(self.decomposition_dtype)
+
+    def _feature_space_factors(self, s, Vt, XtY, XtYhat=None, alpha=None):
+        r"""
+        Computes the quantities of feature-space PCovR which do not depend
+        on `mixing` from the non-zero singular values `s` and right singular
+        vectors `Vt` of :math:`\mathbf{X}`, namely
+        :math:`\mathbf{X}^T \mathbf{X}`, :math:`\left(\mathbf{X}^T
+        \mathbf{X}\right)^{-\frac{1}{2}} \mathbf{X}^T \mathbf{\hat{Y}}`,
+        :math:`\left(\mathbf{X}^T \mathbf{X}\right)^{-\frac{1}{2}}`,
+        :math:`\left(\mathbf{X}^T \mathbf{X}\right)^{\frac{1}{2}}` and
+        :math:`\left(\mathbf{X}^T \mathbf{X}\right)^{-\frac{1}{2}}
+        \mathbf{X}^T \mathbf{Y}`.
+
+        If `XtYhat` is not supplied, :math:`\mathbf{\hat{Y}}` is taken
+        from ridge regression with regularization `alpha`.
+        """
+
+        V = Vt.T
+        Vt_XtY = Vt @ XtY
+
+        if XtYhat is None:
+            Vt_XtYhat = (s ** 2 / (s ** 2 + alpha))[:, np.newaxis] * Vt_XtY
         else:
-            raise ValueError(
-                "Unrecognized svd_solver='{0}'" "".format(self._fit_svd_solver)
-            )
+            Vt_XtYhat = Vt @ XtYhat
+
+        C = (V * s ** 2) @ Vt
+        C_Y = (V / s) @ Vt_XtYhat
+        iCsqrt = (V / s) @ Vt
+        Csqrt = (V * s) @ Vt
+
+        return C, C_Y, iCsqrt, Csqrt, (V / s) @ Vt_XtY
+
+    def _fit_feature_space_factors(self, factors, init=None):
+        r"""
+        Computes the feature-space projectors for the current `mixing`
+        from the output of `_feature_space_factors`. Returns the eigenvectors
+        of :math:`\mathbf{\tilde{C}}`, which can warm-start the
+        decomposition for a neighbouring `mixing` through `init`.
+        """
+
+        C, C_Y, iCsqrt, Csqrt, iCsqrt_XtY = factors
+
+        Ct = self.mixing * C + (1 - self.mixing) * C_Y @ C_Y.T
+
+        U, S, Vt = self._decompose(Ct, init=init)
 
         self.singular_values_ = S.copy()
-        self.explained_variance_ = (S ** 2) / (X.shape[0] - 1)
+        self.explained_variance_ = (S ** 2) / (self.n_samples - 1)
         self.explained_variance_ratio_ = (
             self.explained_variance_ / self.explained_variance_.sum()
         )
 
-        S_inv = np.diagflat([1.0 / s if s > self.tol else 0.0 for s in S])
-        self.pxt_ = np.linalg.multi_dot([iCsqrt, Vt.T, np.diagflat(S)])
-        self.ptx_ = np.linalg.multi_dot([S_inv, Vt, Csqrt])
-        self.pty_ = np.linalg.multi_dot([S_inv, Vt, iCsqrt, X.T, Y])
+        S_inv = np.array([1.0 / s if s > self.tol else 0.0 for s in S], dtype=S.dtype)
+        self.pxt_ = iCsqrt @ Vt.T * S
+        self.ptx_ = S_inv[:, np.newaxis] * Vt @ Csqrt
+        self.pty_ = S_inv[:, np.newaxis] * Vt @ iCsqrt_XtY
 
-    def _fit_sample_space(self, X, Y, Yhat, W):
+        return U
+
+    def _fit_sample_space(self, X, Y, Yhat, W, K=None, init=None):
         r"""
         In sample-space PCovR, the projectors are determined by:
 
@@ -413,18 +1403,21 @@ class PCovR(_BasePCA, LinearModel):
             \mathbf{P}_{TY} = \mathbf{\Lambda}_\mathbf{\tilde{K}}^{-\frac{1}{2}}
                                \mathbf{U}_\mathbf{\tilde{K}}^T \mathbf{Y}
 
+        If `matrix_free`, :math:`\mathbf{\tilde{K}}` is only accessed through
+        its products with vectors. Otherwise, if supplied, the Gram matrix `K`
+        :math:`= \mathbf{X} \mathbf{X}^T` is used instead of being recomputed. Returns the eigenvectors of
+        :math:`\mathbf{\tilde{K}}`, which can warm-start the decomposition for
+        a neighbouring `mixing` through `init`.
         """
 
-        Kt = pcovr_kernel(mixing=self.mixing, X=X, Y=Yhat)
-
-        if self._fit_svd_solver == "full":
-            U, S, Vt = self._decompose_full(Kt)
-        elif self._fit_svd_solver in ["arpack", "randomized"]:
-            U, S, Vt = self._decompose_truncated(Kt)
+        if self.matrix_free:
+            Kt = pcovr_kernel_operator(mixing=self.mixing, X=X, Y=Yhat)
+        elif K is None:
+            Kt = pcovr_kernel(mixing=self.mixing, X=X, Y=Yhat)
         else:
-            raise ValueError(
-                "Unrecognized svd_solver='{0}'" "".format(self._fit_svd_solver)
-            )
+            Kt = pcovr_kernel(mixing=self.mixing, X=K, Y=Yhat, kernel="precomputed")
+
+        U, S, Vt = self._decompose(Kt, init=init)
 
         self.singular_values_ = S.copy()
         self.explained_variance_ = (S ** 2) / (X.shape[0] - 1)
@@ -432,14 +1425,48 @@ class PCovR(_BasePCA, LinearModel):
             self.explained_variance_ / self.explained_variance_.sum()
         )
 
-        P = (self.mixing * X.T) + (1.0 - self.mixing) * W @ Yhat.T
         T = Vt.T @ np.diagflat(1 / np.sqrt(S))
 
-        self.pxt_ = P @ T
+        # P_XT = (mixing X^T + (1 - mixing) W Yhat^T) T, with the products
+        # grouped such that X is never densified when sparse
+        self.pxt_ = self.mixing * safe_sparse_dot(X.T, T, dense_output=True) + (
+            1.0 - self.mixing
+        ) * W @ (Yhat.T @ T)
         self.pty_ = T.T @ Y
-        self.ptx_ = T.T @ X
+        self.ptx_ = safe_sparse_dot(T.T, X, dense_output=True)
+
+        return U
+
+    def _decompose(self, mat, init=None):
+        """
+        Decomposes the symmetric positive semi-definite matrix `mat` with
+        the selected solver, in `decomposition_dtype`, and returns the result
+        in the dtype of `mat`. For svd_solver == 'lobpcg', the iterations start
+        from the approximate eigenvectors `init` when supplied.
+        """
+
+        dtype = mat.dtype
+        if not isinstance(mat, LinearOperator):
+            mat = mat.astype(self._decomposition_dtype(dtype), copy=False)
+
+        if self._fit_svd_solver in ["full", "eigh"]:
+            U, S, Vt = self._decompose_full(mat)
+        elif self._fit_svd_solver == "adaptive":
+            U, S, Vt = self._decompose_adaptive(mat)
+        elif self._fit_svd_solver in ["arpack", "randomized", "eigsh", "lobpcg"]:
+            U, S, Vt = self._decompose_truncated(mat, init=init)
+        else:
+            raise ValueError(
+                "Unrecognized svd_solver='{0}'" "".format(self._fit_svd_solver)
+            )
 
-    def _decompose_truncated(self, mat):
+        return (
+            U.astype(dtype, copy=False),
+            S.astype(dtype, copy=False),
+            Vt.astype(dtype, copy=False),
+        )
+
+    def _decompose_truncated(self, mat, init=None):
 
         if not 1 <= self.n_components <= min(self.n_samples, self.n_features):
             raise ValueError(
@@ -458,7 +1485,7 @@ class PCovR(_BasePCA, LinearModel):
                 "when greater than or equal to 1, was of type=%r"
                 % (self.n_components, type(self.n_components))
             )
-        elif self.svd_solver == "arpack" and self.n_components == min(
+        elif self._fit_svd_solver in ["arpack", "eigsh"] and self.n_components == min(
             self.n_samples, self.n_features
         ):
             raise ValueError(
@@ -472,29 +1499,50 @@ class PCovR(_BasePCA, LinearModel):
                 )
             )
 
-        random_state = check_random_state(self.random_state)
+        # integer n_components are passed by 'adaptive' to the randomized solver
+        svd_solver = self._fit_svd_solver
+        if svd_solver == "adaptive":
+            svd_solver = "randomized"
+
+        return _decompose_symmetric(
+            mat,
+            self.n_components,
+            svd_solver,
+            tol=self.tol,
+            random_state=self.random_state,
+            iterated_power=self.iterated_power,
+            init=init,
+        )
 
-        if self._fit_svd_solver == "arpack":
-            v0 = _init_arpack_v0(min(mat.shape), random_state)
-            U, S, Vt = svds(mat, k=self.n_components, tol=self.tol, v0=v0)
-            # svds doesn't abide by scipy.linalg.svd/randomized_svd
-            # conventions, so reverse its outputs.
-            S = S[::-1]
-            # flip eigenvectors' sign to enforce deterministic output
-            U, Vt = svd_flip(U[:, ::-1], Vt[::-1])
+    def _decompose_adaptive(self, mat):
+        """
+        Decomposes `mat` with `_decompose_adaptive_rank` for fractional
+        n_components, falling back on the full decomposition once the rank
+        exceeds half the size of `mat`, or for n_components == 'mle'. Integer
+        n_components are passed to the randomized solver directly.
+        """
 
-        # We have already eliminated all other solvers, so this must be "randomized"
-        else:
-            # sign flipping is done inside
-            U, S, Vt = randomized_svd(
-                mat,
-                n_components=self.n_components,
-                n_iter=self.iterated_power,
-                flip_sign=True,
-                random_state=random_state,
+        if self.n_components == "mle":
+            return self._decompose_full(mat)
+        elif self.n_components >= 1:
+            return self._decompose_truncated(mat)
+
+        if isinstance(mat, LinearOperator):
+            raise ValueError(
+                "svd_solver='adaptive' requires the explicit matrix to decompose."
             )
 
-        return U, S, Vt
+        decomposition = _decompose_adaptive_rank(
+            mat,
+            self.n_components,
+            random_state=self.random_state,
+            iterated_power=self.iterated_power,
+        )
+        if decomposition is None:
+            return self._decompose_full(mat)
+
+        self.n_components = len(decomposition[1])
+        return decomposition
 
     def _decompose_full(self, mat):
         if self.n_components == "mle":
@@ -521,10 +1569,14 @@ class PCovR(_BasePCA, LinearModel):
                     "was of type=%r" % (self.n_components, type(self.n_components))
                 )
 
-        U, S, Vt = linalg.svd(mat, full_matrices=False)
+        if self.n_components == "mle" or self.n_components < 1:
+            n_components = None
+        else:
+            n_components = self.n_components
 
-        # flip eigenvectors' sign to enforce deterministic output
-        U, Vt = svd_flip(U, Vt)
+        U, S, Vt = _decompose_symmetric(
+            mat, n_components, "eigh" if self._fit_svd_solver == "eigh" else "full"
+        )
 
         # Get variance explained by singular values
         explained_variance_ = (S ** 2) / (self.n_samples - 1)
@@ -551,7 +1603,7 @@ class PCovR(_BasePCA, LinearModel):
             Vt[: self.n_components],
         )
 
-    def inverse_transform(self, T):
+    def inverse_transform(self, T, out=None, batch_size=None):
         r"""Transform data back to its original space.
 
         .. math::
@@ -566,15 +1618,45 @@ class PCovR(_BasePCA, LinearModel):
             Projected data, where n_samples is the number of samples
             and n_components is the number of components.
 
+        out : ndarray of shape (n_samples, n_features), default=None
+            Array in which to store the result, which may be a `np.memmap`.
+
+        batch_size : int, default=None
+            Number of rows of T processed at a time. If None, determined from
+            `sklearn.get_config()['working_memory']`.
+
         Returns
         -------
         X_original array-like, shape (n_samples, n_features)
         """
 
-        return T @ self.ptx_ + self.mean_
+        return apply_blockwise(
+            lambda T_batch: T_batch @ self.ptx_ + self.mean_,
+            T,
+            out=out,
+            batch_size=batch_size,
+            row_bytes=self._row_bytes(self.ptx_.shape[0], self.ptx_.shape[1]),
+        )
+
+    def predict(self, X=None, T=None, out=None, batch_size=None):
+        """Predicts the property values using regression on X or T
+
+        Parameters
+        ----------
+        X : array-like, shape (n_samples, n_features), default=None
+            New data, where n_samples is the number of samples
+            and n_features is the number of features.
 
-    def predict(self, X=None, T=None):
-        """Predicts the property values using regression on X or T"""
+        T : array-like, shape (n_samples, n_components), default=None
+            Projected data, used when X is not supplied.
+
+        out : ndarray of shape (n_samples, n_properties), default=None
+            Array in which to store the result, which may be a `np.memmap`.
+
+        batch_size : int, default=None
+            Number of rows of X or T processed at a time. If None, determined
+            from `sklearn.get_config()['working_memory']`.
+        """
 
         check_is_fitted(self, ["pxy_", "pty_"])
 
@@ -582,31 +1664,137 @@ class PCovR(_BasePCA, LinearModel):
             raise ValueError("Either X or T must be supplied.")
 
         if X is not None:
-            X = check_array(X)
-            return X @ self.pxy_
+            projector, data = self.pxy_, X
         else:
-            T = check_array(T)
-            return T @ self.pty_
+            projector, data = self.pty_, T
+
+        return apply_blockwise(
+            lambda batch: safe_sparse_dot(
+                check_array(batch, accept_sparse=["csr", "csc"]),
+                projector,
+                dense_output=True,
+            ),
+            data,
+            out=out,
+            batch_size=batch_size,
+            row_bytes=self._row_bytes(
+                projector.shape[0], projector.size // projector.shape[0]
+            ),
+        )
 
-    def transform(self, X=None):
+    def transform(self, X=None, out=None, batch_size=None):
         """
         Apply dimensionality reduction to X.
 
         X is projected on the first principal components as determined by the
         modified PCovR distances.
 
+        X is processed in blocks of rows, so that X and `out` may be
+        `np.memmap` arrays larger than the available memory.
+
         Parameters
         ----------
         X : array-like, shape (n_samples, n_features)
             New data, where n_samples is the number of samples
             and n_features is the number of features.
 
+        out : ndarray of shape (n_samples, n_components), default=None
+            Array in which to store the result, which may be a `np.memmap`.
+
+        batch_size : int, default=None
+            Number of rows of X processed at a time. If None, determined from
+            `sklearn.get_config()['working_memory']`.
+
         """
 
         check_is_fitted(self, ["pxt_", "mean_"])
 
+        return apply_blockwise(
+            self._transform_batch,
+            X,
+            out=out,
+            batch_size=batch_size,
+            row_bytes=self._row_bytes(*self.pxt_.shape),
+        )
+
+    def transform_predict(self, X, batch_size=None):
+        r"""
+        Apply dimensionality reduction to X and predict the properties, in a
+        single pass over X.
+
+        Both results follow from the product :math:`\mathbf{X}\mathbf{P}_{XT}`,
+        computed once per block of rows: the projection subtracts
+        :math:`\bar{\mathbf{x}} \mathbf{P}_{XT}`, and the prediction is
+        :math:`\mathbf{X}\mathbf{P}_{XT}\mathbf{P}_{TY}`, as for `predict`.
+
+        Parameters
+        ----------
+        X : {array-like, sparse matrix}, shape (n_samples, n_features)
+            New data, where n_samples is the number of samples
+            and n_features is the number of features.
+
+        batch_size : int, default=None
+            Number of rows of X processed at a time. If None, determined from
+            `sklearn.get_config()['working_memory']`.
+
+        Returns
+        -------
+        T : ndarray, shape (n_samples, n_components)
+            Projection of X, as returned by `transform`.
+
+        Y : ndarray, shape (n_samples, n_properties)
+            Predicted properties, as returned by `predict`.
+        """
+
+        check_is_fitted(self, ["pxt_", "pty_", "mean_"])
+
+        pty = self.pty_.reshape(self.pxt_.shape[1], -1)
+        mean_t = self.mean_ @ self.pxt_
+
+        def _transform_predict_batch(X):
+            XP = safe_sparse_dot(
+                check_array(X, accept_sparse=["csr", "csc"]),
+                self.pxt_,
+                dense_output=True,
+            )
+            return np.hstack([XP - mean_t, XP @ pty])
+
+        TY = apply_blockwise(
+            _transform_predict_batch,
+            X,
+            batch_size=batch_size,
+            row_bytes=self._row_bytes(
+                self.pxt_.shape[0], self.pxt_.shape[1] + pty.shape[1]
+            ),
+        )
+
+        T, Y = TY[:, : self.pxt_.shape[1]], TY[:, self.pxt_.shape[1] :]
+        if self.pty_.ndim == 1:
+            Y = Y.reshape(-1)
+        return T, Y
+
+    def _transform_batch(self, X):
+        r"""
+        Projects a block of rows of X, centering sparse X implicitly through
+        :math:`(\mathbf{X} - \bar{\mathbf{x}}) \mathbf{P}_{XT} =
+        \mathbf{X} \mathbf{P}_{XT} - \bar{\mathbf{x}} \mathbf{P}_{XT}`
+        """
+
+        if sparse.issparse(X):
+            X = check_array(X, accept_sparse=["csr", "csc"])
+            return safe_sparse_dot(X, self.pxt_, dense_output=True) - (
+                self.mean_ @ self.pxt_
+            )
         return super().transform(X)
 
+    def _row_bytes(self, n_in, n_out):
+        """
+        Estimates the memory needed to map one row of n_in values to n_out
+        values: the validated, centered copy of the input and the output
+        """
+
+        return self.pxt_.dtype.itemsize * (2 * n_in + n_out)
+
     def score(self, X, Y, T=None):
         r"""Return the total reconstruction error for X and Y,
         defined as:
@@ -641,10 +1829,44 @@ class PCovR(_BasePCA, LinearModel):
         if T is None:
             T = self.transform(X)
 
-        x = self.inverse_transform(T)
         y = self.predict(T=T)
 
-        return (
-            np.linalg.norm(X - x) ** 2.0 / np.linalg.norm(X) ** 2.0
-            + np.linalg.norm(Y - y) ** 2.0 / np.linalg.norm(Y) ** 2.0
-        )
+        if sparse.issparse(X):
+            # ||X - x||^2 = ||X||^2 - 2 <X, x> + ||x||^2, with the
+            # reconstruction x = T P_TX + 1 mean^T, such that neither X nor x
+            # is ever dense
+            X_norm = sparse.linalg.norm(X) ** 2.0
+            X_x = (
+                np.sum(safe_sparse_dot(X, self.ptx_.T, dense_output=True) * T)
+                + np.asarray(X.sum(axis=0)).ravel() @ self.mean_
+            )
+            x_norm = (
+                np.sum((T.T @ T) * (self.ptx_ @ self.ptx_.T))
+                + 2.0 * T.sum(axis=0) @ self.ptx_ @ self.mean_
+                + T.shape[0] * self.mean_ @ self.mean_
+            )
+            loss_x = X_norm - 2.0 * X_x + x_norm
+        else:
+            X_norm = np.linalg.norm(X) ** 2.0
+            loss_x = np.linalg.norm(X - self.inverse_transform(T)) ** 2.0
+
+        return loss_x / X_norm + np.linalg.norm(Y - y) ** 2.0 / np.linalg.norm(Y) ** 2.0
+
+
+def _shard_statistics(X, Y):
+    """
+    Computes the contributions of a shard, given as arrays or as paths to
+    `.npy` files, to :math:`X^T X`, :math:`X^T Y` and the column sums of X,
+    along with its number of samples and the dimension of Y
+    """
+
+    if isinstance(X, (str, os.PathLike)):
+        X = np.load(X, mmap_mode="r")
+    if isinstance(Y, (str, os.PathLike)):
+        Y = np.load(Y, mmap_mode="r")
+
+    X, Y = check_X_y(X, Y, y_numeric=True, multi_output=True)
+    y_ndim = Y.ndim
+    Y = Y.reshape(X.shape[0], -1)
+
+    return X.T @ X, X.T @ Y, X.sum(axis=0), X.shape[0], y_ndim
@@ -0,0 +1,272 @@
+import numpy as np
+
+from joblib import Parallel, delayed
+
+from sklearn.base import BaseEstimator, TransformerMixin
+from sklearn.linear_model import Ridge
+from sklearn.model_selection import check_cv
+from sklearn.utils.validation import check_X_y, check_is_fitted
+
+from .pcovr import PCovR
+
+
+class PCovRCV(TransformerMixin, BaseEstimator):
+    r"""Principal Covariates Regression with a joint cross-validation of the
+    mixing parameter, the number of components and the ridge regularization.
+
+    Every combination of `mixings`, `n_components` and `alphas` is scored on
+    the held-out folds with the PCovR loss (see :meth:`PCovR.score`), and the
+    combination with the lowest mean loss is refitted on the whole data set.
+
+    Rather than fitting one PCovR per combination and fold, as
+    :obj:`sklearn.model_selection.GridSearchCV` would, the feature-space
+    quantities are derived from a single singular value decomposition of each
+    training fold: the ridge regression of every alpha follows from the
+    singular values, as in :obj:`skcosmo.linear_model.RidgeRegression2FoldCV`,
+    and the eigendecomposition of :math:`\mathbf{\tilde{C}}` for each
+    (mixing, alpha) pair is truncated to every number of components. The
+    folds are processed in parallel with joblib.
+
+    Parameters
+    ----------
+    mixings : array-like of shape (n_mixings,), default=(0.0, 0.25, 0.5, 0.75, 1.0)
+        Values of the mixing parameter to try, as described in PCovR as
+        :math:`{\alpha}`.
+
+    n_components : int or array-like of shape (n_n_components,), default=None
+        Numbers of components to try. If None, every number of components
+        from 1 to the rank of the smallest training fold.
+
+    alphas : array-like of shape (n_alphas,), default=(1e-6, 1e-4, 1e-2, 1.0)
+        Values of the ridge regularization to try for the approximation of
+        :math:`{\mathbf{\hat{Y}}}`.
+
+    cv : int, cross-validation generator or an iterable, default=None
+        Determines the cross-validation splitting strategy, as in
+        :obj:`sklearn.model_selection.check_cv`. If None, 5-fold
+        cross-validation.
+
+    svd_solver : {'auto', 'full', 'arpack', 'randomized', 'eigh', 'eigsh', 'lobpcg',
+                  'adaptive'}, default='auto'
+        Solver of the PCovR refitted with the selected parameters. The
+        cross-validation always uses full decompositions, which are then
+        truncated to each number of components.
+
+    tol : float, default=1e-12
+        Tolerance for singular values, as in PCovR.
+
+    random_state : int, RandomState instance or None, default=None
+        Passed to the refitted PCovR.
+
+    n_jobs : int, default=None
+        The number of folds processed in parallel.
+        ``None`` means 1 unless in a :obj:`joblib.parallel_backend` context.
+        ``-1`` means using all processors.
+
+    Attributes
+    ----------
+    cv_losses_ : ndarray of shape (n_splits, n_mixings, n_alphas, n_n_components)
+        PCovR loss on the held-out samples of each fold for each combination
+        of parameters.
+
+    mixing_ : float
+        Selected mixing parameter.
+
+    n_components_ : int
+        Selected number of components.
+
+    alpha_ : float
+        Selected ridge regularization.
+
+    best_loss_ : float
+        Mean held-out loss of the selected parameters.
+
+    best_estimator_ : PCovR
+        PCovR with the selected parameters, refitted on the whole data set.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from skcosmo.decomposition import PCovRCV
+    >>> X = np.random.uniform(-1, 1, (50, 4))
+    >>> Y = X @ np.array([1.0, -2.0, 0.0, 0.5])
+    >>> pcovr = PCovRCV(mixings=[0.1, 0.5, 0.9], n_components=[1, 2, 3])
+    >>> pcovr = pcovr.fit(X, Y)
+    >>> T = pcovr.transform(X)
+    """
+
+    def __init__(
+        self,
+        mixings=(0.0, 0.25, 0.5, 0.75, 1.0),
+        n_components=None,
+        alphas=(1e-6, 1e-4, 1e-2, 1.0),
+        cv=None,
+        svd_solver="auto",
+        tol=1e-12,
+        random_state=None,
+        n_jobs=None,
+    ):
+        self.mixings = mixings
+        self.n_components = n_components
+        self.alphas = alphas
+        self.cv = cv
+        self.svd_solver = svd_solver
+        self.tol = tol
+        self.random_state = random_state
+        self.n_jobs = n_jobs
+
+    def fit(self, X, Y):
+        """
+        Cross-validates every combination of parameters, then fits a PCovR
+        with the selected parameters on the whole data set.
+
+        Parameters
+        ----------
+        X : ndarray of shape (n_samples, n_features)
+            Training data, where n_samples is the number of samples and
+            n_features is the number of features.
+
+        Y : ndarray of shape (n_samples, n_properties)
+            Training data, where n_samples is the number of samples and
+            n_properties is the number of properties.
+        """
+
+        X, Y = check_X_y(
+            X, Y, y_numeric=True, multi_output=True, dtype=[np.float64, np.float32]
+        )
+        Y = Y.astype(X.dtype, copy=False)
+
+        mixings = np.atleast_1d(np.asarray(self.mixings, dtype=float))
+        alphas = np.atleast_1d(np.asarray(self.alphas, dtype=float))
+
+        splits = list(check_cv(self.cv).split(X, Y))
+        max_rank = min([X.shape[1]] + [len(train) for train, _ in splits])
+
+        if self.n_components is None:
+            n_components = np.arange(1, max_rank + 1)
+        else:
+            n_components = np.atleast_1d(np.asarray(self.n_components, dtype=int))
+
+        if np.any(n_components < 1) or np.any(n_components > max_rank):
+            raise ValueError(
+                "n_components must be between 1 and {}, the smallest number of "
+                "training samples or features.".format(max_rank)
+            )
+
+        self.cv_losses_ = np.array(
+            Parallel(n_jobs=self.n_jobs)(
+                delayed(self._fold_losses)(
+                    X[train], Y[train], X[test], Y[test], mixings, alphas, n_components
+                )
+                for train, test in splits
+            )
+        )
+
+        mean_losses = self.cv_losses_.mean(axis=0)
+        i_mixing, i_alpha, i_components = np.unravel_index(
+            np.argmin(mean_losses), mean_losses.shape
+        )
+
+        self.mixing_ = mixings[i_mixing]
+        self.alpha_ = alphas[i_alpha]
+        self.n_components_ = int(n_components[i_components])
+        self.best_loss_ = mean_losses[i_mixing, i_alpha, i_components]
+
+        self.best_estimator_ = PCovR(
+            mixing=self.mixing_,
+            n_components=self.n_components_,
+            alpha=self.alpha_,
+            svd_solver=self.svd_solver,
+            tol=self.tol,
+            random_state=self.random_state,
+            estimator=Ridge(alpha=self.alpha_, fit_intercept=False, tol=1e-12),
+        ).fit(X, Y)
+
+        return self
+
+    def _fold_losses(self, X, Y, X_test, Y_test, mixings, alphas, n_components):
+        """
+        Computes the held-out loss for every combination of parameters from a
+        single singular value decomposition of the training fold
+        """
+
+        model = PCovR(
+            n_components=int(np.max(n_components)),
+            space="feature",
+            svd_solver="full",
+            tol=self.tol,
+        )
+        model.mean_ = np.mean(X, axis=0)
+        model._set_fit_parameters(*X.shape, X.dtype)
+
+        s, Vt = model._feature_space_svd(X)
+        XtY = X.T @ Y.reshape(X.shape[0], -1)
+
+        X_norm = np.linalg.norm(X_test) ** 2.0
+        X_test = X_test - model.mean_
+        Y_test = Y_test.reshape(X_test.shape[0], -1)
+
+        losses = np.zeros((len(mixings), len(alphas), len(n_components)))
+        for i_alpha, alpha in enumerate(alphas):
+            factors = model._feature_space_factors(s, Vt, XtY, alpha=alpha)
+            factors = tuple(f.astype(X.dtype, copy=False) for f in factors)
+
+            for i_mixing, mixing in enumerate(mixings):
+                model.mixing = mixing
+                model._fit_feature_space_factors(factors)
+
+                # the decomposition is sorted, so that the projectors of
+                # fewer components are truncations of those for the most
+                T = X_test @ model.pxt_
+                for i_components, k in enumerate(n_components):
+                    losses[i_mixing, i_alpha, i_components] = (
+                        np.linalg.norm(X_test - T[:, :k] @ model.ptx_[:k]) ** 2.0
+                        / X_norm
+                        + np.linalg.norm(Y_test - T[:, :k] @ model.pty_[:k]) ** 2.0
+                        / np.linalg.norm(Y_test) ** 2.0
+                    )
+
+        return losses
+
+    def transform(self, X, **kwargs):
+        """
+        Projects X with the refitted PCovR, see :meth:`PCovR.transform`.
+        """
+
+        check_is_fitted(self, "best_estimator_")
+        return self.best_estimator_.transform(X, **kwargs)
+
+    def transform_predict(self, X, **kwargs):
+        """
+        Projects X and predicts the properties with the refitted PCovR, see
+        :meth:`PCovR.transform_predict`.
+        """
+
+        check_is_fitted(self, "best_estimator_")
+        return self.best_estimator_.transform_predict(X, **kwargs)
+
+    def inverse_transform(self, T, **kwargs):
+        """
+        Reconstructs X with the refitted PCovR, see
+        :meth:`PCovR.inverse_transform`.
+        """
+
+        check_is_fitted(self, "best_estimator_")
+        return self.best_estimator_.inverse_transform(T, **kwargs)
+
+    def predict(self, X=None, T=None, **kwargs):
+        """
+        Predicts the properties with the refitted PCovR, see
+        :meth:`PCovR.predict`.
+        """
+
+        check_is_fitted(self, "best_estimator_")
+        return self.best_estimator_.predict(X=X, T=T, **kwargs)
+
+    def score(self, X, Y, T=None):
+        """
+        PCovR loss of the refitted PCovR, see :meth:`PCovR.score`.
+        """
+
+        check_is_fitted(self, "best_estimator_")
+        return self.best_estimator_.score(X, Y, T=T)
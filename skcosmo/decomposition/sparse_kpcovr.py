@@ -0,0 +1,395 @@
+import numpy as np
+
+from scipy import linalg
+from sklearn.base import clone
+from sklearn.utils import check_array
+from sklearn.utils.validation import check_X_y
+
+from .kpcovr import KPCovR
+from ..preprocessing import SparseKernelCenterer
+from ..sample_selection import FPS
+
+
+class SparseKPCovR(KPCovR):
+    r"""
+    Sparse Kernel Principal Covariates Regression, in which the kernel is
+    approximated with the Nyström method from an active set of
+    :math:`n_{active}` points
+
+    .. math::
+
+      \mathbf{K} \approx \mathbf{K}_{NM} \mathbf{K}_{MM}^{-1} \mathbf{K}_{NM}^T
+              = \mathbf{\Phi} \mathbf{\Phi}^T,
+      \qquad \mathbf{\Phi} = \mathbf{K}_{NM} \mathbf{U}_{MM}
+              \mathbf{\Lambda}_{MM}^{-\frac{1}{2}}
+
+    where :math:`\mathbf{K}_{MM} = \mathbf{U}_{MM} \mathbf{\Lambda}_{MM}
+    \mathbf{U}_{MM}^T`. Writing the thin singular value decomposition
+    :math:`\mathbf{\Phi} = \mathbf{U}_\Phi \mathbf{\Sigma}_\Phi \mathbf{V}_\Phi^T`,
+    the modified kernel of KPCovR reduces to
+
+    .. math::
+
+      \mathbf{\tilde{K}} = \mathbf{U}_\Phi \left(\alpha \mathbf{\Sigma}_\Phi^2
+            + (1 - \alpha) \mathbf{U}_\Phi^T \mathbf{\hat{Y}}
+            \mathbf{\hat{Y}}^T \mathbf{U}_\Phi\right) \mathbf{U}_\Phi^T,
+
+    such that the projection is found from the eigendecomposition of an
+    :math:`n_{active} \times n_{active}` matrix. Only :math:`\mathbf{K}_{NM}`
+    and :math:`\mathbf{K}_{MM}` are computed, so that the fit scales as
+    :math:`\mathcal{O}(n_{samples} n_{active}^2)` in time and
+    :math:`\mathcal{O}(n_{samples} n_{active})` in memory. When the active set
+    is the whole training set, the results are those of :class:`KPCovR`.
+
+    Parameters
+    ----------
+    mixing: float, defaults to 1
+        mixing parameter, as described in PCovR as :math:`{\alpha}`
+
+    n_components: int, float or str, default=None
+        Number of components to keep.
+        if n_components is not set all components are kept::
+
+            n_components == rank of the active kernel
+
+    n_active: int, default=None
+        Number of points of the active set selected by farthest point
+        sampling (see :class:`skcosmo.sample_selection.FPS`) when no active
+        set is passed to `fit`.
+
+    svd_solver : {'auto', 'full', 'arpack', 'randomized', 'eigh', 'eigsh', 'lobpcg',
+                  'adaptive'}, default='auto'
+        Solver of the :math:`n_{active} \times n_{active}` eigenproblem, as
+        in :class:`KPCovR`.
+
+    kernel: "linear" | "poly" | "rbf" | "sigmoid" | "cosine"
+        Kernel. Default="linear". Precomputed kernels are not supported, as
+        the kernels with the active set are computed from the data.
+
+    gamma: float, default=1/n_features
+        Kernel coefficient for rbf, poly and sigmoid kernels. Ignored by other
+        kernels.
+
+    degree: int, default=3
+        Degree for poly kernels. Ignored by other kernels.
+
+    coef0: float, default=1
+        Independent term in poly and sigmoid kernels.
+        Ignored by other kernels.
+
+    kernel_params: mapping of string to any, default=None
+        Parameters (keyword arguments) and values for kernel passed as
+        callable object. Ignored by other kernels.
+
+    center: boolean, default=False
+            Whether to center the kernels, with
+            :class:`skcosmo.preprocessing.SparseKernelCenterer`
+
+    alpha: float, default=1E-6
+            Regularization parameter to use in all regression operations.
+
+    fit_inverse_transform: bool, default=False
+        Learn the inverse transform for non-precomputed kernels.
+        (i.e. learn to find the pre-image of a point)
+
+    tol: float, default=1e-12
+        Tolerance for singular values, and for the eigenvalues of the active
+        kernel relative to the largest one.
+
+    n_jobs: int, default=None
+        The number of parallel jobs to run.
+        ``None`` means 1 unless in a :obj:`joblib.parallel_backend` context.
+        ``-1`` means using all processors.
+
+    iterated_power : int or 'auto', default='auto'
+        Number of iterations for the power method computed by
+        svd_solver == 'randomized', and maximum number of iterations
+        for svd_solver == 'lobpcg' (200 if 'auto').
+        Must be of range [0, infinity).
+
+    random_state : int, RandomState instance or None, default=None
+        Used when the 'arpack' or 'randomized' solvers are used. Pass an int
+        for reproducible results across multiple function calls.
+
+    Attributes
+    ----------
+    n_components: int
+        The estimated number of components.
+
+    pkt_: ndarray of size :math:`({n_{active}, n_{components}})`
+           the projector, or weights, from the active kernel
+           :math:`\mathbf{K}_{NM}` to the latent-space projection
+           :math:`\mathbf{T}`
+
+    pky_: ndarray of size :math:`({n_{active}, n_{properties}})`
+           the projector, or weights, from the active kernel
+           :math:`\mathbf{K}_{NM}` to the properties :math:`\mathbf{Y}`
+
+    pty_: ndarray of size :math:`({n_{components}, n_{properties}})`
+          the projector, or weights, from the latent-space projection
+          :math:`\mathbf{T}` to the properties :math:`\mathbf{Y}`
+
+    ptx_: ndarray of size :math:`({n_{components}, n_{features}})`
+         the projector, or weights, from the latent-space projection
+         :math:`\mathbf{T}` to the feature matrix :math:`\mathbf{X}`
+
+    fit_policy_: dict
+        The solver selected at fit time, as in :class:`KPCovR`.
+
+    X_fit_: ndarray of shape (n_active, n_features)
+        The active set, from which kernels with new data are built.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from skcosmo.decomposition import SparseKPCovR
+    >>> X = np.random.uniform(-1, 1, (200, 4))
+    >>> Y = np.sin(X @ np.array([1.0, -2.0, 0.0, 0.5]))
+    >>> kpcovr = SparseKPCovR(mixing=0.5, n_components=2, n_active=50, kernel="rbf")
+    >>> kpcovr = kpcovr.fit(X, Y)
+    >>> T, Yp = kpcovr.transform_predict(X)
+    """
+
+    def __init__(
+        self,
+        mixing=0.0,
+        n_components=None,
+        n_active=None,
+        svd_solver="auto",
+        kernel="linear",
+        gamma=None,
+        degree=3,
+        coef0=1,
+        alpha=1e-6,
+        kernel_params=None,
+        center=False,
+        fit_inverse_transform=False,
+        tol=1e-12,
+        n_jobs=None,
+        iterated_power="auto",
+        random_state=None,
+    ):
+        super().__init__(
+            mixing=mixing,
+            n_components=n_components,
+            svd_solver=svd_solver,
+            kernel=kernel,
+            gamma=gamma,
+            degree=degree,
+            coef0=coef0,
+            alpha=alpha,
+            kernel_params=kernel_params,
+            center=center,
+            fit_inverse_transform=fit_inverse_transform,
+            tol=tol,
+            n_jobs=n_jobs,
+            iterated_power=iterated_power,
+            random_state=random_state,
+        )
+        self.n_active = n_active
+
+    def fit(self, X, Y, Yhat=None, W=None, *, X_active=None):
+        """
+
+        Fit the model with X and Y, from the kernels between X and the active
+        set.
+
+        Parameters
+        ----------
+        X: array-like, shape (n_samples, n_features)
+            Training data, where n_samples is the number of samples and
+            n_features is the number of features.
+
+        Y: array-like, shape (n_samples, n_properties)
+            Training data, where n_samples is the number of samples and
+            n_properties is the number of properties
+
+        Yhat: array-like, shape (n_samples, n_properties), optional
+            Regressed training data. If not supplied, computed by least
+            squares regression on the approximated kernel.
+
+        W: array-like, shape (n_active, n_properties), optional
+            Weights of the regression of Y on the (centered) kernel between
+            the training points and the active set, from which Yhat is
+            computed if it is not supplied.
+
+        X_active: array-like, shape (n_active, n_features), optional
+            Active set of the Nyström approximation. If not supplied,
+            `n_active` samples of X are selected by farthest point sampling.
+
+        Returns
+        -------
+        self: object
+            Returns the instance itself.
+
+        """
+
+        if self.kernel == "precomputed":
+            raise ValueError("SparseKPCovR does not support precomputed kernels.")
+
+        X, Y = check_X_y(X, Y, y_numeric=True, multi_output=True)
+
+        Knm, Phi, pkf, build_cost = self._nystrom_features(
+            X, self._active_set(X, X_active)
+        )
+
+        if Yhat is None and W is not None:
+            Yhat = Knm @ W
+
+        return self._fit_nystrom(X, Y, Phi, pkf, Yhat, build_cost)
+
+    def fit_path(self, X, Y, gammas=None, mixings=None, *, X_active=None):
+        r"""
+
+        Fit one model for each value of the kernel coefficient in `gammas`,
+        or for each value in `mixings`, as :meth:`KPCovR.fit_path`.
+
+        All models share the same active set, which is selected once when it
+        is not supplied. Along `mixings`, the kernels with the active set and
+        the Nyström features do not depend on the mixing parameter and are
+        also shared, such that only the fit on the features is repeated for
+        each mixing.
+
+        Parameters
+        ----------
+        X: array-like, shape (n_samples, n_features)
+            Training data, where n_samples is the number of samples and
+            n_features is the number of features.
+
+        Y: array-like, shape (n_samples, n_properties)
+            Training data, where n_samples is the number of samples and
+            n_properties is the number of properties
+
+        gammas: array-like of shape (n_gammas,), default=None
+            kernel coefficients for which to fit a model.
+
+        mixings: array-like of shape (n_mixings,), default=None
+            mixing parameters for which to fit a model. Exactly one of
+            `gammas` and `mixings` must be given.
+
+        X_active: array-like, shape (n_active, n_features), optional
+            Active set of the Nyström approximation, as in `fit`.
+
+        Returns
+        -------
+        models: list of SparseKPCovR
+            Fitted copies of this estimator, one for each gamma or mixing.
+
+        losses: ndarray of shape (n_gammas,) or (n_mixings,)
+            The loss `score(X, Y)` of each model on the training data.
+
+        """
+
+        if (gammas is None) == (mixings is None):
+            raise ValueError("Exactly one of gammas and mixings must be given.")
+
+        if self.kernel == "precomputed":
+            raise ValueError("SparseKPCovR does not support precomputed kernels.")
+
+        X, Y = check_X_y(X, Y, y_numeric=True, multi_output=True)
+        X_active = self._active_set(X, X_active)
+
+        models = []
+        if gammas is not None:
+            for gamma in gammas:
+                model = clone(self).set_params(gamma=gamma)
+                models.append(model.fit(X, Y, X_active=X_active))
+        else:
+            shared = clone(self)
+            _, Phi, pkf, build_cost = shared._nystrom_features(X, X_active)
+
+            for mixing in mixings:
+                model = clone(self).set_params(mixing=mixing)
+                model.X_fit_ = shared.X_fit_
+                model.n_samples = shared.n_samples
+                if self.center:
+                    model.centerer_ = shared.centerer_
+                models.append(model._fit_nystrom(X, Y, Phi, pkf, None, build_cost))
+
+        losses = np.array([model.score(X, Y) for model in models])
+        return models, losses
+
+    def _active_set(self, X, X_active=None):
+        """
+        Returns the active set, selected from X by farthest point sampling if
+        it is not supplied
+        """
+
+        if X_active is not None:
+            return check_array(X_active)
+
+        if self.n_active is None:
+            raise ValueError(
+                "Either an active set or n_active must be given to fit SparseKPCovR."
+            )
+        selector = FPS(n_samples_to_select=self.n_active).fit(X)
+        return X[selector.selected_idx_]
+
+    def _nystrom_features(self, X, X_active):
+        """
+        Sets the active set and the centerer, and returns the (centered)
+        kernel between X and the active set, the Nyström features of X, their
+        projector from this kernel and the cost of building them
+        """
+
+        self.X_fit_ = X_active.copy()
+        self.n_samples = X.shape[0]
+
+        Knm = self._get_kernel(X, self.X_fit_)
+        Kmm = self._get_kernel(self.X_fit_)
+
+        if self.center:
+            self.centerer_ = SparseKernelCenterer()
+            Knm = self.centerer_.fit_transform(Knm, Kmm)
+
+        # Nystrom features, from the eigendecomposition of the active kernel
+        vmm, Umm = linalg.eigh(Kmm)
+        keep = vmm > self.tol * vmm[-1]
+        pkf = Umm[:, keep] / np.sqrt(vmm[keep])
+        Phi = Knm @ pkf
+
+        n, m = Knm.shape
+        build_cost = dict(
+            gemm=2.0 * n * m * (X.shape[1] + Phi.shape[1]),
+            decomposition=9.0 * m ** 3,
+            memory=2.0 * n * m,
+        )
+        return Knm, Phi, pkf, build_cost
+
+    def _fit_nystrom(self, X, Y, Phi, pkf, Yhat=None, build_cost=None):
+        """
+        Fit the model on the Nyström features Phi of X, with projector pkf
+        from the kernel with the active set
+        """
+
+        pft, self._ptf = self._fit_features(X, Y, Phi, Yhat, build_cost)
+
+        self.pkt_ = pkf @ pft
+        self._pkf = pkf
+
+        self.pky_ = self.pkt_ @ self.pty_
+
+        self.components_ = self.pkt_.T  # for sklearn compatibility
+        return self
+
+    def score(self, X, Y):
+        r"""
+        Computes the loss values for SparseKPCovR on the given predictor and
+        response variables. The kernel loss is the error in the reconstruction
+        of the Nyström features :math:`\mathbf{\Phi}_V` of the validation set
+        from its projection, relative to their norm, i.e. the trace of the
+        kernel loss of :class:`KPCovR` computed on the approximated kernel.
+        As in :class:`KPCovR`, the kernels are computed in blocks of rows.
+
+        Arguments
+        ---------
+        X:              independent (predictor) variable
+        Y:              dependent (response) variable
+
+        Returns
+        -------
+        L:             sum of the kernel and regression losses
+
+        """
+
+        return self._score_features(X, Y)
@@ -179,7 +179,7 @@ class KernelNormalizer(KernelCenterer):
         :return: fitted transformer
         """
 
-        Kc = self._validate_data(K, copy=True, dtype=FLOAT_DTYPES, reset=False)
+        K = self._validate_data(K, dtype=FLOAT_DTYPES, reset=False)
 
         if sample_weight is not None:
             self.sample_weight_ = _check_sample_weight(sample_weight, K, dtype=K.dtype)
@@ -196,21 +196,23 @@ class KernelNormalizer(KernelCenterer):
             else:
                 super().fit(K, y)
 
-            K_pred_cols = np.average(Kc, weights=self.sample_weight_, axis=1)[
-                :, np.newaxis
-            ]
+            K_pred_cols = np.average(K, weights=self.sample_weight_, axis=1)
         else:
-            self.K_fit_rows_ = np.zeros(Kc.shape[1])
+            self.K_fit_rows_ = np.zeros(K.shape[1])
             self.K_fit_all_ = 0.0
-            K_pred_cols = np.zeros((Kc.shape[0], 1))
+            K_pred_cols = np.zeros(K.shape[0])
 
         if self.with_trace:
-
-            Kc -= self.K_fit_rows_
-            Kc -= K_pred_cols
-            Kc += self.K_fit_all_
-
-            self.scale_ = np.trace(Kc) / Kc.shape[0]
+            # trace of the centered kernel, from its diagonal and the means,
+            # so that K is not copied (e.g. when it is memory-mapped)
+            d = min(K.shape)
+            trace = (
+                np.trace(K)
+                - np.sum(self.K_fit_rows_[:d])
+                - np.sum(K_pred_cols[:d])
+                + d * self.K_fit_all_
+            )
+            self.scale_ = trace / K.shape[0]
         else:
             self.scale_ = 1.0
 
@@ -246,7 +248,8 @@ class KernelNormalizer(KernelCenterer):
         K -= K_pred_cols
         K += self.K_fit_all_
 
-        return K / self.scale_
+        K /= self.scale_
+        return K
 
     def fit_transform(self, K, y=None, sample_weight=None, copy=True, **fit_params):
         r"""Fit to data, then transform it.
@@ -330,9 +333,12 @@ class SparseKernelCenterer(TransformerMixin, BaseEstimator):
         if self.with_trace:
             Knm_centered = Knm - self.K_fit_rows_
 
-            Khat = Knm_centered @ np.linalg.pinv(Kmm, self.rcond) @ Knm_centered.T
+            # trace of the Nystrom-approximated kernel, without forming it
+            Khat_trace = np.sum(
+                (Knm_centered @ np.linalg.pinv(Kmm, self.rcond)) * Knm_centered
+            )
 
-            self.scale_ = np.sqrt(np.trace(Khat) / Knm.shape[0])
+            self.scale_ = np.sqrt(Khat_trace / Knm.shape[0])
         else:
             self.scale_ = 1.0
 
@@ -4,7 +4,9 @@ used by multiple packages
 """
 
 from .progress_bar import get_progress_bar
-from .pcovr_utils import pcovr_covariance, pcovr_kernel
+from .blocks import apply_blockwise
+from .cost_model import calibrate_cost_model
+from .pcovr_utils import pcovr_covariance, pcovr_kernel, pcovr_kernel_operator
 from .orthogonalizers import (
     X_orthogonalizer,
     Y_sample_orthogonalizer,
@@ -13,8 +15,11 @@ from .orthogonalizers import (
 
 __all__ = [
     "get_progress_bar",
+    "apply_blockwise",
+    "calibrate_cost_model",
     "pcovr_covariance",
     "pcovr_kernel",
+    "pcovr_kernel_operator",
     "X_orthogonalizer",
     "Y_sample_orthogonalizer",
     "Y_feature_orthogonalizer",
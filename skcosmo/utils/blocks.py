@@ -0,0 +1,69 @@
+import numpy as np
+
+from sklearn.utils import gen_batches, get_chunk_n_rows, _safe_indexing
+from sklearn.utils.validation import _num_samples
+
+
+def apply_blockwise(
+    func, X, out=None, batch_size=None, row_bytes=None, working_memory=None
+):
+    r"""
+    Applies a row-wise function to an array in blocks of rows, writing the
+    result of each block into a single output array.
+
+    Only one block of `X` is held in memory at a time, so that `X` and `out`
+    may be `np.memmap` arrays larger than the available memory.
+
+    :param func: function mapping a block of rows of `X` to the corresponding
+                 rows of the result
+    :type func: callable
+
+    :param X: input array, sliced along its first axis
+    :type X: array of shape (n x ...)
+
+    :param out: array in which to store the result, allocated with the shape
+                and dtype returned by `func` if None
+    :type out: array of shape (n x ...), defaults to None
+
+    :param batch_size: number of rows in each block. If None, determined from
+                       `row_bytes` and `working_memory`
+    :type batch_size: int, defaults to None
+
+    :param row_bytes: estimate of the memory used by `func` for each row, in
+                      bytes. Defaults to the size of a float64 row of `X`
+    :type row_bytes: int, defaults to None
+
+    :param working_memory: memory available for each block, in MiB. If None,
+                           the value of `sklearn.get_config()['working_memory']`
+    :type working_memory: int, defaults to None
+
+    :return: `out`, filled with the result of `func` on all rows of `X`
+    """
+
+    n_samples = _num_samples(X)
+
+    if out is not None and out.shape[0] != n_samples:
+        raise ValueError(
+            "out has {} rows, but the input has {} rows.".format(
+                out.shape[0], n_samples
+            )
+        )
+
+    if batch_size is None:
+        if row_bytes is None:
+            row_bytes = 8 * int(np.prod(np.shape(X)[1:]))
+        batch_size = get_chunk_n_rows(
+            row_bytes=max(row_bytes, 1),
+            max_n_rows=n_samples,
+            working_memory=working_memory,
+        )
+
+    for batch in gen_batches(n_samples, max(batch_size, 1)):
+        result = func(_safe_indexing(X, batch))
+
+        if out is None:
+            out = np.empty((n_samples,) + result.shape[1:], dtype=result.dtype)
+
+        out[batch] = result
+
+    return out
@@ -0,0 +1,257 @@
+import os
+import time
+
+import numpy as np
+from scipy import linalg
+
+# rates, in flops per second, of a typical multi-core machine, which are
+# used unless `calibrate_cost_model` is called, such that the 'auto' policy
+# does not depend on the timings of a particular run
+_DEFAULT_COST_CONSTANTS = {"gemm": 5e10, "gemv": 5e9, "decomposition": 1e10}
+
+_COST_CONSTANTS = None
+
+# fixed cost of calling each solver, in seconds, which dominates for small
+# matrices: LAPACK is a single call, the iterative solvers loop in Python
+_SOLVER_OVERHEADS = {
+    "full": 5e-5,
+    "eigh": 5e-5,
+    "randomized": 1e-3,
+    "arpack": 2e-3,
+    "eigsh": 2e-3,
+    "lobpcg": 5e-3,
+    "adaptive": 2e-3,
+}
+
+
+def _best_time(func, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return max(min(times), 1e-9)
+
+
+def calibrate_cost_model(size=384, repeats=3):
+    r"""
+    Times the local BLAS and LAPACK on random matrices, and caches the
+    resulting rates for the cost model used by the `'auto'` selection of the
+    space and solver of PCovR and KPCovR, in place of the default rates.
+
+    The rates are stored for the lifetime of the process, and calling this
+    function again replaces them. As they vary from one run to the next, the
+    fits with an `'auto'` space or solver are then no longer reproducible
+    across runs.
+
+    :param size: size of the square matrices used for the timings
+    :type size: int, defaults to 384
+
+    :param repeats: number of timings of each operation, of which the fastest
+                    is kept
+    :type repeats: int, defaults to 3
+
+    :return: dictionary with the rates, in flops per second, of matrix-matrix
+             products (`'gemm'`), matrix-vector products (`'gemv'`) and dense
+             decompositions (`'decomposition'`)
+    """
+
+    global _COST_CONSTANTS
+
+    random_state = np.random.RandomState(0)
+    A = random_state.uniform(-1, 1, (size, size))
+    S = A @ A.T
+    v = random_state.uniform(-1, 1, size)
+
+    def matvecs():
+        for _ in range(10):
+            S @ v
+
+    def eigh():
+        linalg.eigh(S)
+
+    _COST_CONSTANTS = {
+        "gemm": 2.0 * size ** 3 / _best_time(lambda: A @ A, repeats),
+        "gemv": 20.0 * size ** 2 / _best_time(matvecs, repeats),
+        "decomposition": 9.0 * size ** 3 / _best_time(eigh, repeats),
+    }
+
+    return dict(_COST_CONSTANTS)
+
+
+def get_cost_constants():
+    """
+    Returns the rates of the cost model: those measured by the last call to
+    :func:`calibrate_cost_model`, or fixed default rates if it was never
+    called.
+
+    :return: dictionary with the rates, in flops per second, of `'gemm'`,
+             `'gemv'` and `'decomposition'`
+    """
+
+    if _COST_CONSTANTS is None:
+        return dict(_DEFAULT_COST_CONSTANTS)
+    return dict(_COST_CONSTANTS)
+
+
+def available_memory():
+    """
+    Returns the physical memory of the machine, in bytes, or None when it
+    cannot be determined on this platform. Unlike the memory currently free,
+    it does not change from one run to the next.
+    """
+
+    try:
+        return os.sysconf("SC_PHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def decomposition_cost(
+    svd_solver, size, n_components, iterated_power="auto", matvec_flops=None
+):
+    r"""
+    Estimates the floating-point operations and the peak memory of the
+    truncated decomposition of a symmetric matrix by a given solver.
+
+    The estimates are the leading terms of textbook operation counts, and
+    are only meant to rank solvers against each other.
+
+    :param svd_solver: solver, as in PCovR
+    :type svd_solver: str
+
+    :param size: number of rows of the decomposed square matrix
+    :type size: int
+
+    :param n_components: number of computed components
+    :type n_components: int
+
+    :param iterated_power: number of power iterations of the randomized
+                           solver, as in PCovR
+    :type iterated_power: int or 'auto', defaults to 'auto'
+
+    :param matvec_flops: operations of a product of the matrix with a vector,
+                         when the matrix is only available as an operator.
+                         If None, the matrix is held explicitly
+    :type matvec_flops: int, defaults to None
+
+    :return: dictionary of the operations done as matrix-matrix products
+             (`'gemm'`), matrix-vector products (`'gemv'`) and dense
+             decompositions (`'decomposition'`), and of the peak memory in
+             number of matrix entries (`'memory'`)
+    """
+
+    m, k = size, min(n_components, size)
+    explicit = matvec_flops is None
+    if explicit:
+        matvec_flops = 2.0 * m ** 2
+
+    cost = {"gemm": 0.0, "gemv": 0.0, "decomposition": 0.0, "memory": 0.0}
+
+    if svd_solver == "full":
+        cost["decomposition"] = 22.0 * m ** 3
+        cost["memory"] = 4.0 * m ** 2
+    elif svd_solver == "eigh":
+        if k < m:
+            cost["decomposition"] = 4.0 / 3.0 * m ** 3 + 2.0 * m ** 2 * k
+            cost["memory"] = 2.0 * m ** 2 + m * k
+        else:
+            cost["decomposition"] = 9.0 * m ** 3
+            cost["memory"] = 3.0 * m ** 2
+    elif svd_solver == "randomized":
+        n_random = min(k + 10, m)
+        if iterated_power == "auto":
+            iterated_power = 7 if k < 0.1 * m else 4
+        n_products = 2 * iterated_power + 2
+        cost["gemm"] = matvec_flops * n_random * n_products
+        cost["decomposition"] = (
+            4.0 * m * n_random ** 2 * (iterated_power + 2) + 22.0 * n_random ** 3
+        )
+        cost["memory"] = 4.0 * m * n_random
+    elif svd_solver in ["arpack", "eigsh", "lobpcg"]:
+        n_lanczos = min(max(2 * k + 1, 20), m)
+        n_matvec = 10 * n_lanczos
+        cost["gemv"] = matvec_flops * n_matvec
+        cost["decomposition"] = 4.0 * m * n_lanczos * n_matvec
+        cost["memory"] = 2.0 * m * n_lanczos
+    elif svd_solver == "adaptive":
+        # the adaptive solver doubles its rank from 16, and a modest target
+        # is typically met after two rounds
+        for rank in [16, 32]:
+            partial = decomposition_cost(
+                "randomized",
+                m,
+                rank,
+                iterated_power,
+                matvec_flops=None if explicit else matvec_flops,
+            )
+            for key in ["gemm", "gemv", "decomposition"]:
+                cost[key] += partial[key]
+            cost["memory"] = max(cost["memory"], partial["memory"])
+        return cost
+    else:
+        raise ValueError("Unrecognized svd_solver='{0}'".format(svd_solver))
+
+    if explicit:
+        cost["memory"] += m ** 2
+
+    return cost
+
+
+def estimate_seconds(cost, svd_solver=None, constants=None):
+    """
+    Converts operation counts into an estimate of the run time.
+
+    :param cost: operation counts, as returned by :func:`decomposition_cost`
+    :type cost: dict
+
+    :param svd_solver: solver, whose fixed overhead is added to the estimate
+    :type svd_solver: str, defaults to None
+
+    :param constants: rates to use, as returned by
+                      :func:`calibrate_cost_model`. If None, the cached rates
+    :type constants: dict, defaults to None
+
+    :return: estimated run time, in seconds
+    """
+
+    if constants is None:
+        constants = get_cost_constants()
+
+    return sum(
+        cost.get(key, 0.0) / constants[key] for key in ["gemm", "gemv", "decomposition"]
+    ) + _SOLVER_OVERHEADS.get(svd_solver, 0.0)
+
+
+def select_fit_policy(candidates, itemsize=8):
+    """
+    Chooses the fastest candidate whose estimated peak memory fits in the
+    available memory, or the one with the smallest memory if none fits.
+
+    :param candidates: candidates, each a dictionary with the operation
+                       counts of :func:`decomposition_cost`, which are
+                       completed in place with their `'seconds'` and their
+                       memory in `'bytes'`
+    :type candidates: list of dict
+
+    :param itemsize: size in bytes of each matrix entry, that is the
+                     `itemsize` of the dtype of the data
+    :type itemsize: int, defaults to 8
+
+    :return: the selected candidate, the available memory in bytes and the
+             rates of the cost model
+    """
+
+    constants = get_cost_constants()
+    memory = available_memory()
+
+    for candidate in candidates:
+        candidate["seconds"] = estimate_seconds(
+            candidate, candidate.get("svd_solver"), constants
+        )
+        candidate["bytes"] = int(candidate["memory"] * itemsize)
+
+    fitting = [c for c in candidates if memory is None or c["bytes"] <= memory]
+    if fitting:
+        return min(fitting, key=lambda c: c["seconds"]), memory, constants
+    return min(candidates, key=lambda c: c["bytes"]), memory, constants
@@ -1,7 +1,11 @@
 import numpy as np
 
 from scipy import linalg
-from sklearn.utils.extmath import randomized_svd
+from scipy.sparse.linalg import svds, eigsh, lobpcg, LinearOperator
+from sklearn.utils import check_random_state
+from sklearn.utils.extmath import randomized_svd, safe_sparse_dot, svd_flip
+from sklearn.utils.extmath import stable_cumsum
+from sklearn.utils._arpack import _init_arpack_v0
 from sklearn.metrics.pairwise import pairwise_kernels
 
 
@@ -56,7 +60,9 @@ def pcovr_covariance(
 
     """
 
-    C = np.zeros((X.shape[1], X.shape[1]), dtype=np.float64)
+    # Y is None for mixing == 1
+    dtype = np.result_type(X.dtype, getattr(Y, "dtype", X.dtype), np.float32)
+    C = np.zeros((X.shape[1], X.shape[1]), dtype=dtype)
 
     if mixing < 1 or return_isqrt:
 
@@ -127,15 +133,252 @@ def pcovr_kernel(mixing, X, Y, **kernel_params):
 
     """
 
-    K = np.zeros((X.shape[0], X.shape[0]))
+    # Y is None for mixing == 1
+    dtype = np.result_type(X.dtype, getattr(Y, "dtype", X.dtype), np.float32)
+    K = np.zeros((X.shape[0], X.shape[0]), dtype=dtype)
     if mixing < 1:
         K += (1 - mixing) * Y @ Y.T
     if mixing > 0:
         if "kernel" not in kernel_params:
-            K += (mixing) * X @ X.T
+            K += (mixing) * safe_sparse_dot(X, X.T, dense_output=True)
         elif kernel_params.get("kernel") != "precomputed":
             K += (mixing) * pairwise_kernels(X, **kernel_params)
         else:
             K += (mixing) * X
 
     return K
+
+
+def pcovr_kernel_operator(mixing, X, Y):
+    r"""
+    Creates the PCovR modified kernel distances for the linear kernel
+
+    .. math::
+
+        \mathbf{\tilde{K}} = \alpha \mathbf{X} \mathbf{X}^T +
+        (1 - \alpha) \mathbf{Y}\mathbf{Y}^T
+
+    as a `scipy.sparse.linalg.LinearOperator`, whose products are computed from
+    :math:`\mathbf{X}` and :math:`\mathbf{Y}` without ever forming the
+    :math:`n \times n` matrix. Each product with a vector then costs
+    :math:`\mathcal{O}(n (m + p))` time and memory, which makes the operator
+    suitable for iterative eigensolvers on large numbers of samples.
+
+    :param mixing: mixing parameter,
+                   as described in PCovR as :math:`{\alpha}`, defaults to 1
+    :type mixing: float
+
+    :param X: Data matrix :math:`\mathbf{X}`
+    :type X: array of shape (n x m)
+
+    :param Y: array to include in biased selection when mixing < 1
+    :type Y: array of shape (n x p)
+
+    """
+
+    Y = Y.reshape(X.shape[0], -1)
+
+    def _matmat(V):
+        KV = np.zeros(
+            (X.shape[0], V.shape[1]), dtype=np.result_type(X.dtype, Y.dtype, V.dtype)
+        )
+        if mixing < 1:
+            KV += (1 - mixing) * Y @ (Y.T @ V)
+        if mixing > 0:
+            KV += (mixing) * safe_sparse_dot(X, X.T @ V, dense_output=True)
+        return KV
+
+    def _matvec(v):
+        return _matmat(v.reshape(-1, 1)).ravel()
+
+    # the operator is symmetric, so the adjoint products are the same
+    return LinearOperator(
+        (X.shape[0], X.shape[0]),
+        matvec=_matvec,
+        rmatvec=_matvec,
+        matmat=_matmat,
+        rmatmat=_matmat,
+        dtype=np.result_type(X.dtype, Y.dtype),
+    )
+
+
+def _decompose_symmetric(
+    mat,
+    n_components,
+    svd_solver,
+    tol=0.0,
+    random_state=None,
+    iterated_power="auto",
+    init=None,
+    overwrite_a=False,
+):
+    r"""
+    Decomposes the symmetric positive semi-definite matrix `mat`, of which
+    the modified covariances and kernels of PCovR and KPCovR are instances,
+    with one of the solvers shared by both estimators, and returns
+    :math:`\mathbf{U}`, :math:`\mathbf{S}` and :math:`\mathbf{V}^T` in
+    decreasing order of the singular values, with the signs of the singular
+    vectors flipped for deterministic output.
+
+    :param mat: matrix to decompose, which may be a `LinearOperator` for the
+                iterative solvers
+    :type mat: array or LinearOperator of shape (n x n)
+
+    :param n_components: number of components to compute. If None, all
+                         components are computed, which is only supported
+                         by the 'full' and 'eigh' solvers
+    :type n_components: int or None
+
+    :param svd_solver: 'full' (`scipy.linalg.svd`), 'eigh'
+                       (`scipy.linalg.eigh`, restricted to the top
+                       n_components eigenpairs), 'arpack'
+                       (`scipy.sparse.linalg.svds`), 'eigsh'
+                       (`scipy.sparse.linalg.eigsh`), 'lobpcg'
+                       (`scipy.sparse.linalg.lobpcg`) or 'randomized'
+                       (`sklearn.utils.extmath.randomized_svd`)
+    :type svd_solver: str
+
+    :param tol: tolerance of 'arpack' and 'eigsh', defaults to 0
+    :type tol: float
+
+    :param random_state: seed of the starting vectors of the iterative
+                         solvers, defaults to None
+    :type random_state: int, RandomState instance or None
+
+    :param iterated_power: number of iterations of 'randomized', and of
+                           'lobpcg' (200 if 'auto'), defaults to 'auto'
+    :type iterated_power: int or 'auto'
+
+    :param init: approximate eigenvectors from which 'lobpcg' starts, random
+                 if None or of the wrong shape, defaults to None
+    :type init: array of shape (n x n_components)
+
+    :param overwrite_a: whether `mat` may be overwritten by the 'full' and
+                        'eigh' solvers, which then need no copy of it,
+                        defaults to False
+    :type overwrite_a: bool
+    """
+
+    random_state = check_random_state(random_state)
+
+    if svd_solver == "full":
+        U, S, Vt = linalg.svd(mat, full_matrices=False, overwrite_a=overwrite_a)
+        U, Vt = svd_flip(U, Vt)
+        return U[:, :n_components], S[:n_components], Vt[:n_components]
+
+    elif svd_solver == "eigh":
+        # eigh returns the eigenpairs in ascending order, such that those of
+        # -mat come in the descending order of those of mat, with eigenvectors
+        # that need no reversal (whose negative strides numpy's products
+        # would not pass to BLAS)
+        if overwrite_a:
+            mat *= -1.0
+        else:
+            mat = -mat
+        # only the top n_components eigenpairs are computed, if given
+        subset = None if n_components is None else [0, n_components - 1]
+        # as mat is symmetric, LAPACK can overwrite its transpose, which is
+        # Fortran-ordered when mat is C-ordered, rather than a copy of it
+        S, U = linalg.eigh(mat.T, overwrite_a=True, subset_by_index=subset)
+        S = np.abs(S)
+        # the signs of svd_flip, applied in place, such that Vt is a view of U
+        # rather than a copy of all eigenvectors
+        U *= np.sign(U[np.argmax(np.abs(U), axis=0), range(U.shape[1])])
+        Vt = U.T
+
+    elif svd_solver == "arpack":
+        v0 = _init_arpack_v0(min(mat.shape), random_state)
+        U, S, Vt = svds(mat, k=n_components, tol=tol, v0=v0)
+        # svds doesn't abide by scipy.linalg.svd/randomized_svd
+        # conventions, so reverse its outputs.
+        S = S[::-1]
+        U, Vt = svd_flip(U[:, ::-1], Vt[::-1])
+
+    elif svd_solver == "eigsh":
+        v0 = _init_arpack_v0(mat.shape[0], random_state)
+        S, U = eigsh(mat, k=n_components, which="LA", tol=tol, v0=v0)
+        # eigsh returns the eigenpairs in ascending order
+        S, U = np.abs(S[::-1]), U[:, ::-1]
+        U, Vt = svd_flip(U, U.T.copy())
+
+    elif svd_solver == "lobpcg":
+        if init is None or init.shape != (mat.shape[0], n_components):
+            init = random_state.normal(size=(mat.shape[0], n_components))
+        S, U = lobpcg(
+            mat,
+            init,
+            largest=True,
+            maxiter=200 if iterated_power == "auto" else iterated_power,
+        )
+        order = np.argsort(S)[::-1]
+        S, U = np.abs(S[order]), U[:, order]
+        U, Vt = svd_flip(U, U.T.copy())
+
+    elif svd_solver == "randomized":
+        # sign flipping is done inside
+        U, S, Vt = randomized_svd(
+            mat,
+            n_components=n_components,
+            n_iter=iterated_power,
+            flip_sign=True,
+            random_state=random_state,
+        )
+
+    else:
+        raise ValueError("Unrecognized svd_solver='{0}'".format(svd_solver))
+
+    return U, S, Vt
+
+
+def _decompose_adaptive_rank(
+    mat, variance_ratio, random_state=None, iterated_power="auto"
+):
+    r"""
+    Decomposes `mat` with randomized SVDs of doubling rank until the leading
+    components explain the fraction `variance_ratio` of its variance. As the
+    singular values of `mat` sum in square to its squared Frobenius norm, the
+    explained variance ratios are known without the full decomposition.
+
+    :param mat: matrix to decompose
+    :type mat: array of shape (n x m)
+
+    :param variance_ratio: fraction of the variance to explain
+    :type variance_ratio: float between 0 and 1
+
+    :param random_state: seed of `randomized_svd`, defaults to None
+    :type random_state: int, RandomState instance or None
+
+    :param iterated_power: number of power iterations of `randomized_svd`,
+                           defaults to 'auto'
+    :type iterated_power: int or 'auto'
+
+    :return: `U`, `S` and `Vt`, truncated to the smallest number of components
+             which explain `variance_ratio`, or None once the rank exceeds half
+             the size of `mat`, at which point the full decomposition is
+             cheaper
+    """
+
+    random_state = check_random_state(random_state)
+    total_var = np.linalg.norm(mat) ** 2
+
+    rank = 16
+    while 2 * rank < min(mat.shape):
+        U, S, Vt = randomized_svd(
+            mat,
+            n_components=rank,
+            n_iter=iterated_power,
+            flip_sign=True,
+            random_state=random_state,
+        )
+
+        ratio_cumsum = stable_cumsum(S ** 2) / total_var
+        if ratio_cumsum[-1] > variance_ratio:
+            # as for fractional n_components in PCA
+            n_components = int(
+                np.searchsorted(ratio_cumsum, variance_ratio, side="right") + 1
+            )
+            return U[:, :n_components], S[:n_components], Vt[:n_components]
+
+        rank *= 2
+
+    return None
@@ -1,11 +1,24 @@
+import os
+import tempfile
+import tracemalloc
 import unittest
-from skcosmo.decomposition import KPCovR, PCovR
+from skcosmo.decomposition import KPCovR, KPCovRInference, PCovR
 from sklearn.datasets import load_boston
 import numpy as np
-from sklearn import exceptions
+from sklearn import config_context, exceptions
 from sklearn.linear_model import RidgeCV
+from unittest import mock
 from sklearn.utils.validation import check_X_y
 from skcosmo.preprocessing import StandardFlexibleScaler as SFS
+from skcosmo.utils import cost_model
+
+PINNED_COST_CONSTANTS = {"gemm": 5e10, "gemv": 5e9, "decomposition": 1e10}
+
+
+def pinned_cost_model():
+    return mock.patch.multiple(
+        cost_model, _COST_CONSTANTS=PINNED_COST_CONSTANTS, available_memory=lambda: None
+    )
 
 
 class KPCovRBaseTest(unittest.TestCase):
@@ -28,7 +41,9 @@ class KPCovRBaseTest(unittest.TestCase):
         self.model = lambda mixing=0.5, **kwargs: KPCovR(mixing, alpha=1e-8, **kwargs)
 
     def setUp(self):
-        pass
+        patcher = pinned_cost_model()
+        patcher.start()
+        self.addCleanup(patcher.stop)
 
 
 class KPCovRErrorTest(KPCovRBaseTest):
@@ -146,6 +161,391 @@ class KPCovRInfrastructureTest(KPCovRBaseTest):
         self.assertTrue(check_X_y(self.X, T, multi_output=True))
         self.assertTrue(T.shape[-1] == n_components)
 
+    def test_transform_predict(self):
+        """
+        This test checks that `transform_predict` returns the same projection
+        and predicted properties as `transform` and `predict`.
+        """
+        for center in [False, True]:
+            with self.subTest(center=center):
+                kpcovr = self.model(n_components=2, kernel="rbf", center=center)
+                kpcovr.fit(self.X, self.Y)
+                T, Yp = kpcovr.transform_predict(self.X)
+
+                self.assertTrue(np.allclose(T, kpcovr.transform(self.X)))
+                self.assertTrue(np.allclose(Yp, kpcovr.predict(self.X)))
+
+    def test_blockwise(self):
+        """
+        This test checks that `transform`, `predict` and `score` give the same
+        results when the kernels are computed in small blocks of rows.
+        """
+        for center in [False, True]:
+            with self.subTest(center=center):
+                kpcovr = self.model(n_components=2, kernel="rbf", center=center)
+                kpcovr.fit(self.X, self.Y)
+
+                T = kpcovr.transform(self.X)
+                Yp = kpcovr.predict(self.X)
+                score = kpcovr.score(self.X, self.Y)
+
+                self.assertTrue(np.allclose(T, kpcovr.transform(self.X, batch_size=7)))
+                self.assertTrue(np.allclose(Yp, kpcovr.predict(self.X, batch_size=7)))
+
+                with config_context(working_memory=0.05):
+                    self.assertAlmostEqual(score, kpcovr.score(self.X, self.Y))
+                    # the validation set need not have the size of the training set
+                    self.assertTrue(np.isfinite(kpcovr.score(self.X[:50], self.Y[:50])))
+                    out = np.zeros_like(T)
+                    kpcovr.transform(self.X, out=out)
+                    self.assertTrue(np.allclose(T, out))
+
+    def test_cache(self):
+        """
+        This test checks that the cached quantities give the same
+        projections, predictions and scores as a fit without cache, that
+        the products of the kernel with the projections are only cached when
+        first needed, and that the cache does not exceed `cache_size`.
+        """
+        for center in [False, True]:
+            with self.subTest(center=center):
+                kpcovr = self.model(n_components=2, kernel="rbf", center=center)
+                kpcovr.fit(self.X, self.Y)
+                kpcovr_nocache = self.model(
+                    n_components=2, kernel="rbf", center=center, cache_size=0
+                )
+                kpcovr_nocache.fit(self.X, self.Y)
+
+                self.assertEqual(len(kpcovr_nocache._fit_cache), 0)
+                self.assertNotIn("KT_N", kpcovr._fit_cache)
+
+                for X, Y in [(self.X, self.Y), (self.X[:50], self.Y[:50])]:
+                    self.assertTrue(
+                        np.allclose(
+                            kpcovr.transform(X),
+                            kpcovr_nocache.transform(X),
+                            atol=self.error_tol,
+                        )
+                    )
+                    self.assertTrue(
+                        np.allclose(
+                            kpcovr.predict(X),
+                            kpcovr_nocache.predict(X),
+                            atol=self.error_tol,
+                        )
+                    )
+                    self.assertAlmostEqual(
+                        kpcovr.score(X, Y), kpcovr_nocache.score(X, Y)
+                    )
+                self.assertIn("KT_N", kpcovr._fit_cache)
+
+        # room for a single projection of the training points
+        cache_size = 1.5 * self.X.shape[0] * 2 * 8 / 2 ** 20
+        kpcovr = self.model(n_components=2, kernel="rbf", cache_size=cache_size)
+        kpcovr.fit(self.X, self.Y)
+        self.assertLessEqual(
+            sum(np.asarray(v).nbytes for v in kpcovr._fit_cache.values()),
+            cache_size * 2 ** 20,
+        )
+        self.assertIn("T_N", kpcovr._fit_cache)
+
+    def test_fit_memory(self):
+        """
+        This test checks that fitting a few components with the exact solver
+        allocates less than three kernels at once: the kernel, overwritten by
+        its eigenvectors, and the modified kernel in this eigenbasis, which is
+        decomposed in place.
+        """
+        kernel_bytes = self.X.shape[0] ** 2 * 8
+        for center in [False, True]:
+            with self.subTest(center=center):
+                kpcovr = self.model(
+                    n_components=2, kernel="rbf", center=center, svd_solver="full"
+                )
+                tracemalloc.start()
+                try:
+                    kpcovr.fit(self.X, self.Y)
+                    peak = tracemalloc.get_traced_memory()[1]
+                finally:
+                    tracemalloc.stop()
+
+                self.assertLess(peak, 3 * kernel_bytes)
+
+    def test_fit_path(self):
+        """
+        This test checks that `fit_path` over gammas gives the models and
+        losses of separate fits, and requires a distance-based kernel.
+        """
+        gammas = [0.1, 1.0, None]
+        for kernel in ["rbf", "laplacian"]:
+            with self.subTest(kernel=kernel):
+                kwargs = dict(n_components=2, kernel=kernel, svd_solver="full")
+                models, losses = self.model(**kwargs).fit_path(self.X, self.Y, gammas)
+
+                self.assertEqual(len(models), len(gammas))
+                for gamma, model, loss in zip(gammas, models, losses):
+                    kpcovr = self.model(gamma=gamma, **kwargs).fit(self.X, self.Y)
+                    self.assertEqual(model.gamma, gamma)
+                    self.assertTrue(
+                        np.allclose(
+                            model.transform(self.X),
+                            kpcovr.transform(self.X),
+                            atol=self.error_tol,
+                        )
+                    )
+                    self.assertAlmostEqual(loss, kpcovr.score(self.X, self.Y))
+
+        with self.assertRaises(ValueError):
+            self.model(kernel="linear").fit_path(self.X, self.Y, gammas)
+
+    def test_fit_path_mixings(self):
+        """
+        This test checks that `fit_path` over mixings gives the models and
+        losses of separate fits, including with warm-started 'lobpcg', and
+        that exactly one of gammas and mixings is accepted.
+        """
+        mixings = [0.1, 0.5, 0.9]
+        for svd_solver in ["full", "lobpcg"]:
+            atol = self.error_tol if svd_solver == "full" else 1e-3
+            for center in [False, True]:
+                with self.subTest(svd_solver=svd_solver, center=center):
+                    kwargs = dict(
+                        n_components=2,
+                        kernel="rbf",
+                        center=center,
+                        svd_solver=svd_solver,
+                        random_state=0,
+                    )
+                    models, losses = self.model(**kwargs).fit_path(
+                        self.X, self.Y, mixings=mixings
+                    )
+
+                    self.assertEqual(len(models), len(mixings))
+                    for mixing, model, loss in zip(mixings, models, losses):
+                        kpcovr = self.model(mixing=mixing, **kwargs)
+                        kpcovr.fit(self.X, self.Y)
+                        self.assertEqual(model.mixing, mixing)
+                        self.assertTrue(
+                            np.allclose(
+                                model.transform(self.X),
+                                kpcovr.transform(self.X),
+                                atol=atol,
+                            )
+                        )
+                        self.assertAlmostEqual(
+                            loss, kpcovr.score(self.X, self.Y), places=5
+                        )
+
+        with self.assertRaises(ValueError):
+            self.model(kernel="rbf").fit_path(self.X, self.Y)
+        with self.assertRaises(ValueError):
+            self.model(kernel="rbf").fit_path(
+                self.X, self.Y, gammas=[0.1], mixings=mixings
+            )
+
+    def test_precomputed(self):
+        """
+        This test checks that a precomputed kernel gives the model of the
+        kernel it was computed with, and is not modified by `fit`.
+        """
+        for center in [False, True]:
+            with self.subTest(center=center):
+                kwargs = dict(n_components=2, center=center, svd_solver="full")
+                kpcovr = self.model(kernel="rbf", **kwargs).fit(self.X, self.Y)
+
+                K = kpcovr._get_kernel(self.X)
+                K_copy = K.copy()
+                precomputed = self.model(kernel="precomputed", **kwargs)
+                precomputed.fit(K, self.Y)
+
+                self.assertTrue(np.array_equal(K, K_copy))
+                self.assertTrue(
+                    np.allclose(
+                        precomputed.transform(K),
+                        kpcovr.transform(self.X),
+                        atol=self.error_tol,
+                    )
+                )
+                self.assertTrue(
+                    np.allclose(
+                        precomputed.pt__ @ precomputed.transform(K),
+                        np.eye(2),
+                        atol=self.error_tol,
+                    )
+                )
+
+    def test_precomputed_score(self):
+        """
+        This test checks that a precomputed kernel can only be scored on the
+        training set, as the kernel between the test points is not available,
+        including when there are more test points than training points.
+        """
+        kpcovr = self.model(kernel="rbf", n_components=2)
+        n_train = 100
+        K = kpcovr._get_kernel(self.X[:n_train])
+
+        precomputed = self.model(kernel="precomputed", n_components=2)
+        precomputed.fit(K, self.Y[:n_train])
+        kpcovr.fit(self.X[:n_train], self.Y[:n_train])
+        self.assertAlmostEqual(
+            precomputed.score(K, self.Y[:n_train]),
+            kpcovr.score(self.X[:n_train], self.Y[:n_train]),
+            places=6,
+        )
+
+        for X in [self.X[n_train : 2 * n_train], self.X[n_train:]]:
+            with self.subTest(n_test=len(X)):
+                K_test = kpcovr._get_kernel(X, self.X[:n_train])
+                with self.assertRaises(ValueError):
+                    precomputed.score(K_test, self.Y[: len(X)])
+
+    def test_fit_out_of_core(self):
+        """
+        This test checks that a memory-mapped precomputed kernel is fit out of
+        core, in blocks of rows and without being copied, and gives the model
+        of the in-memory kernel when the rank covers its numerical rank, while
+        `fit` on the memory map gives the exact model.
+        """
+        K = self.model(kernel="rbf", gamma=0.1)._get_kernel(self.X)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filename = os.path.join(tmpdir, "kernel.dat")
+            K_map = np.memmap(filename, dtype=K.dtype, mode="w+", shape=K.shape)
+            K_map[:] = K
+            K_map.flush()
+            K_map = np.memmap(filename, dtype=K.dtype, mode="r", shape=K.shape)
+
+            for center in [False, True]:
+                with self.subTest(center=center):
+                    kwargs = dict(n_components=2, kernel="precomputed", center=center)
+                    kpcovr = self.model(svd_solver="full", **kwargs).fit(K, self.Y)
+
+                    exact = self.model(svd_solver="full", **kwargs).fit(K_map, self.Y)
+                    self.assertTrue(
+                        np.allclose(exact.transform(K_map), kpcovr.transform(K))
+                    )
+
+                    with config_context(working_memory=1):
+                        ooc = self.model(random_state=0, **kwargs).fit_out_of_core(
+                            K_map, self.Y, rank=300
+                        )
+                        T = ooc.transform(K_map)
+
+                    self.assertTrue(np.shares_memory(ooc.X_fit_, K_map))
+                    self.assertTrue(
+                        np.allclose(T, kpcovr.transform(K), atol=self.error_tol)
+                    )
+                    self.assertTrue(
+                        np.allclose(
+                            ooc.predict(K_map),
+                            kpcovr.predict(K),
+                            atol=self.error_tol,
+                        )
+                    )
+                    self.assertAlmostEqual(
+                        ooc.score(K_map, self.Y),
+                        kpcovr.score(K, self.Y),
+                        places=6,
+                    )
+
+                    # the training kernel is recognized without being read
+                    with mock.patch("numpy.array_equal", side_effect=AssertionError):
+                        self.assertTrue(ooc._is_fit_data(K_map))
+
+            self.assertEqual(
+                self.model(kernel="precomputed", n_components=None)
+                .fit_out_of_core(K_map, self.Y, rank=10)
+                .pkt_.shape,
+                (K.shape[0], 10),
+            )
+
+            for kwargs, rank in [
+                (dict(n_components=20, kernel="precomputed"), 10),
+                (dict(n_components=2, kernel="precomputed"), 0),
+                (dict(n_components=2, kernel="precomputed"), 2.5),
+                (dict(n_components=2, kernel="rbf"), 10),
+            ]:
+                with self.subTest(**kwargs, rank=rank):
+                    with self.assertRaises(ValueError):
+                        self.model(**kwargs).fit_out_of_core(K_map, self.Y, rank=rank)
+
+            with self.assertRaises(ValueError):
+                self.model(kernel="precomputed").fit_out_of_core(K_map[:, :-1], self.Y)
+
+    def test_export_inference_model(self):
+        """
+        This test checks that the exported inference model is memory-mapped
+        when loaded, reproduces the model, and that its pruning error is
+        bounded by tol.
+        """
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filename = os.path.join(tmpdir, "kpcovr.npz")
+
+            for center in [False, True]:
+                kpcovr = KPCovR(
+                    mixing=0.5, n_components=2, kernel="rbf", alpha=1e-2, center=center
+                ).fit(self.X, self.Y)
+                T, Y = kpcovr.transform(self.X), kpcovr.predict(self.X)
+
+                for tol in [0.0, 0.1]:
+                    with self.subTest(center=center, tol=tol):
+                        kpcovr.export_inference_model(
+                            filename, tol=tol, dtype=np.float64
+                        )
+                        model = KPCovRInference.load(filename)
+
+                        self.assertIsInstance(model.pkt, np.memmap)
+                        self.assertTrue(
+                            np.array_equal(model.X_fit, self.X[model.support])
+                        )
+                        if tol == 0.0:
+                            self.assertEqual(len(model.support), len(self.X))
+                        else:
+                            self.assertLess(len(model.support), len(self.X))
+
+                        for pred, ref in [
+                            (model.transform(self.X), T),
+                            (model.predict(self.X), Y),
+                        ]:
+                            error = np.max(
+                                np.abs(pred - ref) / np.sqrt(np.mean(ref ** 2, axis=0))
+                            )
+                            self.assertLessEqual(error, tol + self.error_tol)
+
+            kpcovr.export_inference_model(filename)
+            model = KPCovRInference.load(filename, mmap_mode=None)
+            self.assertEqual(model.transform(self.X).dtype, np.float32)
+            self.assertTrue(np.allclose(model.transform(self.X), T, atol=1e-3))
+
+        precomputed = self.model(kernel="precomputed")
+        precomputed.fit(kpcovr._get_kernel(self.X), self.Y)
+        with self.assertRaises(ValueError):
+            precomputed.export_inference_model(filename)
+
+    def test_precomputed_nocache(self):
+        """
+        This test checks that a precomputed kernel is scored from the
+        diagonal of its rows when the training projections are not cached,
+        or have been evicted from the cache.
+        """
+        for center in [False, True]:
+            with self.subTest(center=center):
+                kwargs = dict(n_components=2, center=center, svd_solver="full")
+                kpcovr = self.model(kernel="rbf", **kwargs).fit(self.X, self.Y)
+                K = kpcovr._get_kernel(self.X)
+
+                nocache = self.model(kernel="precomputed", cache_size=0, **kwargs)
+                nocache.fit(K, self.Y)
+
+                evicted = self.model(kernel="precomputed", **kwargs).fit(K, self.Y)
+                evicted._fit_cache.clear()
+
+                for model in [nocache, evicted]:
+                    with config_context(working_memory=1):
+                        self.assertAlmostEqual(
+                            model.score(K, self.Y), kpcovr.score(self.X, self.Y)
+                        )
+
     def test_no_centerer(self):
         """
         tests that when center=False, no centerer exists
@@ -250,6 +650,60 @@ class KernelTests(KPCovRBaseTest):
             round(lk_ref, rounding),
         )
 
+    def test_kernel_approximation(self):
+        """
+        This test checks that KPCovR on random Fourier features approximates
+        KPCovR on the exact rbf kernel, without storing the training data.
+        """
+        for center in [False, True]:
+            with self.subTest(center=center):
+                kwargs = dict(
+                    n_components=2,
+                    kernel="rbf",
+                    gamma=0.1,
+                    center=center,
+                    svd_solver="full",
+                )
+                kpcovr = self.model(**kwargs).fit(self.X, self.Y)
+                rff = self.model(
+                    kernel_approximation="rff",
+                    n_components_approx=2000,
+                    random_state=0,
+                    **kwargs
+                ).fit(self.X, self.Y)
+
+                self.assertFalse(hasattr(rff, "X_fit_"))
+                self.assertEqual(rff.pkt_.shape, (2000, 2))
+
+                T, T_ref = rff.transform(self.X), kpcovr.transform(self.X)
+
+                # the signs of the components follow from their largest
+                # entries, which the approximation can swap
+                signs = np.sign(np.sum(T * T_ref, axis=0))
+                self.assertLess(
+                    np.linalg.norm(T * signs - T_ref) / np.linalg.norm(T_ref), 0.1
+                )
+
+                Y, Y_ref = rff.predict(self.X), kpcovr.predict(self.X)
+                self.assertLess(np.linalg.norm(Y - Y_ref) / np.linalg.norm(self.Y), 0.1)
+                self.assertAlmostEqual(
+                    rff.score(self.X, self.Y),
+                    kpcovr.score(self.X, self.Y),
+                    places=1,
+                )
+
+                T_batch = rff.transform(self.X, batch_size=50)
+                self.assertTrue(np.allclose(T, T_batch))
+
+        with self.assertRaises(ValueError):
+            self.model(kernel="linear", kernel_approximation="rff").fit(self.X, self.Y)
+        with self.assertRaises(ValueError):
+            self.model(kernel="rbf", kernel_approximation="other").fit(self.X, self.Y)
+        with self.assertRaises(ValueError):
+            self.model(kernel="rbf", kernel_approximation="rff").fit_path(
+                self.X, self.Y, [0.1]
+            )
+
 
 class KPCovRTestSVDSolvers(KPCovRBaseTest):
     def test_svd_solvers(self):
@@ -257,16 +711,101 @@ class KPCovRTestSVDSolvers(KPCovRBaseTest):
         This test checks that PCovR works with all svd_solver modes and assigns
         the right n_components
         """
-        for solver in ["arpack", "full", "randomized", "auto"]:
+        for solver in [
+            "arpack",
+            "full",
+            "randomized",
+            "auto",
+            "eigh",
+            "eigsh",
+            "lobpcg",
+        ]:
             with self.subTest(solver=solver):
                 pcovr = self.model(tol=1e-12, svd_solver=solver)
                 pcovr.fit(self.X, self.Y)
 
-                if solver == "arpack":
+                if solver in ["arpack", "eigsh"]:
                     self.assertTrue(pcovr.n_components == self.X.shape[0] - 1)
                 else:
                     self.assertTrue(pcovr.n_components == self.X.shape[0])
 
+    def test_symmetric_solvers(self):
+        """
+        This test checks that the symmetric eigensolvers yield the same
+        projections, including signs, as svd_solver='full'.
+        """
+        kpcovr = self.model(n_components=2, kernel="rbf", svd_solver="full")
+        kpcovr.fit(self.X, self.Y)
+
+        for solver in ["eigh", "eigsh", "lobpcg"]:
+            with self.subTest(solver=solver):
+                kpcovr_sym = self.model(n_components=2, kernel="rbf", svd_solver=solver)
+                kpcovr_sym.fit(self.X, self.Y)
+
+                self.assertTrue(
+                    np.allclose(
+                        kpcovr_sym.transform(self.X),
+                        kpcovr.transform(self.X),
+                        atol=self.error_tol,
+                    )
+                )
+                self.assertTrue(
+                    np.allclose(
+                        kpcovr_sym.predict(self.X),
+                        kpcovr.predict(self.X),
+                        atol=self.error_tol,
+                    )
+                )
+
+    def test_adaptive_solver(self):
+        """
+        This test checks that the adaptive solver selects the same number of
+        components for a fraction of the explained variance as the full SVD,
+        and yields the same projections.
+        """
+        for n_components in [0.99, 0.9999]:
+            with self.subTest(n_components=n_components):
+                kpcovr = self.model(
+                    n_components=n_components, kernel="rbf", svd_solver="full"
+                ).fit(self.X, self.Y)
+                kpcovr_adaptive = self.model(
+                    n_components=n_components,
+                    kernel="rbf",
+                    svd_solver="adaptive",
+                    random_state=0,
+                ).fit(self.X, self.Y)
+
+                self.assertEqual(kpcovr_adaptive.n_components, kpcovr.n_components)
+                self.assertTrue(
+                    np.allclose(
+                        kpcovr_adaptive.transform(self.X),
+                        kpcovr.transform(self.X),
+                        atol=self.error_tol,
+                    )
+                )
+
+    def test_fit_policy(self):
+        """
+        This test checks that, with the rates pinned in `setUp`, KPCovR
+        selects and records the cheapest of the solvers suited to n_components.
+        """
+        for n_components, solvers, selection in [
+            (2, {"full", "randomized", "eigsh"}, "randomized"),
+            (0.99, {"full", "adaptive"}, "adaptive"),
+        ]:
+            with self.subTest(n_components=n_components):
+                kpcovr = self.model(n_components=n_components, kernel="rbf")
+                kpcovr.fit(self.X, self.Y)
+
+                policy = kpcovr.fit_policy_
+                self.assertEqual(kpcovr._fit_svd_solver, selection)
+                self.assertEqual(policy["svd_solver"], selection)
+                self.assertEqual(policy["cost_constants"], PINNED_COST_CONSTANTS)
+                self.assertEqual(
+                    {c["svd_solver"] for c in policy["candidates"]}, solvers
+                )
+                self.assertTrue(all(c["seconds"] > 0 for c in policy["candidates"]))
+
     def test_bad_solver(self):
         """
         This test checks that PCovR will not work with a solver that isn't in
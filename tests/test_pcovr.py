@@ -1,9 +1,27 @@
+import os
+import tempfile
 import unittest
 from skcosmo.decomposition import PCovR
 from sklearn.datasets import load_boston
 import numpy as np
+from scipy import sparse
 from sklearn import exceptions
+from sklearn.linear_model import Ridge
 from sklearn.utils.validation import check_X_y
+from skcosmo.utils import cost_model
+from unittest import mock
+
+# rates of the cost model, and unlimited memory, such that the 'auto'
+# selections do not depend on the machine running the tests
+PINNED_COST_CONSTANTS = {"gemm": 5e10, "gemv": 5e9, "decomposition": 1e10}
+
+
+def pinned_cost_model():
+    return mock.patch.multiple(
+        cost_model,
+        _COST_CONSTANTS=PINNED_COST_CONSTANTS,
+        available_memory=lambda: None,
+    )
 
 
 class PCovRBaseTest(unittest.TestCase):
@@ -16,7 +34,9 @@ class PCovRBaseTest(unittest.TestCase):
         self.X, self.Y = load_boston(return_X_y=True)
 
     def setUp(self):
-        pass
+        patcher = pinned_cost_model()
+        patcher.start()
+        self.addCleanup(patcher.stop)
 
 
 class PCovRErrorTest(PCovRBaseTest):
@@ -125,6 +145,24 @@ class PCovRErrorTest(PCovRBaseTest):
 
             prev_error = error
 
+    def test_singular_feature_space(self):
+        """
+        This test checks that feature-space PCovR returns real, finite
+        projectors when X^T X is singular.
+        """
+        X = np.hstack([self.X, self.X[:, :2]])
+
+        pcovr = self.model(mixing=0.5, n_components=2, space="feature")
+        pcovr.fit(X, self.Y)
+
+        for P in [pcovr.pxt_, pcovr.ptx_, pcovr.pty_]:
+            self.assertTrue(np.isrealobj(P))
+            self.assertTrue(np.all(np.isfinite(P)))
+
+        Yp = pcovr.predict(X)
+        error = np.linalg.norm(self.Y - Yp) ** 2.0 / np.linalg.norm(self.Y) ** 2.0
+        self.assertLess(error, 1.0)
+
 
 class PCovRSpaceTest(PCovRBaseTest):
     def test_select_feature_space(self):
@@ -149,6 +187,66 @@ class PCovRSpaceTest(PCovRBaseTest):
 
         self.assertTrue(pcovr.space == "sample")
 
+    def test_fit_policy(self):
+        """
+        This test checks that, with the rates pinned in `setUp`, the cost
+        model selects a full decomposition for small data, an iterative solver
+        for few components of a large matrix, and the adaptive solver for a
+        fractional n_components, and that PCovR records its selection.
+        """
+        for shape, n_components, selection in [
+            ((10, 13), 2, ("sample", "full")),
+            ((500, 13), 2, ("feature", "full")),
+            ((200, 5000), 2, ("sample", "randomized")),
+            ((5000, 1000), 2, ("sample", "randomized")),
+            ((20000, 2000), 0.9, ("feature", "adaptive")),
+        ]:
+            with self.subTest(shape=shape, n_components=n_components):
+                pcovr = self.model(n_components=n_components)
+                pcovr._set_fit_parameters(*shape)
+
+                policy = pcovr.fit_policy_
+                self.assertEqual((pcovr.space, pcovr._fit_svd_solver), selection)
+                self.assertEqual((policy["space"], policy["svd_solver"]), selection)
+                self.assertEqual(policy["cost_constants"], PINNED_COST_CONSTANTS)
+
+        pcovr = self.model(n_components=2).fit(self.X, self.Y)
+        self.assertEqual(
+            (pcovr.fit_policy_["space"], pcovr.fit_policy_["svd_solver"]),
+            ("feature", "full"),
+        )
+
+    def test_fit_policy_itemsize(self):
+        """
+        This test checks that the memory estimates of the cost model follow
+        the precision of the data.
+        """
+        policies = {}
+        for dtype in [np.float64, np.float32]:
+            pcovr = self.model(n_components=2).fit(
+                self.X.astype(dtype), self.Y.astype(dtype)
+            )
+            policies[dtype] = pcovr.fit_policy_
+
+        for c64, c32 in zip(
+            policies[np.float64]["candidates"], policies[np.float32]["candidates"]
+        ):
+            self.assertEqual(c32["bytes"], c64["bytes"] // 2)
+
+    def test_fit_policy_fixed(self):
+        """
+        This test checks that the cost model does not override a space and a
+        solver given in the constructor.
+        """
+        pcovr = self.model(
+            n_components=2, tol=1e-12, space="sample", svd_solver="eigsh"
+        )
+        pcovr.fit(self.X, self.Y)
+
+        self.assertEqual(pcovr.space, "sample")
+        self.assertEqual(pcovr.fit_policy_["svd_solver"], "eigsh")
+        self.assertEqual(len(pcovr.fit_policy_["candidates"]), 1)
+
     def test_bad_space(self):
         """
         This test checks that PCovR raises a ValueError when a non-valid
@@ -220,16 +318,134 @@ class PCovRTestSVDSolvers(PCovRBaseTest):
         This test checks that PCovR works with all svd_solver modes and assigns
         the right n_components
         """
-        for solver in ["arpack", "full", "randomized", "auto"]:
+        for solver in [
+            "arpack",
+            "full",
+            "randomized",
+            "auto",
+            "eigh",
+            "eigsh",
+            "lobpcg",
+        ]:
             with self.subTest(solver=solver):
                 pcovr = self.model(tol=1e-12, svd_solver=solver)
                 pcovr.fit(self.X, self.Y)
 
-                if solver == "arpack":
+                if solver in ["arpack", "eigsh"]:
                     self.assertTrue(pcovr.n_components == min(self.X.shape) - 1)
                 else:
                     self.assertTrue(pcovr.n_components == min(self.X.shape))
 
+    def test_symmetric_solvers(self):
+        """
+        This test checks that the symmetric eigensolvers yield the same
+        projections, including signs, as the full SVD.
+        """
+        for space in ["feature", "sample"]:
+            pcovr = self.model(n_components=2, space=space, svd_solver="full")
+            pcovr.fit(self.X, self.Y)
+
+            for solver in ["eigh", "eigsh", "lobpcg"]:
+                with self.subTest(space=space, solver=solver):
+                    pcovr_sym = self.model(
+                        n_components=2, space=space, svd_solver=solver
+                    )
+                    pcovr_sym.fit(self.X, self.Y)
+
+                    self.assertTrue(
+                        np.allclose(
+                            pcovr_sym.transform(self.X),
+                            pcovr.transform(self.X),
+                            self.error_tol,
+                        )
+                    )
+                    self.assertTrue(
+                        np.allclose(
+                            pcovr_sym.predict(self.X),
+                            pcovr.predict(self.X),
+                            self.error_tol,
+                        )
+                    )
+
+    def test_adaptive_solver(self):
+        """
+        This test checks that the adaptive solver selects the same number of
+        components for a fraction of the explained variance as the full SVD,
+        and yields the same projections.
+        """
+        X = (self.X - self.X.mean(axis=0)) / self.X.std(axis=0)
+
+        for n_components in [0.9, 0.99]:
+            with self.subTest(n_components=n_components):
+                pcovr = self.model(
+                    n_components=n_components, space="sample", svd_solver="full"
+                ).fit(X, self.Y)
+                pcovr_adaptive = self.model(
+                    n_components=n_components,
+                    space="sample",
+                    svd_solver="adaptive",
+                    random_state=0,
+                ).fit(X, self.Y)
+
+                self.assertEqual(pcovr_adaptive.n_components, pcovr.n_components)
+                self.assertTrue(
+                    np.allclose(
+                        pcovr_adaptive.transform(X),
+                        pcovr.transform(X),
+                        atol=self.error_tol,
+                    )
+                )
+
+    def test_matrix_free(self):
+        """
+        This test checks that sample-space PCovR yields the same projections
+        when the modified kernel is only accessed through its products.
+        """
+        pcovr = self.model(n_components=2, space="sample", svd_solver="full")
+        pcovr.fit(self.X, self.Y)
+
+        for solver in ["auto", "arpack", "randomized", "eigsh", "lobpcg"]:
+            with self.subTest(solver=solver):
+                pcovr_op = self.model(
+                    n_components=2,
+                    space="sample",
+                    svd_solver=solver,
+                    matrix_free=True,
+                    random_state=0,
+                )
+                pcovr_op.fit(self.X, self.Y)
+
+                self.assertTrue(
+                    np.allclose(
+                        pcovr_op.predict(self.X),
+                        pcovr.predict(self.X),
+                        self.error_tol,
+                    )
+                )
+                self.assertTrue(
+                    np.allclose(
+                        pcovr_op.inverse_transform(pcovr_op.transform(self.X)),
+                        pcovr.inverse_transform(pcovr.transform(self.X)),
+                        self.error_tol,
+                    )
+                )
+
+    def test_matrix_free_full_solver(self):
+        """
+        This test checks that PCovR raises a ValueError when a solver which
+        requires the explicit modified kernel is used with matrix_free=True.
+        """
+        for solver in ["full", "eigh"]:
+            with self.subTest(solver=solver):
+                with self.assertRaises(ValueError):
+                    pcovr = self.model(
+                        n_components=2,
+                        space="sample",
+                        svd_solver=solver,
+                        matrix_free=True,
+                    )
+                    pcovr.fit(self.X, self.Y)
+
     def test_bad_solver(self):
         """
         This test checks that PCovR will not work with a solver that isn't in
@@ -338,6 +554,515 @@ class PCovRTestSVDSolvers(PCovRBaseTest):
                     )
 
 
+class PCovRPathTest(PCovRBaseTest):
+    def test_path_matches_fit(self):
+        """
+        This test checks that the models returned by `fit_path` are
+        equivalent to those obtained by fitting each mixing separately.
+        """
+        mixings = np.linspace(0.01, 0.99, 5)
+
+        for space in ["feature", "sample"]:
+            with self.subTest(space=space):
+                models, losses = self.model(n_components=2, space=space).fit_path(
+                    self.X, self.Y, mixings
+                )
+                self.assertEqual(len(models), len(mixings))
+                self.assertEqual(losses.shape, mixings.shape)
+
+                for mixing, model, loss in zip(mixings, models, losses):
+                    pcovr = self.model(mixing=mixing, n_components=2, space=space)
+                    pcovr.fit(self.X, self.Y)
+
+                    self.assertEqual(model.mixing, mixing)
+                    self.assertTrue(
+                        np.allclose(
+                            model.predict(self.X),
+                            pcovr.predict(self.X),
+                            self.error_tol,
+                        )
+                    )
+                    self.assertTrue(
+                        np.allclose(
+                            model.inverse_transform(model.transform(self.X)),
+                            pcovr.inverse_transform(pcovr.transform(self.X)),
+                            self.error_tol,
+                        )
+                    )
+                    self.assertAlmostEqual(loss, pcovr.score(self.X, self.Y))
+
+
+class PCovRPartialFitTest(PCovRBaseTest):
+    def test_partial_fit_matches_fit(self):
+        """
+        This test checks that fitting PCovR chunk by chunk yields the same
+        projections as fitting it on the full data at once.
+        """
+        for mixing in [0.0, 0.5, 1.0]:
+            with self.subTest(mixing=mixing):
+                pcovr = PCovR(mixing=mixing, n_components=1, space="feature")
+                pcovr.fit(self.X, self.Y)
+
+                pcovr_partial = PCovR(mixing=mixing, n_components=1)
+                for chunk in np.array_split(np.arange(self.X.shape[0]), 5):
+                    pcovr_partial.partial_fit(self.X[chunk], self.Y[chunk])
+
+                self.assertEqual(pcovr_partial.n_samples_seen_, self.X.shape[0])
+                self.assertTrue(np.allclose(pcovr_partial.mean_, pcovr.mean_))
+                self.assertTrue(
+                    np.allclose(
+                        pcovr_partial.predict(self.X),
+                        pcovr.predict(self.X),
+                        self.error_tol,
+                    )
+                )
+                self.assertTrue(
+                    np.allclose(
+                        pcovr_partial.inverse_transform(
+                            pcovr_partial.transform(self.X)
+                        ),
+                        pcovr.inverse_transform(pcovr.transform(self.X)),
+                        self.error_tol,
+                    )
+                )
+
+    def test_update_matches_fit(self):
+        """
+        This test checks that updating a fitted PCovR with new samples yields
+        the same projectors as fitting on all samples at once.
+        """
+
+        n_old = 300
+        for Y in [self.Y, np.vstack([self.Y, self.Y ** 2]).T]:
+            with self.subTest(Y_shape=Y.shape):
+                ref = self.model(n_components=2, space="feature").fit(self.X, Y)
+                pcovr = self.model(n_components=2, space="feature")
+                pcovr.fit(self.X[:n_old], Y[:n_old])
+                pcovr.update(self.X[n_old:400], Y[n_old:400])
+                pcovr.update(self.X[400:], Y[400:])
+
+                self.assertTrue(np.allclose(pcovr.mean_, ref.mean_))
+                self.assertTrue(np.allclose(pcovr.pxy_, ref.pxy_))
+                self.assertTrue(
+                    np.allclose(
+                        pcovr.transform(self.X), ref.transform(self.X), atol=1e-6
+                    )
+                )
+
+    def test_update_after_fit_path(self):
+        """
+        This test checks that the models returned by `fit_path` in feature
+        space can be updated as if fitted by `fit`.
+        """
+
+        n_old = 300
+        mixings = [0.1, 0.5]
+        models, _ = self.model(n_components=2, space="feature").fit_path(
+            self.X[:n_old], self.Y[:n_old], mixings
+        )
+
+        for mixing, pcovr in zip(mixings, models):
+            with self.subTest(mixing=mixing):
+                ref = self.model(mixing=mixing, n_components=2, space="feature")
+                ref.fit(self.X, self.Y)
+
+                pcovr.update(self.X[n_old:], self.Y[n_old:])
+                self.assertTrue(np.allclose(pcovr.pxy_, ref.pxy_))
+                self.assertTrue(
+                    np.allclose(
+                        pcovr.transform(self.X), ref.transform(self.X), atol=1e-6
+                    )
+                )
+
+    def test_alpha_matches_fit(self):
+        """
+        This test checks that partial_fit, fit_from_covariance, fit_shards
+        and update regularize the regression as fit does, with a non-default
+        `alpha` and with a non-default `estimator`.
+        """
+        n_old = 300
+        for kwargs in [
+            dict(alpha=1e3),
+            dict(estimator=Ridge(alpha=1e3, fit_intercept=False, tol=1e-12)),
+        ]:
+            with self.subTest(**kwargs):
+
+                def model():
+                    return PCovR(mixing=0.5, n_components=2, space="feature", **kwargs)
+
+                Y_ref = model().fit(self.X, self.Y).predict(self.X)
+
+                pcovr_partial = model()
+                for chunk in np.array_split(np.arange(self.X.shape[0]), 5):
+                    pcovr_partial.partial_fit(self.X[chunk], self.Y[chunk])
+
+                pcovr_cov = model().fit_from_covariance(
+                    self.X.T @ self.X,
+                    self.X.T @ self.Y,
+                    self.X.shape[0],
+                    mean=self.X.mean(axis=0),
+                )
+
+                pcovr_shards = model().fit_shards(
+                    [self.X[:100], self.X[100:]], [self.Y[:100], self.Y[100:]]
+                )
+
+                pcovr_update = model().fit(self.X[:n_old], self.Y[:n_old])
+                pcovr_update.update(self.X[n_old:], self.Y[n_old:])
+
+                for pcovr in [pcovr_partial, pcovr_cov, pcovr_shards, pcovr_update]:
+                    self.assertTrue(
+                        np.allclose(pcovr.predict(self.X), Y_ref, self.error_tol)
+                    )
+
+    def test_update_sample_space(self):
+        """
+        This test checks that updating a PCovR fitted in sample space raises
+        a ValueError.
+        """
+
+        pcovr = self.model(n_components=2, space="sample").fit(self.X, self.Y)
+        with self.assertRaises(ValueError):
+            pcovr.update(self.X[:10], self.Y[:10])
+
+    def test_fit_shards(self):
+        """
+        This test checks that fitting PCovR from shards, stored as `.npy`
+        files or passed as arrays, yields the same projectors as fitting on
+        all samples at once.
+        """
+
+        pcovr = self.model(n_components=2, space="feature").fit(self.X, self.Y)
+        bounds = [0, 100, 250, self.X.shape[0]]
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            paths_X, paths_Y = [], []
+            for i, (start, stop) in enumerate(zip(bounds[:-1], bounds[1:])):
+                paths_X.append(os.path.join(tmpdir, "X_%d.npy" % i))
+                paths_Y.append(os.path.join(tmpdir, "Y_%d.npy" % i))
+                np.save(paths_X[-1], self.X[start:stop])
+                np.save(paths_Y[-1], self.Y[start:stop])
+
+            pcovr_shards = self.model(n_components=2).fit_shards(
+                paths_X, paths_Y, n_jobs=2
+            )
+
+        self.assertTrue(np.allclose(pcovr_shards.mean_, pcovr.mean_))
+        self.assertTrue(np.allclose(pcovr_shards.pxy_, pcovr.pxy_))
+        self.assertTrue(
+            np.allclose(
+                pcovr_shards.transform(self.X), pcovr.transform(self.X), atol=1e-6
+            )
+        )
+
+        pcovr_arrays = self.model(n_components=2).fit_shards(
+            [self.X[:100], self.X[100:]], [self.Y[:100], self.Y[100:]]
+        )
+        self.assertTrue(np.allclose(pcovr_arrays.pxy_, pcovr.pxy_))
+
+    def test_fit_shards_bad_shape(self):
+        """
+        This test checks that fitting PCovR from shards raises a ValueError
+        for mismatched shards.
+        """
+
+        with self.assertRaises(ValueError):
+            self.model().fit_shards(
+                [self.X[:100], self.X[100:, :5]], [self.Y[:100], self.Y[100:]]
+            )
+        with self.assertRaises(ValueError):
+            self.model().fit_shards([self.X[:100]], [self.Y[:100], self.Y[100:]])
+
+    def test_fit_from_covariance(self):
+        """
+        This test checks that fitting PCovR from X^T X and X^T Y yields the
+        same projections as fitting it on X and Y.
+        """
+        for mixing in [0.0, 0.5, 1.0]:
+            with self.subTest(mixing=mixing):
+                pcovr = PCovR(mixing=mixing, n_components=1, space="feature")
+                pcovr.fit(self.X, self.Y)
+
+                pcovr_cov = PCovR(mixing=mixing, n_components=1)
+                pcovr_cov.fit_from_covariance(
+                    self.X.T @ self.X,
+                    self.X.T @ self.Y,
+                    self.X.shape[0],
+                    mean=self.X.mean(axis=0),
+                )
+
+                self.assertEqual(pcovr_cov.pxy_.shape, pcovr.pxy_.shape)
+                self.assertTrue(
+                    np.allclose(
+                        pcovr_cov.predict(self.X),
+                        pcovr.predict(self.X),
+                        self.error_tol,
+                    )
+                )
+                self.assertTrue(
+                    np.allclose(
+                        pcovr_cov.inverse_transform(pcovr_cov.transform(self.X)),
+                        pcovr.inverse_transform(pcovr.transform(self.X)),
+                        self.error_tol,
+                    )
+                )
+
+    def test_fit_from_covariance_bad_shape(self):
+        """
+        This test checks that PCovR raises a ValueError when the supplied
+        covariances are inconsistent.
+        """
+        pcovr = self.model(n_components=2)
+        with self.assertRaises(ValueError):
+            pcovr.fit_from_covariance(
+                self.X.T @ self.X, self.X[:, :-1].T @ self.Y, self.X.shape[0]
+            )
+
+    def test_partial_fit_sample_space(self):
+        """
+        This test checks that PCovR raises a ValueError when partial_fit
+        is used in sample space.
+        """
+        pcovr = self.model(n_components=2, space="sample")
+        with self.assertRaises(ValueError):
+            pcovr.partial_fit(self.X, self.Y)
+
+    def test_partial_fit_bad_shape(self):
+        """
+        This test checks that PCovR raises a ValueError when a chunk does
+        not have the same number of features as the previous ones.
+        """
+        pcovr = self.model(n_components=2)
+        pcovr.partial_fit(self.X, self.Y)
+        with self.assertRaises(ValueError):
+            pcovr.partial_fit(self.X[:, :-1], self.Y)
+
+    def test_partial_fit_after_fit(self):
+        """
+        This test checks that partial_fit after fit, fit_path or fit_shards
+        starts afresh, rather than adding to the statistics accumulated before.
+        """
+        n_old = 300
+        pcovr_ref = PCovR(mixing=0.5, n_components=2, space="feature")
+        pcovr_ref.partial_fit(self.X[n_old:], self.Y[n_old:])
+
+        for method in ["fit", "fit_path", "fit_shards"]:
+            with self.subTest(method=method):
+                pcovr = PCovR(mixing=0.5, n_components=2, space="feature")
+                pcovr.partial_fit(self.X[:n_old], self.Y[:n_old])
+
+                if method == "fit":
+                    pcovr.fit(self.X[:, :-1], self.Y)
+                elif method == "fit_path":
+                    pcovr.fit_path(self.X[:, :-1], self.Y, [0.5])
+                else:
+                    pcovr.fit_shards([self.X[:, :-1]], [self.Y])
+                self.assertFalse(hasattr(pcovr, "n_samples_seen_"))
+
+                pcovr.partial_fit(self.X[n_old:], self.Y[n_old:])
+                self.assertEqual(pcovr.n_samples_seen_, self.X.shape[0] - n_old)
+                self.assertTrue(
+                    np.allclose(
+                        pcovr.predict(self.X),
+                        pcovr_ref.predict(self.X),
+                        self.error_tol,
+                    )
+                )
+
+
+class PCovRPrecisionTest(PCovRBaseTest):
+    def test_float32_dtype(self):
+        """
+        This test checks that PCovR fitted on float32 data keeps float32
+        projectors, projections and predictions in both spaces.
+        """
+
+        X = self.X.astype(np.float32)
+        Y = self.Y.astype(np.float32)
+
+        for space in ["feature", "sample"]:
+            with self.subTest(space=space):
+                pcovr = self.model(n_components=2, space=space).fit(X, Y)
+
+                for attr in ["pxt_", "ptx_", "pty_", "pxy_", "singular_values_"]:
+                    self.assertEqual(getattr(pcovr, attr).dtype, np.float32)
+
+                self.assertEqual(pcovr.transform(X).dtype, np.float32)
+                self.assertEqual(pcovr.predict(X).dtype, np.float32)
+
+    def test_float32_accuracy(self):
+        """
+        This test checks that float32 fits, with and without float64
+        decompositions, agree with a float64 fit to single precision.
+        """
+
+        X = self.X - self.X.mean(axis=0)
+        Y = self.Y - self.Y.mean(axis=0)
+
+        for space in ["feature", "sample"]:
+            for decomposition_dtype in [None, np.float64]:
+                with self.subTest(space=space, decomposition_dtype=decomposition_dtype):
+                    ref = self.model(n_components=2, space=space).fit(X, Y)
+                    pcovr = self.model(
+                        n_components=2,
+                        space=space,
+                        decomposition_dtype=decomposition_dtype,
+                    ).fit(X.astype(np.float32), Y.astype(np.float32))
+
+                    T_ref = ref.transform(X)
+                    T = pcovr.transform(X.astype(np.float32))
+                    self.assertLessEqual(
+                        np.linalg.norm(T - T_ref) / np.linalg.norm(T_ref), 1e-4
+                    )
+
+                    Y_ref = ref.predict(X)
+                    Yp = pcovr.predict(X.astype(np.float32))
+                    self.assertLessEqual(
+                        np.linalg.norm(Yp - Y_ref) / np.linalg.norm(Y_ref), 1e-4
+                    )
+
+
+class PCovRBlockwiseTest(PCovRBaseTest):
+    def test_batch_size(self):
+        """
+        This test checks that processing the input in blocks of rows gives the
+        same transform, predict and inverse_transform as a single block.
+        """
+
+        pcovr = self.model(n_components=2).fit(self.X, self.Y)
+        T = pcovr.transform(self.X)
+
+        self.assertTrue(np.allclose(pcovr.transform(self.X, batch_size=7), T))
+        self.assertTrue(
+            np.allclose(pcovr.predict(self.X, batch_size=7), pcovr.predict(self.X))
+        )
+        self.assertTrue(
+            np.allclose(pcovr.predict(T=T, batch_size=7), pcovr.predict(T=T))
+        )
+        self.assertTrue(
+            np.allclose(
+                pcovr.inverse_transform(T, batch_size=7), pcovr.inverse_transform(T)
+            )
+        )
+
+    def test_memmap(self):
+        """
+        This test checks that PCovR transforms a memory-mapped input into a
+        memory-mapped output supplied through `out`.
+        """
+
+        pcovr = self.model(n_components=2).fit(self.X, self.Y)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            X = np.memmap(
+                os.path.join(tmpdir, "X.mmap"),
+                dtype=np.float64,
+                mode="w+",
+                shape=self.X.shape,
+            )
+            X[:] = self.X
+            out = np.memmap(
+                os.path.join(tmpdir, "T.mmap"),
+                dtype=np.float64,
+                mode="w+",
+                shape=(self.X.shape[0], 2),
+            )
+
+            T = pcovr.transform(X, out=out, batch_size=50)
+            self.assertIs(T, out)
+            self.assertTrue(np.allclose(out, pcovr.transform(self.X)))
+            del X, T, out
+
+    def test_bad_out_shape(self):
+        """
+        This test checks that PCovR raises a ValueError when `out` does not
+        have one row per input sample.
+        """
+
+        pcovr = self.model(n_components=2).fit(self.X, self.Y)
+
+        with self.assertRaises(ValueError):
+            pcovr.transform(self.X, out=np.zeros((self.X.shape[0] - 1, 2)))
+
+
+class PCovRSparseTest(PCovRBaseTest):
+    def test_sparse_matches_dense(self):
+        """
+        This test checks that PCovR fitted on sparse CSR and CSC matrices gives
+        the same projections, predictions and scores as on dense arrays.
+        """
+
+        X = sparse.random(300, 40, density=0.05, random_state=0, format="csr")
+        Y = X @ np.linspace(-1, 1, 40)
+
+        for fmt in ["csr", "csc"]:
+            for space, matrix_free in [
+                ("feature", False),
+                ("sample", False),
+                ("sample", True),
+            ]:
+                with self.subTest(fmt=fmt, space=space, matrix_free=matrix_free):
+                    kwargs = dict(
+                        n_components=3,
+                        space=space,
+                        svd_solver="arpack",
+                        matrix_free=matrix_free,
+                        random_state=0,
+                    )
+                    ref = self.model(**kwargs).fit(X.toarray(), Y)
+                    pcovr = self.model(**kwargs).fit(X.asformat(fmt), Y)
+
+                    self.assertTrue(
+                        np.allclose(
+                            pcovr.transform(X.asformat(fmt)), ref.transform(X.toarray())
+                        )
+                    )
+                    self.assertTrue(
+                        np.allclose(
+                            pcovr.predict(X.asformat(fmt)), ref.predict(X.toarray())
+                        )
+                    )
+                    self.assertAlmostEqual(
+                        pcovr.score(X.asformat(fmt), Y), ref.score(X.toarray(), Y)
+                    )
+
+
+class PCovRFitManyTest(PCovRBaseTest):
+    def test_fit_many_matches_fit(self):
+        """
+        This test checks that the models returned by `fit_many`, batched or
+        not, are the same as those fitted one by one, and in the same order.
+        """
+
+        Y2 = np.vstack([self.Y, self.Y ** 0.5]).T
+        data = [
+            (self.X[:200], self.Y[:200]),
+            (self.X[200:400], self.Y[200:400]),
+            (self.X[:200], Y2[:200]),
+            (self.X[:300], self.Y[:300]),
+            (self.X[200:400], Y2[200:400]),
+            # fewer samples than features, fit in sample space
+            (self.X[:10], self.Y[:10]),
+        ]
+
+        models = self.model(n_components=2).fit_many(data)
+        self.assertEqual(len(models), len(data))
+
+        for i, (model, (X, Y)) in enumerate(zip(models, data)):
+            with self.subTest(i=i):
+                ref = self.model(n_components=2).fit(X, Y)
+                self.assertEqual(model.space, ref.space)
+                self.assertEqual(model.pxy_.shape, ref.pxy_.shape)
+                self.assertTrue(np.allclose(model.pxy_, ref.pxy_))
+                self.assertTrue(np.allclose(model.transform(X), ref.transform(X)))
+                self.assertTrue(
+                    np.allclose(
+                        model.inverse_transform(model.transform(X)),
+                        ref.inverse_transform(ref.transform(X)),
+                    )
+                )
+
+
 class PCovRInfrastructureTest(PCovRBaseTest):
     def test_nonfitted_failure(self):
         """
@@ -370,6 +1095,21 @@ class PCovRInfrastructureTest(PCovRBaseTest):
         self.assertTrue(check_X_y(self.X, T, multi_output=True))
         self.assertTrue(T.shape[-1] == n_components)
 
+    def test_transform_predict(self):
+        """
+        This test checks that `transform_predict` returns the same projection
+        and predicted properties as `transform` and `predict`.
+        """
+        for Y in [self.Y, np.vstack([self.Y, self.Y ** 2]).T]:
+            for space in ["feature", "sample"]:
+                with self.subTest(Y_shape=Y.shape, space=space):
+                    pcovr = self.model(n_components=2, space=space).fit(self.X, Y)
+                    T, Yp = pcovr.transform_predict(self.X, batch_size=100)
+
+                    self.assertTrue(np.allclose(T, pcovr.transform(self.X)))
+                    self.assertEqual(Yp.shape, pcovr.predict(self.X).shape)
+                    self.assertTrue(np.allclose(Yp, pcovr.predict(self.X)))
+
     def test_default_alpha(self):
         pcovr = PCovR(mixing=0.5)
         estimator_reg = getattr(pcovr.estimator, "alpha")
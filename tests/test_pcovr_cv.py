@@ -0,0 +1,118 @@
+import unittest
+from skcosmo.decomposition import PCovR, PCovRCV
+from sklearn.datasets import load_boston
+from sklearn.linear_model import Ridge
+from sklearn.model_selection import KFold
+import numpy as np
+
+
+class PCovRCVTest(unittest.TestCase):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        X, Y = load_boston(return_X_y=True)
+        self.X = (X - X.mean(axis=0)) / X.std(axis=0)
+        self.Y = (Y - Y.mean()) / Y.std()
+
+        self.mixings = [0.2, 0.8]
+        self.n_components = [1, 3, 5]
+        self.alphas = [1e-6, 1e-1]
+
+    def test_losses_match_pcovr(self):
+        """
+        This test checks that the cross-validation losses computed from the
+        shared fold factorizations equal the scores of PCovR fitted on each
+        fold with the same parameters.
+        """
+
+        pcovr_cv = PCovRCV(
+            mixings=self.mixings,
+            n_components=self.n_components,
+            alphas=self.alphas,
+            cv=3,
+            n_jobs=2,
+        ).fit(self.X, self.Y)
+
+        for fold, (train, test) in enumerate(KFold(3).split(self.X)):
+            for i_mixing, mixing in enumerate(self.mixings):
+                for i_alpha, alpha in enumerate(self.alphas):
+                    for i_components, n_components in enumerate(self.n_components):
+                        with self.subTest(
+                            fold=fold,
+                            mixing=mixing,
+                            alpha=alpha,
+                            n_components=n_components,
+                        ):
+                            pcovr = PCovR(
+                                mixing=mixing,
+                                n_components=n_components,
+                                alpha=alpha,
+                                space="feature",
+                                svd_solver="full",
+                                estimator=Ridge(
+                                    alpha=alpha, fit_intercept=False, tol=1e-12
+                                ),
+                            ).fit(self.X[train], self.Y[train])
+                            self.assertAlmostEqual(
+                                pcovr.score(self.X[test], self.Y[test]),
+                                pcovr_cv.cv_losses_[
+                                    fold, i_mixing, i_alpha, i_components
+                                ],
+                            )
+
+    def test_best_estimator(self):
+        """
+        This test checks that PCovRCV refits PCovR with the parameters of the
+        lowest mean loss, and delegates to it.
+        """
+
+        pcovr_cv = PCovRCV(
+            mixings=self.mixings,
+            n_components=self.n_components,
+            alphas=self.alphas,
+            cv=3,
+        ).fit(self.X, self.Y)
+
+        self.assertEqual(pcovr_cv.best_loss_, pcovr_cv.cv_losses_.mean(axis=0).min())
+        self.assertEqual(pcovr_cv.best_estimator_.mixing, pcovr_cv.mixing_)
+        self.assertEqual(pcovr_cv.best_estimator_.n_components, pcovr_cv.n_components_)
+        self.assertTrue(
+            np.allclose(
+                pcovr_cv.transform(self.X), pcovr_cv.best_estimator_.transform(self.X)
+            )
+        )
+        self.assertTrue(
+            np.allclose(
+                pcovr_cv.predict(self.X), pcovr_cv.best_estimator_.predict(self.X)
+            )
+        )
+
+    def test_scalar_parameters(self):
+        """
+        This test checks that PCovRCV accepts a single value of mixing,
+        n_components and alpha, as for a grid of one value.
+        """
+
+        pcovr_cv = PCovRCV(mixings=0.5, n_components=3, alphas=1e-6, cv=3).fit(
+            self.X, self.Y
+        )
+        pcovr_cv_grid = PCovRCV(
+            mixings=[0.5], n_components=[3], alphas=[1e-6], cv=3
+        ).fit(self.X, self.Y)
+
+        self.assertEqual(pcovr_cv.cv_losses_.shape, (3, 1, 1, 1))
+        self.assertEqual(pcovr_cv.n_components_, 3)
+        self.assertTrue(np.allclose(pcovr_cv.cv_losses_, pcovr_cv_grid.cv_losses_))
+
+    def test_bad_n_components(self):
+        """
+        This test checks that PCovRCV raises a ValueError when a number of
+        components exceeds the rank of the training folds.
+        """
+
+        with self.assertRaises(ValueError):
+            PCovRCV(n_components=[1, self.X.shape[1] + 1]).fit(self.X, self.Y)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -1,5 +1,6 @@
 import unittest
-from skcosmo.utils import pcovr_covariance, pcovr_kernel
+from skcosmo.utils import pcovr_covariance, pcovr_kernel, pcovr_kernel_operator
+from skcosmo.utils.pcovr_utils import _decompose_adaptive_rank, _decompose_symmetric
 from sklearn.datasets import load_boston
 import numpy as np
 import scipy
@@ -46,6 +47,51 @@ class KernelTest(unittest.TestCase):
                 K = pcovr_kernel(alpha, self.X, self.Y)
                 self.assertTrue(np.allclose(K, alpha * K_X + (1 - alpha) * K_Y))
 
+    def test_operator(self):
+        Y = self.Y.reshape(-1, 1)
+        V = np.random.uniform(-1, 1, (self.X.shape[0], 3))
+
+        for alpha in [0.0, 0.5, 1.0]:
+            with self.subTest(alpha=alpha):
+                K = pcovr_kernel(alpha, self.X, Y)
+                K_op = pcovr_kernel_operator(alpha, self.X, Y)
+                self.assertEqual(K_op.shape, K.shape)
+                self.assertTrue(np.allclose(K_op @ V, K @ V))
+                self.assertTrue(np.allclose(K_op @ V[:, 0], K @ V[:, 0]))
+
+
+class DecompositionTest(unittest.TestCase):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        X, Y = load_boston(return_X_y=True)
+        X = (X - X.mean(axis=0)) / X.std(axis=0)
+        self.K = pcovr_kernel(0.5, X, Y.reshape(-1, 1) / Y.std())
+
+    def test_solvers(self):
+        U_ref, S_ref, Vt_ref = np.linalg.svd(self.K)
+
+        for svd_solver in ["full", "eigh", "arpack", "eigsh", "lobpcg", "randomized"]:
+            with self.subTest(svd_solver=svd_solver):
+                U, S, Vt = _decompose_symmetric(
+                    self.K, 3, svd_solver, random_state=0, iterated_power=20
+                )
+                self.assertTrue(np.allclose(S, S_ref[:3]))
+                self.assertTrue(np.allclose(np.abs(U), np.abs(U_ref[:, :3]), atol=1e-6))
+                self.assertTrue(np.allclose(U, Vt.T))
+
+        with self.assertRaises(ValueError):
+            _decompose_symmetric(self.K, 3, "other")
+
+    def test_adaptive_rank(self):
+        variance = np.cumsum(np.linalg.svd(self.K, compute_uv=False) ** 2)
+        variance /= variance[-1]
+
+        U, S, Vt = _decompose_adaptive_rank(self.K, 0.99, random_state=0)
+        self.assertEqual(len(S), np.searchsorted(variance, 0.99, side="right") + 1)
+        self.assertEqual(U.shape, (self.K.shape[0], len(S)))
+
+        self.assertIsNone(_decompose_adaptive_rank(self.K[:30, :30], 0.99))
+
 
 if __name__ == "__main__":
     unittest.main(verbosity=2)
@@ -0,0 +1,185 @@
+import unittest
+from skcosmo.decomposition import KPCovR, SparseKPCovR
+from sklearn.datasets import load_boston
+import numpy as np
+from skcosmo.preprocessing import StandardFlexibleScaler as SFS
+
+
+class SparseKPCovRBaseTest(unittest.TestCase):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        self.error_tol = 1e-5
+
+        self.X, self.Y = load_boston(return_X_y=True)
+
+        # artificial second property
+        self.Y = np.array(
+            [self.Y, self.X @ np.random.randint(-2, 2, (self.X.shape[-1],))]
+        ).T
+        self.Y = self.Y.reshape(self.X.shape[0], -1)
+
+        self.X = SFS().fit_transform(self.X)
+        self.Y = SFS(column_wise=True).fit_transform(self.Y)
+
+        self.model = lambda mixing=0.5, **kwargs: SparseKPCovR(
+            mixing, alpha=1e-8, **kwargs
+        )
+
+    def setUp(self):
+        pass
+
+
+class SparseKPCovRTest(SparseKPCovRBaseTest):
+    def test_full_active_set(self):
+        """
+        This test checks that SparseKPCovR gives the results of KPCovR when
+        the active set is the whole training set.
+        """
+        for center in [False, True]:
+            for mixing in [0.1, 0.5, 0.9]:
+                with self.subTest(center=center, mixing=mixing):
+                    kwargs = dict(
+                        n_components=3,
+                        kernel="rbf",
+                        center=center,
+                        svd_solver="full",
+                        fit_inverse_transform=True,
+                    )
+                    kpcovr = KPCovR(mixing=mixing, alpha=1e-8, **kwargs)
+                    kpcovr.fit(self.X, self.Y)
+
+                    skpcovr = self.model(mixing=mixing, **kwargs)
+                    skpcovr.fit(self.X, self.Y, X_active=self.X)
+
+                    self.assertTrue(
+                        np.allclose(
+                            skpcovr.transform(self.X),
+                            kpcovr.transform(self.X),
+                            atol=self.error_tol,
+                        )
+                    )
+                    self.assertTrue(
+                        np.allclose(
+                            skpcovr.predict(self.X),
+                            kpcovr.predict(self.X),
+                            atol=self.error_tol,
+                        )
+                    )
+                    self.assertAlmostEqual(
+                        skpcovr.score(self.X, self.Y),
+                        kpcovr.score(self.X, self.Y),
+                        places=5,
+                    )
+
+    def test_n_active(self):
+        """
+        This test checks that SparseKPCovR selects an active set of n_active
+        points, whose projectors have n_active rows.
+        """
+        skpcovr = self.model(n_components=2, n_active=50, kernel="rbf")
+        skpcovr.fit(self.X, self.Y)
+
+        self.assertEqual(skpcovr.X_fit_.shape, (50, self.X.shape[1]))
+        self.assertEqual(skpcovr.pkt_.shape, (50, 2))
+
+        T, Y = skpcovr.transform_predict(self.X)
+        self.assertTrue(np.allclose(T, skpcovr.transform(self.X)))
+        self.assertTrue(np.allclose(Y, skpcovr.predict(self.X)))
+
+        error = np.linalg.norm(self.Y - Y) ** 2.0 / np.linalg.norm(self.Y) ** 2.0
+        self.assertLess(error, 0.5)
+
+    def test_regression_arguments(self):
+        """
+        This test checks that Yhat and W are the third and fourth arguments
+        of `fit`, as for KPCovR, that W gives the regression Yhat = K_NM W,
+        and that the active set is keyword-only.
+        """
+        X_active = self.X[:50]
+        K = self.model(kernel="rbf")._get_kernel(self.X, X_active)
+        W = np.linalg.lstsq(K, self.Y, rcond=None)[0]
+
+        reference = self.model(n_components=2, kernel="rbf")
+        reference.fit(self.X, self.Y, Yhat=K @ W, X_active=X_active)
+
+        for args in [(K @ W,), (None, W)]:
+            with self.subTest(args=len(args)):
+                skpcovr = self.model(n_components=2, kernel="rbf")
+                skpcovr.fit(self.X, self.Y, *args, X_active=X_active)
+                self.assertTrue(
+                    np.allclose(
+                        skpcovr.transform(self.X),
+                        reference.transform(self.X),
+                        atol=self.error_tol,
+                    )
+                )
+
+        with self.assertRaises(TypeError):
+            self.model(n_components=2).fit(self.X, self.Y, None, None, X_active)
+
+    def test_precomputed(self):
+        """
+        This test checks that SparseKPCovR raises a ValueError for precomputed
+        kernels.
+        """
+        K = self.X @ self.X.T
+        with self.assertRaises(ValueError):
+            self.model(kernel="precomputed", n_active=10).fit(K, self.Y)
+
+    def test_fit_path(self):
+        """
+        This test checks that `fit_path` over gammas and mixings gives the
+        models and losses of separate fits on the same active set.
+        """
+        X_active = self.X[:50]
+        kwargs = dict(n_components=2, kernel="rbf", svd_solver="full")
+
+        for center in [False, True]:
+            for path in [dict(gammas=[0.05, 0.2]), dict(mixings=[0.1, 0.5, 0.9])]:
+                with self.subTest(center=center, path=list(path)):
+                    skpcovr = self.model(center=center, **kwargs)
+                    models, losses = skpcovr.fit_path(
+                        self.X, self.Y, X_active=X_active, **path
+                    )
+
+                    name, values = next(iter(path.items()))
+                    self.assertEqual(len(models), len(values))
+                    for model, loss, value in zip(models, losses, values):
+                        reference = self.model(center=center, **kwargs)
+                        reference.set_params(**{name[:-1]: value})
+                        reference.fit(self.X, self.Y, X_active=X_active)
+
+                        self.assertTrue(
+                            np.allclose(
+                                model.transform(self.X),
+                                reference.transform(self.X),
+                                atol=self.error_tol,
+                            )
+                        )
+                        self.assertAlmostEqual(
+                            loss, reference.score(self.X, self.Y), places=6
+                        )
+
+        with self.assertRaises(ValueError):
+            self.model(n_active=10).fit_path(self.X, self.Y)
+
+    def test_no_active_set(self):
+        """
+        This test checks that SparseKPCovR raises a ValueError when neither an
+        active set nor n_active is given.
+        """
+        with self.assertRaises(ValueError):
+            self.model(n_components=2).fit(self.X, self.Y)
+
+    def test_bad_n_components(self):
+        """
+        This test checks that SparseKPCovR raises a ValueError when
+        n_components exceeds the size of the active set.
+        """
+        with self.assertRaises(ValueError):
+            self.model(n_components=20, n_active=10).fit(self.X, self.Y)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)